@@ -0,0 +1,258 @@
+"""
+Capacity Load Test for Wellness Companion
+Ramps up concurrent simulated check-ins in one worker process until turn latency degrades
+
+    uv run python benchmarks/loadtest.py --start 10 --step 10 --max 200 --think-time 1.0
+    uv run python benchmarks/loadtest.py --max-ttfa-p95 1.2 --json capacity.json
+
+Each step runs `concurrency` scripted conversations (see wellness_bench.py)
+whose starts are spread over --ramp-seconds, while event-loop lag, process
+CPU, RSS and tool-call latency are recorded. The test stops at the first
+step that breaches a latency, loop-lag or error threshold and prints a
+capacity report with suggested WorkerOptions sizing.
+
+All sessions share this process's event loop, the same way jobs share a
+process with `JobExecutorType.THREAD`. With the default process executor
+every job gets its own process, so the per-session CPU and memory costs are
+what the host-level estimates are built from.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Optional
+from unittest.mock import patch
+
+import psutil
+from scenarios import SCENARIOS
+from stubs import stub_provider_factories
+from wellness_bench import BenchConfig, _parse_latency, isolated_store, run_session
+
+# wellness_bench has put src/ on the path
+import agent
+from wellness_providers import ProviderRegistry
+from wellness_tracing import LatencyTracer
+from wellness_watchdog import LoopWatchdog
+
+logger = logging.getLogger("wellness_loadtest")
+
+
+@dataclass
+class StepResult:
+    """Measurements for one concurrency level"""
+
+    concurrency: int
+    duration_s: float
+    errors: int
+    cpu_cores: float
+    peak_rss_mb: float
+    loop_lag_s: dict[str, float]
+    latency_s: dict[str, dict[str, Any]]
+    loop_blocks: int = 0
+    top_blockers: list[Any] = field(default_factory=list)
+    healthy: bool = True
+    breaches: list[str] = field(default_factory=list)
+
+
+async def run_step(concurrency: int, config: BenchConfig, ramp_seconds: float) -> StepResult:
+    """Run one concurrency level and collect its measurements"""
+    scenario = SCENARIOS[config.scenario]
+    tracer = LatencyTracer()
+    process = psutil.Process()
+    watchdog = LoopWatchdog(block_threshold=0.05, interval=0.02)
+    peak_rss = process.memory_info().rss
+    rng = random.Random(config.seed + concurrency)
+
+    async def staggered(index: int) -> None:
+        await asyncio.sleep(rng.uniform(0, ramp_seconds))
+        await run_session(index, config, scenario, tracer)
+
+    async def sample_rss() -> None:
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, process.memory_info().rss)
+            await asyncio.sleep(0.1)
+
+    watchdog.start()
+    sampler = asyncio.create_task(sample_rss())
+    cpu_before = process.cpu_times()
+    started = time.perf_counter()
+
+    results = await asyncio.gather(*(staggered(i) for i in range(concurrency)), return_exceptions=True)
+
+    duration = time.perf_counter() - started
+    cpu_after = process.cpu_times()
+    sampler.cancel()
+    await watchdog.stop()
+    loop_stats = watchdog.stats()
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    for error in errors[:3]:
+        logger.warning(f"Session failed at concurrency {concurrency}: {error!r}")
+
+    cpu_seconds = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    return StepResult(
+        concurrency=concurrency,
+        duration_s=round(duration, 3),
+        errors=len(errors),
+        cpu_cores=round(cpu_seconds / duration, 3),
+        peak_rss_mb=round(peak_rss / 2**20, 1),
+        loop_lag_s=loop_stats["lag_s"],
+        loop_blocks=loop_stats["blocks"],
+        top_blockers=loop_stats["top_blockers"],
+        latency_s=tracer.summary(),
+    )
+
+
+def check_step(step: StepResult, max_ttfa_p95: float, max_loop_lag_p95: float) -> None:
+    """Mark a step unhealthy if any threshold is breached"""
+    ttfa_p95 = step.latency_s.get("time_to_first_audio", {}).get("p95")
+    lag_p95 = step.loop_lag_s.get("p95", 0.0)
+    if step.errors:
+        step.breaches.append(f"{step.errors} session(s) failed")
+    if ttfa_p95 is None or ttfa_p95 > max_ttfa_p95:
+        step.breaches.append(f"time_to_first_audio p95 {ttfa_p95} > {max_ttfa_p95}s")
+    if lag_p95 > max_loop_lag_p95:
+        step.breaches.append(f"loop lag p95 {lag_p95:.3f} > {max_loop_lag_p95}s")
+    step.healthy = not step.breaches
+
+
+def capacity_report(
+    steps: list[StepResult],
+    baseline_rss_mb: float,
+    process_init_s: float,
+    load_threshold: float,
+    arrival_rate: float,
+) -> dict[str, Any]:
+    """Summarize the ramp into sizing numbers for WorkerOptions"""
+    healthy = [step for step in steps if step.healthy]
+    saturated = next((step for step in steps if not step.healthy), None)
+    cpu_count = psutil.cpu_count() or 1
+
+    report: dict[str, Any] = {
+        "cpu_count": cpu_count,
+        "process_init_s": round(process_init_s, 3),
+        "max_concurrency_per_process": healthy[-1].concurrency if healthy else 0,
+        "saturated_at": saturated.concurrency if saturated else None,
+        "saturation_reasons": saturated.breaches if saturated else [],
+        "steps": [asdict(step) for step in steps],
+    }
+    if not healthy:
+        return report
+
+    top = healthy[-1]
+    cores_per_session = max(top.cpu_cores / top.concurrency, 1e-6)
+    rss_per_session_mb = max(0.0, top.peak_rss_mb - baseline_rss_mb) / top.concurrency
+    report.update(
+        {
+            "cpu_cores_per_session": round(cores_per_session, 4),
+            "rss_per_session_mb": round(rss_per_session_mb, 2),
+            "suggested_worker_options": {
+                "load_threshold": load_threshold,
+                # The default load function is host CPU utilisation, so this is
+                # roughly where the worker stops accepting jobs
+                "est_sessions_per_host": math.floor(cpu_count * load_threshold / cores_per_session),
+                # Enough warm processes to absorb arrivals while new ones prewarm
+                "num_idle_processes": max(1, math.ceil(arrival_rate * process_init_s)),
+            },
+        }
+    )
+    return report
+
+
+def _measure_process_init(config: BenchConfig) -> float:
+    """Time the work a fresh job process does before it can take a job, with stub network providers"""
+    registry = ProviderRegistry(
+        stub_provider_factories(
+            SCENARIOS[config.scenario].responder,
+            config.stt_latency,
+            config.llm_ttft,
+            config.llm_token_interval,
+            config.tts_ttfb,
+            random.Random(config.seed),
+        )
+    )
+    started = time.perf_counter()
+    with patch.object(agent, "get_provider_registry", return_value=registry):
+        agent.prewarm(SimpleNamespace(userdata={}))
+    return time.perf_counter() - started
+
+
+async def run_load_test(args: argparse.Namespace) -> dict[str, Any]:
+    config = BenchConfig(
+        scenario=args.scenario,
+        seed=args.seed,
+        stt_latency=args.stt_latency,
+        llm_ttft=args.llm_ttft,
+        llm_token_interval=args.llm_token_interval,
+        tts_ttfb=args.tts_ttfb,
+        think_time=args.think_time,
+    )
+    process_init_s = _measure_process_init(config)
+    steps: list[StepResult] = []
+
+    async with isolated_store():
+        # Warm up imports and first-use setup before measuring
+        await run_session(-1, config, SCENARIOS[config.scenario], LatencyTracer())
+        baseline_rss_mb = psutil.Process().memory_info().rss / 2**20
+
+        concurrency = args.start
+        while concurrency <= args.max:
+            step = await run_step(concurrency, config, args.ramp_seconds)
+            check_step(step, args.max_ttfa_p95, args.max_loop_lag_p95)
+            steps.append(step)
+            ttfa = step.latency_s.get("time_to_first_audio", {})
+            print(
+                f"concurrency {concurrency:>4}: ttfa p95 {ttfa.get('p95', float('nan')) * 1000:7.1f} ms, "
+                f"loop lag p95 {step.loop_lag_s.get('p95', 0.0) * 1000:6.1f} ms, "
+                f"blocks {step.loop_blocks:3}, cpu {step.cpu_cores:5.2f} cores, rss {step.peak_rss_mb:7.1f} MB"
+                + ("" if step.healthy else f"  SATURATED: {'; '.join(step.breaches)}")
+            )
+            if not step.healthy and not args.keep_going:
+                break
+            concurrency += args.step
+
+    return capacity_report(steps, baseline_rss_mb, process_init_s, args.load_threshold, args.arrival_rate)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", type=int, default=10, help="first concurrency level")
+    parser.add_argument("--step", type=int, default=10, help="concurrency added per step")
+    parser.add_argument("--max", type=int, default=200, help="highest concurrency level")
+    parser.add_argument("--ramp-seconds", type=float, default=2.0, help="spread session starts over this window")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="daily_check_in")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stt-latency", type=_parse_latency, default="0.15,0.03", help="MEAN[,STDDEV] seconds")
+    parser.add_argument("--llm-ttft", type=_parse_latency, default="0.35,0.08", help="MEAN[,STDDEV] seconds")
+    parser.add_argument("--llm-token-interval", type=_parse_latency, default="0.01", help="MEAN[,STDDEV] seconds")
+    parser.add_argument("--tts-ttfb", type=_parse_latency, default="0.2,0.05", help="MEAN[,STDDEV] seconds")
+    parser.add_argument("--think-time", type=float, default=1.0, help="pause between user turns in seconds")
+    parser.add_argument("--max-ttfa-p95", type=float, default=1.5, help="time to first audio p95 limit in seconds")
+    parser.add_argument("--max-loop-lag-p95", type=float, default=0.05, help="event-loop lag p95 limit in seconds")
+    parser.add_argument("--load-threshold", type=float, default=0.7, help="WorkerOptions.load_threshold to size for")
+    parser.add_argument("--arrival-rate", type=float, default=0.5, help="expected peak job arrivals per second")
+    parser.add_argument("--keep-going", action="store_true", help="continue ramping past saturation")
+    parser.add_argument("--json", type=Path, help="also write the capacity report to this file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    report = asyncio.run(run_load_test(args))
+
+    print(json.dumps({key: value for key, value in report.items() if key != "steps"}, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
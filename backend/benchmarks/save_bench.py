@@ -0,0 +1,112 @@
+"""
+Check-in Save Benchmark for Wellness Companion
+Measures durable saves/sec for a burst of concurrent check-ins, with and without group commit
+
+    uv run python benchmarks/save_bench.py --saves 2000 --users 200
+    uv run python benchmarks/save_bench.py --backend sqlite --window-ms 5
+
+Every save waits until its entry is fsynced. The baseline commits each save
+on its own (commit window 0, batch size 1); the grouped run lets saves that
+arrive within `--window-ms` share one write and fsync.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+from unittest.mock import patch
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+
+from wellness_io import AsyncWellnessStore  # noqa: E402
+from wellness_sqlite import SQLiteWellnessStore  # noqa: E402
+from wellness_storage import WellnessStore  # noqa: E402
+
+
+def _entry(index: int) -> dict[str, Any]:
+    return {
+        "date": "2025-11-24",
+        "timestamp": f"2025-11-24T08:{index // 60 % 60:02d}:{index % 60:02d}",
+        "mood": "good",
+        "energy": "medium",
+        "objectives": ["stretch", "plan the week"],
+        "summary": f"Check-in {index}",
+    }
+
+
+async def run_burst(
+    backend: str, saves: int, users: int, commit_window: float, max_batch: int
+) -> dict[str, Any]:
+    """Save `saves` check-ins for `users` users at once and time them"""
+    with tempfile.TemporaryDirectory(prefix="wellness_save_bench_") as tmp_dir:
+        if backend == "sqlite":
+            sync_store = SQLiteWellnessStore(Path(tmp_dir) / "wellness.db")
+        else:
+            sync_store = WellnessStore(tmp_dir)
+        store = AsyncWellnessStore(sync_store, commit_window=commit_window, max_batch=max_batch)
+
+        fsync_count = 0
+        real_fsync = os.fsync
+
+        def counting_fsync(fd: int) -> None:
+            nonlocal fsync_count
+            fsync_count += 1
+            real_fsync(fd)
+
+        with patch("wellness_storage.os.fsync", counting_fsync):
+            started = time.perf_counter()
+            await asyncio.gather(*(store.append(f"user{i % users}", _entry(i)) for i in range(saves)))
+            duration = time.perf_counter() - started
+        await store.close()
+
+    result = {
+        "duration_s": round(duration, 3),
+        "saves_per_sec": round(saves / duration, 1),
+        "commits": store.group_commits,
+    }
+    if backend == "jsonl":
+        result["fsyncs"] = fsync_count
+    return result
+
+
+async def run_save_bench(args: argparse.Namespace) -> dict[str, Any]:
+    baseline = await run_burst(args.backend, args.saves, args.users, 0.0, 1)
+    grouped = await run_burst(args.backend, args.saves, args.users, args.window_ms / 1000, args.max_batch)
+    return {
+        "backend": args.backend,
+        "saves": args.saves,
+        "users": args.users,
+        "per_save": baseline,
+        "group_commit": grouped,
+        "speedup": round(grouped["saves_per_sec"] / baseline["saves_per_sec"], 1),
+    }
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=("jsonl", "sqlite"), default="jsonl")
+    parser.add_argument("--saves", type=int, default=1000, help="number of check-ins in the burst")
+    parser.add_argument("--users", type=int, default=100, help="number of distinct users saving")
+    parser.add_argument("--window-ms", type=float, default=10.0, help="group commit window in milliseconds")
+    parser.add_argument("--max-batch", type=int, default=256, help="saves that trigger an immediate commit")
+    parser.add_argument("--json", type=Path, help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run_save_bench(args))
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Scripted check-in conversations replayed by the wellness benchmark
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+from livekit.agents import llm
+from stubs import StubReply, tool_call
+
+
+@dataclass
+class ScriptedTurn:
+    """One user utterance and the agent's scripted answer to it
+
+    If `tool` is set the agent first calls it with `arguments`, then speaks
+    `follow_up` once the tool result is back.
+    """
+
+    user: str
+    reply: str
+    tool: Optional[str] = None
+    arguments: dict = field(default_factory=dict)
+    follow_up: str = ""
+
+
+@dataclass
+class Scenario:
+    name: str
+    turns: list[ScriptedTurn]
+    # Spoken when the agent opens the conversation for a returning user, before anyone has talked
+    greeting: str = "Welcome back! How are you feeling today, and how's your energy?"
+
+    def responder(self, chat_ctx: llm.ChatContext) -> StubReply:
+        """Pick the scripted reply for the current state of the conversation"""
+        last = chat_ctx.items[-1] if chat_ctx.items else None
+        if last is not None and last.type == "function_call_output":
+            turn = next(t for t in self.turns if t.tool == last.name)
+            return StubReply(text=turn.follow_up)
+
+        user_text = next(
+            (item.text_content for item in reversed(chat_ctx.items) if item.type == "message" and item.role == "user"),
+            None,
+        )
+        if user_text is None:
+            return StubReply(text=self.greeting)
+        turn = next(t for t in self.turns if t.user == user_text)
+        if turn.tool is None:
+            return StubReply(text=turn.reply)
+        return StubReply(text=turn.reply, tool_calls=[tool_call(turn.tool, **turn.arguments)])
+
+
+DAILY_CHECK_IN = Scenario(
+    name="daily_check_in",
+    turns=[
+        ScriptedTurn(
+            user="I'm feeling pretty good today, energy is medium",
+            reply="That's great to hear! What are one to three things you'd like to accomplish today?",
+        ),
+        ScriptedTurn(
+            user="I want to finish my project, go for a walk, and call my mom",
+            reply=(
+                "Those sound like lovely goals. Try breaking the project into small steps and take "
+                "your walk after the first one. So you're feeling good with medium energy, and you "
+                "want to finish your project, go for a walk, and call your mom. Does this sound right?"
+            ),
+        ),
+        ScriptedTurn(
+            user="Yes, that sounds right",
+            reply="Saving your check-in now.",
+            tool="save_check_in",
+            arguments={
+                "mood": "good",
+                "energy": "medium",
+                "objectives": ["finish my project", "go for a walk", "call my mom"],
+                "stressors": None,
+                "summary": "Feeling good with medium energy.",
+            },
+            follow_up=(
+                "All saved! Would you like me to save these objectives to your Notion workspace "
+                "so you can track them there as well?"
+            ),
+        ),
+        ScriptedTurn(
+            user="No thanks, that's all for today",
+            reply="No problem. Have a wonderful day, and take care!",
+        ),
+    ],
+)
+
+SCENARIOS = {scenario.name: scenario for scenario in (DAILY_CHECK_IN,)}
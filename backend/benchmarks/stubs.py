@@ -0,0 +1,255 @@
+"""
+Local stand-ins for the wellness agent's speech and language providers
+Deterministic replacements for Deepgram STT, Gemini and Murf TTS that never touch the network
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    NOT_GIVEN,
+    APIConnectOptions,
+    NotGivenOr,
+    llm,
+    stt,
+    tts,
+    utils,
+)
+from livekit.agents.voice import io
+from livekit.plugins import noise_cancellation, silero
+
+
+@dataclass
+class Latency:
+    """Latency distribution in seconds: normally distributed, clamped at zero"""
+
+    mean: float = 0.0
+    stddev: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.stddev <= 0:
+            return max(0.0, self.mean)
+        return max(0.0, rng.gauss(self.mean, self.stddev))
+
+
+@dataclass
+class StubReply:
+    """What the stub LLM answers: spoken text and optional tool calls"""
+
+    text: str = ""
+    tool_calls: Optional[list[llm.FunctionToolCall]] = None
+
+
+class StubSTT(stt.STT):
+    """Batch STT returning scripted transcripts after a sampled delay
+
+    Every `recognize()` call pops the next transcript from `transcripts`.
+    """
+
+    def __init__(self, transcripts: deque[str], latency: Latency, rng: random.Random):
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self.transcripts = transcripts
+        self.latency = latency
+        self.rng = rng
+
+    async def _recognize_impl(
+        self,
+        buffer: utils.AudioBuffer,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions,
+    ) -> stt.SpeechEvent:
+        await asyncio.sleep(self.latency.sample(self.rng))
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            request_id=utils.shortuuid(),
+            alternatives=[stt.SpeechData(language="en", text=self.transcripts.popleft())],
+        )
+
+
+class StubLLM(llm.LLM):
+    """LLM that streams scripted replies word by word
+
+    `responder` maps the chat context to the reply; the first token is
+    delayed by `ttft` and every following token by `token_interval`.
+    """
+
+    def __init__(
+        self,
+        responder: Callable[[llm.ChatContext], StubReply],
+        ttft: Latency,
+        token_interval: Latency,
+        rng: random.Random,
+    ):
+        super().__init__()
+        self.responder = responder
+        self.ttft = ttft
+        self.token_interval = token_interval
+        self.rng = rng
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list[llm.FunctionTool]] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict] = NOT_GIVEN,
+    ) -> "_StubLLMStream":
+        return _StubLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class _StubLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        stub: StubLLM = self._llm
+        reply = stub.responder(self._chat_ctx)
+        request_id = utils.shortuuid()
+
+        await asyncio.sleep(stub.ttft.sample(stub.rng))
+        words = reply.text.split()
+        for i, word in enumerate(words):
+            if i > 0:
+                await asyncio.sleep(stub.token_interval.sample(stub.rng))
+            content = word if i == len(words) - 1 else word + " "
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", content=content))
+            )
+
+        if reply.tool_calls:
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role="assistant", tool_calls=reply.tool_calls),
+                )
+            )
+
+        self._event_ch.send_nowait(
+            llm.ChatChunk(
+                id=request_id,
+                usage=llm.CompletionUsage(
+                    completion_tokens=len(words),
+                    prompt_tokens=len(self._chat_ctx.items),
+                    total_tokens=len(words) + len(self._chat_ctx.items),
+                ),
+            )
+        )
+
+
+class StubTTS(tts.TTS):
+    """Non-streaming TTS producing silence sized to the text
+
+    Audio is returned in one piece after a sampled time to first byte, with a
+    duration of `len(text) / chars_per_second` seconds.
+    """
+
+    def __init__(
+        self,
+        ttfb: Latency,
+        rng: random.Random,
+        sample_rate: int = 24000,
+        chars_per_second: float = 15.0,
+    ):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self.ttfb = ttfb
+        self.rng = rng
+        self.chars_per_second = chars_per_second
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "_StubChunkedStream":
+        return _StubChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class _StubChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        stub: StubTTS = self._tts
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=stub.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        await asyncio.sleep(stub.ttfb.sample(stub.rng))
+        duration = max(0.1, len(self._input_text) / stub.chars_per_second)
+        output_emitter.push(bytes(int(duration * stub.sample_rate) * 2))
+        output_emitter.flush()
+
+
+class NullAudioOutput(io.AudioOutput):
+    """Audio sink that discards frames and reports playout as finished at once
+
+    Records when the first frame of the current reply arrived, which the
+    benchmark uses as the moment the user would start hearing the agent.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(label="NullAudioOutput", capabilities=io.AudioOutputCapabilities(pause=False))
+        self.first_frame_at: Optional[float] = None
+        self._pushed_duration = 0.0
+        self._capturing = False
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter()
+        self._capturing = True
+        self._pushed_duration += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        self._finish_segment(interrupted=False)
+
+    def clear_buffer(self) -> None:
+        self._finish_segment(interrupted=True)
+
+    def _finish_segment(self, interrupted: bool) -> None:
+        if not self._capturing:
+            return
+        self._capturing = False
+        position, self._pushed_duration = self._pushed_duration, 0.0
+        self.on_playback_finished(playback_position=position, interrupted=interrupted)
+
+
+def tool_call(name: str, **arguments) -> llm.FunctionToolCall:
+    """Build a tool call the stub LLM can emit"""
+    return llm.FunctionToolCall(
+        name=name,
+        arguments=json.dumps(arguments),
+        call_id=f"call_{utils.shortuuid()}",
+    )
+
+
+def stub_provider_factories(
+    responder: Callable[[llm.ChatContext], StubReply],
+    stt_latency: Latency,
+    llm_ttft: Latency,
+    llm_token_interval: Latency,
+    tts_ttfb: Latency,
+    rng: random.Random,
+) -> dict[str, Callable[[], Any]]:
+    """ProviderRegistry factories with the network providers replaced by stubs
+
+    VAD and noise cancellation are the real local models, so their load time
+    still counts towards process initialization. The turn detector needs a
+    job context and is never built here.
+    """
+    return {
+        "vad": silero.VAD.load,
+        "noise_cancellation": noise_cancellation.BVC,
+        "turn_detection": lambda: None,
+        "stt": lambda: StubSTT(deque(), stt_latency, rng),
+        "llm": lambda: StubLLM(responder, llm_ttft, llm_token_interval, rng),
+        "tts": lambda: StubTTS(tts_ttfb, rng),
+    }
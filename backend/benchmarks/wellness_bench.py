@@ -0,0 +1,261 @@
+"""
+Offline Latency Benchmark for Wellness Companion
+Replays scripted check-ins through AgentSession with local stand-ins for STT, LLM and TTS
+
+Nothing here touches the network, so the benchmark can run in CI:
+
+    uv run python benchmarks/wellness_bench.py --sessions 20
+    uv run python benchmarks/wellness_bench.py --sessions 50 --llm-ttft 0.4,0.1 \
+        --max-p95 time_to_first_audio=1.5 --json bench.json
+
+Each scripted user utterance is run through StubSTT.recognize() and its
+transcript submitted with `session.run()`; the reply is generated by StubLLM,
+synthesized by StubTTS and played into a NullAudioOutput.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+import psutil  # noqa: E402
+from livekit import rtc  # noqa: E402
+from livekit.agents import AgentSession, MetricsCollectedEvent, metrics  # noqa: E402
+from livekit.agents.voice.events import FunctionToolsExecutedEvent  # noqa: E402
+from scenarios import SCENARIOS, Scenario  # noqa: E402
+from stubs import Latency, NullAudioOutput, StubLLM, StubSTT, StubTTS  # noqa: E402
+
+import agent  # noqa: E402
+from wellness_io import AsyncWellnessStore  # noqa: E402
+from wellness_storage import WellnessStore  # noqa: E402
+from wellness_tracing import LatencyTracer, TurnSpan  # noqa: E402
+
+logger = logging.getLogger("wellness_bench")
+
+# Sample rate of the simulated microphone audio handed to the STT stand-in
+_MIC_SAMPLE_RATE = 16000
+
+# Speaking rate used to size the simulated utterances
+_WORDS_PER_SECOND = 2.5
+
+
+@dataclass
+class BenchConfig:
+    """Benchmark parameters; latencies are (mean, stddev) in seconds"""
+
+    sessions: int = 10
+    scenario: str = "daily_check_in"
+    seed: int = 0
+    stt_latency: Latency = field(default_factory=lambda: Latency(0.15, 0.03))
+    llm_ttft: Latency = field(default_factory=lambda: Latency(0.35, 0.08))
+    llm_token_interval: Latency = field(default_factory=lambda: Latency(0.01, 0.0))
+    tts_ttfb: Latency = field(default_factory=lambda: Latency(0.2, 0.05))
+    think_time: float = 0.0
+
+
+async def run_session(index: int, config: BenchConfig, scenario: Scenario, tracer: LatencyTracer) -> None:
+    """Replay one scripted conversation, recording a TurnSpan per user turn"""
+    rng = random.Random(config.seed * 100_003 + index)
+    stt_stub = StubSTT(deque(turn.user for turn in scenario.turns), config.stt_latency, rng)
+    audio_output = NullAudioOutput()
+    current: dict[str, Optional[TurnSpan]] = {"span": None}
+
+    async with (
+        StubLLM(scenario.responder, config.llm_ttft, config.llm_token_interval, rng) as llm_stub,
+        StubTTS(config.tts_ttfb, rng) as tts_stub,
+        AgentSession(llm=llm_stub, tts=tts_stub, resume_false_interruption=False) as session,
+    ):
+        session.output.audio = audio_output
+
+        @session.on("metrics_collected")
+        def _on_metrics_collected(ev: MetricsCollectedEvent):
+            span = current["span"]
+            if span is None:
+                return
+            if isinstance(ev.metrics, metrics.LLMMetrics):
+                span.record("llm_ttft", ev.metrics.ttft)
+            elif isinstance(ev.metrics, metrics.TTSMetrics):
+                span.record("tts_ttfb", ev.metrics.ttfb)
+
+        @session.on("function_tools_executed")
+        def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+            span = current["span"]
+            if span is None:
+                return
+            for call, output in zip(ev.function_calls, ev.function_call_outputs):
+                if output is not None:
+                    span.record(f"tool.{call.name}", output.created_at - call.created_at)
+
+        await session.start(await agent.WellnessAssistant.create(user_id=f"bench_{index}"))
+
+        for turn in scenario.turns:
+            span = TurnSpan(started_at=time.time())
+            current["span"] = span
+            audio_output.first_frame_at = None
+            started = time.perf_counter()
+
+            event = await stt_stub.recognize(_utterance_audio(turn.user))
+            span.record("stt", time.perf_counter() - started)
+            span.transcript = event.alternatives[0].text
+
+            await session.run(user_input=span.transcript)
+            if audio_output.first_frame_at is not None:
+                span.record("time_to_first_audio", audio_output.first_frame_at - started)
+            span.record("turn_total", time.perf_counter() - started)
+            current["span"] = None
+            tracer.record(span)
+
+            if config.think_time > 0:
+                await asyncio.sleep(config.think_time)
+
+
+async def run_benchmark(config: BenchConfig) -> dict[str, Any]:
+    """Run `config.sessions` concurrent conversations and summarize them"""
+    scenario = SCENARIOS[config.scenario]
+    process = psutil.Process()
+
+    async with isolated_store():
+        # One untimed conversation so imports and first-use setup are not measured
+        await run_session(-1, config, scenario, LatencyTracer())
+
+        tracer = LatencyTracer()
+        baseline_rss = process.memory_info().rss
+        peak_rss = baseline_rss
+        stop_sampling = asyncio.Event()
+
+        async def sample_rss() -> None:
+            nonlocal peak_rss
+            while not stop_sampling.is_set():
+                peak_rss = max(peak_rss, process.memory_info().rss)
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop_sampling.wait(), 0.05)
+
+        sampler = asyncio.create_task(sample_rss())
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(run_session(i, config, scenario, tracer) for i in range(config.sessions))
+        )
+        duration = time.perf_counter() - started
+        stop_sampling.set()
+        await sampler
+
+    return {
+        "scenario": scenario.name,
+        "sessions": config.sessions,
+        "turns": tracer.turns,
+        "duration_s": round(duration, 3),
+        "sessions_per_sec": round(config.sessions / duration, 3),
+        "rss_per_session_mb": round((peak_rss - baseline_rss) / config.sessions / 2**20, 3),
+        "latency_s": tracer.summary(),
+    }
+
+
+@asynccontextmanager
+async def isolated_store() -> AsyncIterator[AsyncWellnessStore]:
+    """Point the agent at a throwaway check-in store for the duration of a run"""
+    original_store = agent.wellness_store
+    with tempfile.TemporaryDirectory(prefix="wellness_bench_") as tmp_dir:
+        agent.wellness_store = AsyncWellnessStore(WellnessStore(tmp_dir))
+        try:
+            yield agent.wellness_store
+        finally:
+            await agent.wellness_store.close()
+            agent.wellness_store = original_store
+
+
+def _utterance_audio(text: str) -> rtc.AudioFrame:
+    """Silence as long as it would take to say `text`"""
+    samples = int(len(text.split()) / _WORDS_PER_SECOND * _MIC_SAMPLE_RATE)
+    return rtc.AudioFrame(bytes(samples * 2), _MIC_SAMPLE_RATE, 1, samples)
+
+
+def _parse_latency(value: str) -> Latency:
+    mean, _, stddev = value.partition(",")
+    return Latency(float(mean), float(stddev or 0.0))
+
+
+def _parse_threshold(value: str) -> tuple:
+    stage, _, seconds = value.partition("=")
+    if not seconds:
+        raise argparse.ArgumentTypeError(f"expected STAGE=SECONDS, got '{value}'")
+    return stage, float(seconds)
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(
+        f"{report['scenario']}: {report['sessions']} sessions, {report['turns']} turns in "
+        f"{report['duration_s']}s ({report['sessions_per_sec']} sessions/s, "
+        f"{report['rss_per_session_mb']} MB RSS per session)"
+    )
+    print(f"{'stage':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in report["latency_s"].items():
+        print(
+            f"{stage:<24}{stats['count']:>8}"
+            + "".join(f"{stats[p] * 1000:>10.1f}" for p in ("p50", "p95", "p99"))
+        )
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="daily_check_in")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stt-latency", type=_parse_latency, default="0.15,0.03", help="MEAN[,STDDEV] seconds")
+    parser.add_argument("--llm-ttft", type=_parse_latency, default="0.35,0.08", help="MEAN[,STDDEV] seconds")
+    parser.add_argument("--llm-token-interval", type=_parse_latency, default="0.01", help="MEAN[,STDDEV] seconds")
+    parser.add_argument("--tts-ttfb", type=_parse_latency, default="0.2,0.05", help="MEAN[,STDDEV] seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="pause between user turns in seconds")
+    parser.add_argument("--json", type=Path, help="also write the report to this file")
+    parser.add_argument(
+        "--max-p95",
+        type=_parse_threshold,
+        action="append",
+        default=[],
+        metavar="STAGE=SECONDS",
+        help="fail if a stage's p95 exceeds this (repeatable)",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    config = BenchConfig(
+        sessions=args.sessions,
+        scenario=args.scenario,
+        seed=args.seed,
+        stt_latency=args.stt_latency,
+        llm_ttft=args.llm_ttft,
+        llm_token_interval=args.llm_token_interval,
+        tts_ttfb=args.tts_ttfb,
+        think_time=args.think_time,
+    )
+    report = asyncio.run(run_benchmark(config))
+
+    _print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    failed = False
+    for stage, limit in args.max_p95:
+        p95 = report["latency_s"].get(stage, {}).get("p95")
+        if p95 is None or p95 > limit:
+            print(f"REGRESSION: {stage} p95 {p95} exceeds {limit}s", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
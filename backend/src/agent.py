@@ -1,5 +1,5 @@
+import asyncio
 import logging
-import json
 import os
 from datetime import datetime
 from pathlib import Path
@@ -10,105 +10,123 @@ from livekit.agents import (
     Agent,
     AgentSession,
     JobContext,
+    JobExecutorType,
     JobProcess,
     MetricsCollectedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
     metrics,
-    tokenize,
-    llm,
     function_tool,
     RunContext,
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from wellness_analytics import format_trends, get_trend_analytics
+from wellness_audio_quality import (
+    AdaptiveNoiseCancellation,
+    adaptive_noise_cancellation_enabled,
+    check_stream_restart_support,
+    create_noise_cancellation,
+)
+from wellness_batching import batching_stats, check_vad_batching_support, vad_batching_enabled
+from wellness_chunker import FirstChunkTokenizer, get_first_chunk_tokenizer
+from wellness_digest import MemoryDigest, get_memory_digests
+from wellness_greeting import GreetingPipeline
+from wellness_io import AsyncWellnessStore
 from wellness_notion import get_notion_client
+from wellness_prompt import FIRST_GREETING, PREFIX_FINGERPRINT, SPOKEN_PHRASES, build_instructions
+from wellness_providers import get_provider_registry
+from wellness_notion_sync import get_notion_sync_queue
+from wellness_sqlite import SQLiteWellnessStore
+from wellness_storage import DEFAULT_USER_ID, WellnessStore
+from wellness_tracing import get_latency_tracer
+from wellness_tts_cache import get_tts_cache
+from wellness_watchdog import get_loop_watchdog
 
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
-# Path to the wellness log file
-WELLNESS_LOG_PATH = Path("wellness_log.json")
+# Directory holding one append-only wellness journal per user
+WELLNESS_LOG_DIR = Path("wellness_logs")
+# Path to the original `{"entries": [...]}` log, migrated into the default user's journal
+LEGACY_WELLNESS_LOG_PATH = Path("wellness_log.json")
+
+
+def _create_wellness_store():
+    """Create the check-in store selected by WELLNESS_STORAGE_BACKEND ("jsonl" or "sqlite")."""
+    backend = os.getenv("WELLNESS_STORAGE_BACKEND", "jsonl").lower()
+    if backend == "sqlite":
+        db_path = os.getenv("WELLNESS_DB_PATH", "wellness.db")
+        return SQLiteWellnessStore(db_path, legacy_path=LEGACY_WELLNESS_LOG_PATH)
+    if backend != "jsonl":
+        logger.warning(f"Unknown WELLNESS_STORAGE_BACKEND '{backend}', using jsonl")
+    return WellnessStore(WELLNESS_LOG_DIR, legacy_path=LEGACY_WELLNESS_LOG_PATH)
+
+
+# Shared by every session in this worker process; all disk access runs on its I/O threads
+wellness_store = AsyncWellnessStore(
+    _create_wellness_store(),
+    max_workers=int(os.getenv("WELLNESS_IO_THREADS", "4")),
+    # Saves arriving this close together share one write and fsync
+    commit_window=float(os.getenv("WELLNESS_COMMIT_WINDOW_MS", "10")) / 1000,
+)
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+_background_tasks = set()
 
 
 class WellnessAssistant(Agent):
-    def __init__(self) -> None:
-        # Load previous check-ins for context
-        previous_context = self._load_previous_context()
+    def __init__(
+        self,
+        user_id: str = DEFAULT_USER_ID,
+        digest: Optional[MemoryDigest] = None,
+        greeting: Optional[GreetingPipeline] = None,
+    ) -> None:
+        # Check-ins are stored and looked up per user
+        self.user_id = user_id
         
-        super().__init__(
-            instructions=f"""You are a supportive daily health & wellness companion.
-            Your role is to conduct short, friendly check-ins to help users reflect on their wellbeing and set daily intentions.
-            
-            IMPORTANT GUIDELINES:
-            - You are NOT a medical professional. Never diagnose or provide medical advice.
-            - Be warm, empathetic, and supportive.
-            - Keep the conversation natural and conversational, not robotic.
-            - Ask questions thoughtfully and listen actively.
-            - Provide simple, practical, non-medical suggestions when appropriate.
-            
-            YOUR CONVERSATION FLOW:
-            1. **Greet the user warmly** and ask about their mood and energy level
-               - Example: "How are you feeling today?"
-               - "What's your energy like right now?"
-               - "Anything particularly stressing you out or on your mind?"
-            
-            2. **Ask about their daily intentions/objectives**
-               - Example: "What are 1-3 things you'd like to accomplish today?"
-               - "Is there anything you want to do for yourself today - rest, exercise, hobbies?"
-            
-            3. **Offer simple, realistic advice or reflections**
-               - Break large goals into smaller steps
-               - Encourage short breaks
-               - Suggest simple grounding activities (e.g., "take a 5-minute walk", "drink some water")
-               - Be specific and actionable, not generic
-            
-            4. **Close with a brief recap**
-               - Summarize their mood
-               - Repeat back their 1-3 main objectives
-               - Ask: "Does this sound right?"
-               - Once confirmed, use the `save_check_in` tool to store the session data
-               - THEN ask: "Would you like me to save these objectives to your Notion workspace so you can track them there as well?"
-               - If yes, use the `save_to_notion` tool
-            
-            {previous_context}
-            
-            Remember: Keep it conversational, supportive, and grounded. You're here to listen and provide gentle guidance, not to diagnose or prescribe.""",
-        )
-
-    def _load_previous_context(self) -> str:
-        """Load previous check-ins to provide context for the current session."""
-        if not WELLNESS_LOG_PATH.exists():
-            return "This is the user's first check-in session."
+        # Opening line prepared since the job was dispatched, if any
+        self.greeting = greeting
         
+        # Bounded summary of past check-ins, loaded ahead of time by `create()`
+        digest = digest or MemoryDigest()
+        previous_context = digest.render()
+        self.first_session = digest.check_ins == 0
+        
+        # Shared static prefix first so the LLM provider can reuse its prompt cache across sessions
+        super().__init__(instructions=build_instructions(previous_context))
+
+    async def on_enter(self) -> None:
+        if self.greeting is not None:
+            timeout = float(os.getenv("WELLNESS_GREETING_TIMEOUT", "5"))
+            prepared = await self.greeting.greeting(timeout)
+            if prepared is not None:
+                if prepared.audio is None:
+                    self.session.say(prepared.text)
+                else:
+                    # Starts with audio synthesized before the participant joined
+                    self.session.say(prepared.text, audio=prepared.audio.play())
+                return
+
+        if self.first_session:
+            # Same words for every new user, so the audio comes from the TTS cache
+            tts = self.session.tts
+            if tts is None:
+                self.session.say(FIRST_GREETING)
+            else:
+                self.session.say(FIRST_GREETING, audio=get_tts_cache().audio(FIRST_GREETING, tts))
+        else:
+            self.session.generate_reply(instructions="Greet the user and reference their previous check-in.")
+
+    @classmethod
+    async def create(cls, user_id: str = DEFAULT_USER_ID) -> "WellnessAssistant":
+        """Build an assistant with the user's memory digest loaded off the event loop."""
         try:
-            with open(WELLNESS_LOG_PATH, 'r') as f:
-                data = json.load(f)
-                entries = data.get('entries', [])
-                
-                if not entries:
-                    return "This is the user's first check-in session."
-                
-                # Get the most recent entry
-                last_entry = entries[-1]
-                
-                context = f"""PREVIOUS CHECK-IN CONTEXT:
-                Last check-in was on {last_entry.get('date', 'unknown date')}.
-                - Mood: {last_entry.get('mood', 'not recorded')}
-                - Energy: {last_entry.get('energy', 'not recorded')}
-                - Objectives: {', '.join(last_entry.get('objectives', []))}
-                
-                Start the conversation by referencing this previous session naturally.
-                For example: "Last time we talked, you mentioned {last_entry.get('mood', 'feeling')}. How does today compare?"
-                """
-                
-                return context
-                
+            digest = await get_memory_digests().get(user_id, wellness_store)
         except Exception as e:
             logger.error(f"Error loading previous context: {e}")
-            return "This is the user's first check-in session."
+            digest = None
+        return cls(user_id=user_id, digest=digest)
 
     @function_tool
     async def save_check_in(
@@ -119,6 +137,7 @@ class WellnessAssistant(Agent):
         objectives: List[str],
         stressors: Optional[str] = None,
         summary: Optional[str] = None,
+        completed_objectives: Optional[List[str]] = None,
     ):
         """Save the current check-in session data to the wellness log.
 
@@ -128,6 +147,7 @@ class WellnessAssistant(Agent):
             objectives: List of 1-3 daily objectives or intentions the user wants to achieve.
             stressors: Optional description of what's stressing them out or on their mind.
             summary: Optional brief summary of the check-in session.
+            completed_objectives: Optional objectives from the previous check-in that the user says they completed, worded as they were saved.
         """
         # Create the check-in entry
         entry = {
@@ -142,25 +162,23 @@ class WellnessAssistant(Agent):
         if stressors:
             entry["stressors"] = stressors
         
+        if completed_objectives is not None:
+            entry["completed_objectives"] = completed_objectives
+        
         if summary:
             entry["summary"] = summary
         else:
             # Generate a simple summary
             entry["summary"] = f"Feeling {mood} with {energy} energy. Focus areas: {', '.join(objectives[:2])}"
         
-        # Load existing data or create new structure
-        if WELLNESS_LOG_PATH.exists():
-            with open(WELLNESS_LOG_PATH, 'r') as f:
-                data = json.load(f)
-        else:
-            data = {"entries": []}
-        
-        # Add the new entry
-        data["entries"].append(entry)
-        
-        # Save to file
-        with open(WELLNESS_LOG_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Append the new entry to this user's journal
+        await wellness_store.append(self.user_id, entry)
+        get_trend_analytics().record(self.user_id, entry)
+        try:
+            await get_memory_digests().record(self.user_id, entry, wellness_store)
+        except Exception as e:
+            # The check-in itself is saved; the digest is rebuilt from history next session
+            logger.error(f"Error updating memory digest: {e}")
         
         logger.info(f"Saved check-in: {entry}")
         
@@ -177,36 +195,50 @@ class WellnessAssistant(Agent):
         Args:
             num_entries: Number of recent entries to retrieve (default: 5).
         """
-        if not WELLNESS_LOG_PATH.exists():
-            return "No previous check-ins found."
-        
         try:
-            with open(WELLNESS_LOG_PATH, 'r') as f:
-                data = json.load(f)
-                entries = data.get('entries', [])
-                
-                if not entries:
-                    return "No previous check-ins found."
-                
-                # Get the most recent entries
-                recent_entries = entries[-num_entries:]
-                
-                result = f"Found {len(recent_entries)} recent check-in(s):\n\n"
-                for entry in recent_entries:
-                    result += f"Date: {entry.get('date', 'unknown')}\n"
-                    result += f"Mood: {entry.get('mood', 'not recorded')}\n"
-                    result += f"Energy: {entry.get('energy', 'not recorded')}\n"
-                    result += f"Objectives: {', '.join(entry.get('objectives', []))}\n"
-                    if 'summary' in entry:
-                        result += f"Summary: {entry['summary']}\n"
-                    result += "\n"
-                
-                return result
-                
+            # Get the most recent entries
+            recent_entries = await wellness_store.tail(self.user_id, num_entries)
+            
+            if not recent_entries:
+                return "No previous check-ins found."
+            
+            result = f"Found {len(recent_entries)} recent check-in(s):\n\n"
+            for entry in recent_entries:
+                result += f"Date: {entry.get('date', 'unknown')}\n"
+                result += f"Mood: {entry.get('mood', 'not recorded')}\n"
+                result += f"Energy: {entry.get('energy', 'not recorded')}\n"
+                result += f"Objectives: {', '.join(entry.get('objectives', []))}\n"
+                if 'summary' in entry:
+                    result += f"Summary: {entry['summary']}\n"
+                result += "\n"
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Error retrieving check-ins: {e}")
             return f"Error retrieving previous check-ins: {str(e)}"
 
+    @function_tool
+    async def get_wellness_trends(
+        self,
+        context: RunContext,
+        period: str = "month",
+    ):
+        """Summarize how the user's mood and energy have been trending over time.
+
+        Use this when the user asks how they've been doing lately, e.g. "how has my energy been this month?".
+
+        Args:
+            period: "week" (last 7 days), "month" (last 30 days) or "all" (whole history).
+        """
+        days = {"week": 7, "month": 30}.get(period.lower())
+        try:
+            trends = await get_trend_analytics().trends(self.user_id, wellness_store)
+            return format_trends(trends.summary(days, today=datetime.now().date()))
+        except Exception as e:
+            logger.error(f"Error computing wellness trends: {e}")
+            return f"Error computing wellness trends: {e!s}"
+
     @function_tool
     async def save_to_notion(
         self,
@@ -217,8 +249,10 @@ class WellnessAssistant(Agent):
         This tool saves the user's wellness check-in (mood, energy, objectives) to their Notion workspace
         for better tracking and organization.
         
+        The entry is queued and delivered to Notion in the background, so this returns right away.
+        
         Returns:
-            Success message with Notion page URL, or error message if something goes wrong.
+            Confirmation that the entry was queued, or error message if something goes wrong.
         """
         # Get Notion client
         notion = get_notion_client()
@@ -228,44 +262,48 @@ class WellnessAssistant(Agent):
             return "I'm sorry, but Notion integration isn't set up yet. Your check-in is still saved locally though!"
         
         # Get the most recent check-in from local storage
-        if not WELLNESS_LOG_PATH.exists():
-            return "I don't have any check-in data to save to Notion. Please complete a check-in first."
-        
         try:
-            with open(WELLNESS_LOG_PATH, 'r') as f:
-                data = json.load(f)
-                entries = data.get('entries', [])
-                
-                if not entries:
-                    return "No check-in data found to save to Notion."
-                
-                # Get the most recent entry
-                last_entry = entries[-1]
+            last_entry = await wellness_store.latest(self.user_id)
+            
+            if last_entry is None:
+                return "I don't have any check-in data to save to Notion. Please complete a check-in first."
             
-            # Create entry in Notion
-            result = await notion.create_wellness_entry(
-                date=last_entry['date'],
-                mood=last_entry['mood'],
-                energy=last_entry['energy'],
-                objectives=last_entry['objectives'],
-                stressors=last_entry.get('stressors'),
-                summary=last_entry.get('summary')
-            )
+            # Queue the entry; the sync worker delivers it with retries
+            sync_queue = get_notion_sync_queue()
+            key = await sync_queue.enqueue(self.user_id, last_entry)
             
-            logger.info(f"Successfully saved check-in to Notion: {result['page_id']}")
+            logger.info(f"Queued check-in for Notion: {key}")
             
             obj_count = len(last_entry['objectives'])
             obj_word = "objective" if obj_count == 1 else "objectives"
             
-            return f"Perfect! I've created a new entry in your Daily Wellness database with your {obj_count} {obj_word}. You can view and track it in Notion anytime!"
+            return f"Perfect! I'm adding a new entry to your Daily Wellness database with your {obj_count} {obj_word}. It'll show up in Notion in a moment, and you can track it there anytime!"
             
         except Exception as e:
-            logger.error(f"Error saving to Notion: {e}")
-            return f"I had trouble connecting to Notion right now, but don't worry - your check-in is still saved locally! You can try again later."
+            logger.error(f"Error queuing check-in for Notion: {e}")
+            return "I had trouble saving to Notion right now, but don't worry - your check-in is still saved locally! You can try again later."
+
+
+def _resolve_user_id(ctx: JobContext) -> str:
+    """Pick the storage shard for this job's check-ins.
+
+    Jobs dispatched for a specific participant are keyed by that participant's
+    identity; everything else shares the default shard.
+    """
+    if ctx.job.HasField("participant") and ctx.job.participant.identity:
+        return ctx.job.participant.identity
+    return DEFAULT_USER_ID
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # Build the providers before any job needs them; jobs in this process reuse them
+    get_provider_registry().prewarm()
+    # Load the fixed lines' audio cached on disk; the first job synthesizes any that are missing
+    get_tts_cache().prewarm(SPOKEN_PHRASES)
+
+    # Build the Notion client before any job needs it; its schema is loaded by the job's warm_up(),
+    # since a slow Notion API here would exceed the process initialization timeout
+    proc.userdata["notion"] = get_notion_client()
 
 
 async def entrypoint(ctx: JobContext):
@@ -275,28 +313,37 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
-    # Set up a voice AI pipeline using OpenAI, Cartesia, AssemblyAI, and the LiveKit turn detector
+    # Providers are built once per worker process (see wellness_providers.py) and shared by its sessions
+    provider_registry = get_provider_registry()
+    providers = provider_registry.acquire()
+    ctx.add_shutdown_callback(provider_registry.release)
+
+    # Prepare the opening line while the session starts and the participant joins
+    user_id = _resolve_user_id(ctx)
+    greeting = GreetingPipeline(user_id, wellness_store, providers.llm, providers.tts, get_tts_cache()).start()
+    ctx.add_shutdown_callback(greeting.aclose)
+    get_tts_cache().warm_in_background(SPOKEN_PHRASES, providers.tts)
+
+    # Noise cancellation only runs while the participant's audio is noisy (see wellness_audio_quality.py)
+    input_noise_cancellation = create_noise_cancellation(providers.noise_cancellation)
+    if isinstance(input_noise_cancellation, AdaptiveNoiseCancellation):
+        ctx.add_shutdown_callback(input_noise_cancellation.aclose)
+
+    # Set up a voice AI pipeline using Deepgram, Gemini, Murf, and the LiveKit turn detector
     session = AgentSession(
         # Speech-to-text (STT) is your agent's ears, turning the user's speech into text that the LLM can understand
         # See all available models at https://docs.livekit.io/agents/models/stt/
-        stt=deepgram.STT(model="nova-3"),
+        stt=providers.stt,
         # A Large Language Model (LLM) is your agent's brain, processing user input and generating a response
         # See all available models at https://docs.livekit.io/agents/models/llm/
-        llm=google.LLM(
-                model="gemini-2.5-flash",
-            ),
+        llm=providers.llm,
         # Text-to-speech (TTS) is your agent's voice, turning the LLM's text into speech that the user can hear
         # See all available models as well as voice selections at https://docs.livekit.io/agents/models/tts/
-        tts=murf.TTS(
-                voice="en-US-matthew", 
-                style="Conversation",
-                tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-                text_pacing=True
-            ),
+        tts=providers.tts,
         # VAD and turn detection are used to determine when the user is speaking and when the agent should respond
         # See more at https://docs.livekit.io/agents/build/turns
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        turn_detection=providers.turn_detection,
+        vad=providers.vad,
         # allow the LLM to generate a response while waiting for the end of turn
         # See more at https://docs.livekit.io/agents/build/audio/#preemptive-generation
         preemptive_generation=True,
@@ -321,11 +368,62 @@ async def entrypoint(ctx: JobContext):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
 
+    # Measure event-loop lag and report any callback that blocks the loop
+    loop_watchdog = get_loop_watchdog()
+    loop_watchdog.start()
+
+    # Link each turn's STT, end of utterance, LLM, tool and TTS timings into one span
+    latency_tracer = get_latency_tracer()
+    turn_tracker = latency_tracer.attach(session, prompt_fingerprint=PREFIX_FINGERPRINT)
+
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        logger.info(f"Wellness store: {await wellness_store.stats()}")
+        turn_tracker.close()
+        await asyncio.get_running_loop().run_in_executor(None, latency_tracer.flush)
+        logger.info(f"Turn latency: {latency_tracer.summary()}")
+        logger.info(f"Prompt cache: {latency_tracer.prompt_cache_summary()}")
+        logger.info(f"Event loop: {loop_watchdog.stats()}")
+        logger.info(f"Providers: {provider_registry.stats()}")
+        logger.info(f"Inference batching: {batching_stats()}")
+        if isinstance(input_noise_cancellation, AdaptiveNoiseCancellation):
+            logger.info(f"Noise cancellation: {input_noise_cancellation.stats()}")
+        logger.info(f"TTS cache: {get_tts_cache().stats()}")
+        tts_tokenizer = get_first_chunk_tokenizer()
+        if isinstance(tts_tokenizer, FirstChunkTokenizer):
+            logger.info(f"TTS first chunk: {tts_tokenizer.stats()}")
 
     ctx.add_shutdown_callback(log_usage)
+    ctx.add_shutdown_callback(loop_watchdog.stop)
+
+    async def flush_wellness_store():
+        await wellness_store.flush()
+        # Keep the hot journal short by archiving older history in compact form
+        keep_recent = int(os.getenv("WELLNESS_ARCHIVE_KEEP", "50"))
+        archived = await wellness_store.compact(user_id, keep_recent=keep_recent, min_entries=keep_recent)
+        if archived:
+            logger.info(f"Archived {archived} older check-ins")
+
+    ctx.add_shutdown_callback(flush_wellness_store)
+
+    # Deliver queued Notion entries in the background, including any left over
+    # from a previous run, and give them a moment to go out before shutdown
+    notion = ctx.proc.userdata.get("notion") or get_notion_client()
+    if notion.is_enabled():
+        # Connections can only be pooled on the job's event loop, so open one now
+        warm_up_task = asyncio.create_task(notion.warm_up())
+        _background_tasks.add(warm_up_task)
+        warm_up_task.add_done_callback(_background_tasks.discard)
+
+        notion_sync_queue = get_notion_sync_queue()
+        notion_sync_queue.start()
+
+        async def stop_notion_sync():
+            await notion_sync_queue.drain(timeout=5.0)
+            await notion_sync_queue.stop()
+
+        ctx.add_shutdown_callback(stop_notion_sync)
 
     # # Add a virtual avatar to the session, if desired
     # # For other providers, see https://docs.livekit.io/agents/models/avatar/
@@ -337,17 +435,38 @@ async def entrypoint(ctx: JobContext):
 
     # Start the session, which initializes the voice pipeline and warms up the models
     await session.start(
-        agent=WellnessAssistant(),
+        agent=WellnessAssistant(user_id=user_id, digest=await greeting.digest(), greeting=greeting),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            # For telephony applications, use `BVCTelephony` for best results
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=input_noise_cancellation,
         ),
     )
+    if isinstance(input_noise_cancellation, AdaptiveNoiseCancellation):
+        input_noise_cancellation.attach(session.room_io.audio_input)
 
     # Join the room and connect to the user
     await ctx.connect()
 
 
+def _worker_options() -> WorkerOptions:
+    """Worker options, exposing Prometheus metrics when WELLNESS_PROMETHEUS_PORT is set."""
+    options = {"entrypoint_fnc": entrypoint, "prewarm_fnc": prewarm}
+    if vad_batching_enabled():
+        # Only sessions in the same process share VAD batches, so jobs run as threads of one process
+        options["job_executor_type"] = JobExecutorType.THREAD
+    prometheus_port = os.getenv("WELLNESS_PROMETHEUS_PORT")
+    if prometheus_port:
+        # Jobs may run in child processes, so their metrics are collected through a shared directory
+        options["prometheus_port"] = int(prometheus_port)
+        options["prometheus_multiproc_dir"] = os.getenv("WELLNESS_PROMETHEUS_DIR", "prometheus_metrics")
+    return WorkerOptions(**options)
+
+
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
+    # Batched VAD reaches into Silero internals; refuse to start if an upgrade removed them
+    if vad_batching_enabled():
+        check_vad_batching_support()
+    # Adaptive noise cancellation reaches into RoomIO internals; refuse to start if an upgrade removed them
+    if adaptive_noise_cancellation_enabled():
+        check_stream_restart_support()
+    cli.run_app(_worker_options())
@@ -0,0 +1,396 @@
+"""
+Trend Analytics for Wellness Companion
+Mood and energy trends over a user's whole check-in history, kept up to date incrementally
+"""
+
+import asyncio
+import logging
+import re
+from collections import Counter, OrderedDict
+from collections.abc import Iterable
+from datetime import date, timedelta
+from typing import Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger("wellness_analytics")
+
+ENERGY_LEVELS = ("low", "medium", "high")
+MOOD_CATEGORIES = ("negative", "neutral", "positive")
+
+_ENERGY_WORDS = {
+    "high": {"high", "energetic", "energized", "strong", "great", "buzzing"},
+    "medium": {"medium", "moderate", "okay", "ok", "average", "normal", "fine", "decent"},
+    "low": {"low", "tired", "drained", "exhausted", "sleepy", "fatigued", "sluggish", "depleted"},
+}
+
+_MOOD_WORDS = {
+    "positive": {
+        "good", "great", "happy", "excited", "energetic", "calm", "content", "better",
+        "optimistic", "grateful", "relaxed", "motivated", "cheerful", "peaceful", "amazing",
+    },
+    "negative": {
+        "sad", "tired", "stressed", "anxious", "down", "bad", "overwhelmed", "frustrated",
+        "angry", "low", "worried", "exhausted", "upset", "lonely", "irritable", "drained",
+    },
+}
+
+_STOPWORDS = {
+    "a", "about", "an", "and", "are", "at", "be", "been", "but", "by", "for", "from", "have",
+    "i", "i'm", "im", "in", "is", "it", "its", "just", "me", "my", "of", "on", "or", "so",
+    "some", "that", "the", "their", "this", "to", "too", "up", "very", "was", "with",
+}
+
+_WORD = re.compile(r"[a-z][a-z']+")
+
+# Marks entries whose mood or energy fits no known category
+_UNKNOWN = -1
+
+
+class TrendAggregates:
+    """Running mood, energy, objective and stressor statistics for one user
+
+    `from_entries()` builds the aggregates from a whole history in one
+    vectorized pass; `update()` folds in a single new check-in in constant
+    time, so the statistics never need to be recomputed from scratch.
+    """
+
+    def __init__(self):
+        self.check_ins = 0
+        # ISO date -> [check-ins, low, medium, high, negative, neutral, positive]
+        self.days: dict[str, list[int]] = {}
+        self.last_day: Optional[date] = None
+        self.day_streak = 0
+        self.longest_day_streak = 0
+        self.mood_run: tuple[int, int] = (_UNKNOWN, 0)
+        self.energy_run: tuple[int, int] = (_UNKNOWN, 0)
+        self.longest_mood_runs = [0] * len(MOOD_CATEGORIES)
+        self.longest_energy_runs = [0] * len(ENERGY_LEVELS)
+        self.objectives_reviewed = 0
+        self.objectives_completed = 0
+        self.stressor_words: Counter = Counter()
+        self._last_objectives: set[str] = set()
+
+    @classmethod
+    def from_entries(cls, entries: list[dict[str, Any]]) -> "TrendAggregates":
+        """Compute the aggregates for a whole history, oldest entry first"""
+        aggregates = cls()
+        aggregates.check_ins = len(entries)
+        if not entries:
+            return aggregates
+
+        energy = np.array([classify_energy(e.get("energy")) for e in entries], dtype=np.int8)
+        mood = np.array([classify_mood(e.get("mood")) for e in entries], dtype=np.int8)
+        days = np.array([_parse_day(e.get("date")) for e in entries], dtype="datetime64[D]")
+
+        # Per-day distributions with one bincount per category
+        dated = ~np.isnat(days)
+        if dated.any():
+            unique_days, inverse = np.unique(days[dated], return_inverse=True)
+            columns = [np.bincount(inverse, minlength=len(unique_days))]
+            for values, count in ((energy[dated], len(ENERGY_LEVELS)), (mood[dated], len(MOOD_CATEGORIES))):
+                for code in range(count):
+                    columns.append(np.bincount(inverse, weights=values == code, minlength=len(unique_days)))
+            table = np.stack(columns, axis=1).astype(np.int64)
+            aggregates.days = {str(day): row.tolist() for day, row in zip(unique_days, table)}
+
+            # Consecutive-day streaks over the days that have a check-in, in saving order
+            ordered = days[dated]
+            ordered = ordered[np.r_[True, ordered[1:] != ordered[:-1]]]
+            lengths, last_length = _run_lengths(np.diff(ordered.astype(np.int64)) == 1)
+            aggregates.longest_day_streak = int(lengths.max())
+            aggregates.day_streak = last_length
+            aggregates.last_day = ordered[-1].item()
+
+        aggregates.mood_run, aggregates.longest_mood_runs = _category_runs(mood, len(MOOD_CATEGORIES))
+        aggregates.energy_run, aggregates.longest_energy_runs = _category_runs(energy, len(ENERGY_LEVELS))
+
+        previous: set[str] = set()
+        for entry in entries:
+            reviewed, completed = _objective_progress(previous, entry)
+            aggregates.objectives_reviewed += reviewed
+            aggregates.objectives_completed += completed
+            previous = _objective_set(entry.get("objectives"))
+        aggregates._last_objectives = previous
+
+        aggregates.stressor_words = Counter(
+            word for entry in entries for word in stressor_keywords(entry.get("stressors"))
+        )
+        return aggregates
+
+    def update(self, entry: dict[str, Any]) -> None:
+        """Fold one new check-in into the aggregates"""
+        self.check_ins += 1
+        energy = classify_energy(entry.get("energy"))
+        mood = classify_mood(entry.get("mood"))
+
+        day = _parse_day(entry.get("date"))
+        if day is not None:
+            bucket = self.days.setdefault(day.isoformat(), [0] * 7)
+            bucket[0] += 1
+            if energy != _UNKNOWN:
+                bucket[1 + energy] += 1
+            if mood != _UNKNOWN:
+                bucket[4 + mood] += 1
+            if self.last_day is None or day - self.last_day != timedelta(days=1):
+                if day != self.last_day:
+                    self.day_streak = 1
+            else:
+                self.day_streak += 1
+            self.last_day = day
+            self.longest_day_streak = max(self.longest_day_streak, self.day_streak)
+
+        self.mood_run = _extend_run(self.mood_run, mood, self.longest_mood_runs)
+        self.energy_run = _extend_run(self.energy_run, energy, self.longest_energy_runs)
+
+        reviewed, completed = _objective_progress(self._last_objectives, entry)
+        self.objectives_reviewed += reviewed
+        self.objectives_completed += completed
+        self._last_objectives = _objective_set(entry.get("objectives"))
+
+        self.stressor_words.update(stressor_keywords(entry.get("stressors")))
+
+    def summary(self, days: Optional[int] = None, today: Optional[date] = None) -> dict[str, Any]:
+        """
+        Summarize the aggregates, optionally for the last `days` days only
+
+        Args:
+            days: Length of the period in days, or None for the whole history
+            today: Last day of the period (defaults to the latest check-in day)
+
+        Returns:
+            Dictionary of distributions, averages, streaks and stressor keywords
+        """
+        today = today or self.last_day or date.today()
+        start = None if days is None else today - timedelta(days=days - 1)
+        rows = [
+            (day, counts)
+            for day, counts in self.days.items()
+            if start is None or start.isoformat() <= day <= today.isoformat()
+        ]
+        totals = np.sum([counts for _, counts in rows], axis=0) if rows else np.zeros(7, dtype=np.int64)
+
+        weekly: dict[str, list[int]] = {}
+        for day, counts in rows:
+            parsed = date.fromisoformat(day)
+            week = (parsed - timedelta(days=parsed.weekday())).isoformat()
+            weekly[week] = [a + b for a, b in zip(weekly.get(week, [0] * 7), counts)]
+
+        return {
+            "period_days": days,
+            "check_ins": int(totals[0]) if days is not None else self.check_ins,
+            "energy": dict(zip(ENERGY_LEVELS, totals[1:4].tolist())),
+            "mood": dict(zip(MOOD_CATEGORIES, totals[4:7].tolist())),
+            "average_energy": _average_energy(totals[1:4]),
+            "weekly": {
+                week: {
+                    "check_ins": counts[0],
+                    "energy": dict(zip(ENERGY_LEVELS, counts[1:4])),
+                    "mood": dict(zip(MOOD_CATEGORIES, counts[4:7])),
+                    "average_energy": _average_energy(counts[1:4]),
+                }
+                for week, counts in sorted(weekly.items())
+            },
+            # A streak only counts as current if it reaches yesterday or today
+            "day_streak": self.day_streak if self.last_day and (today - self.last_day).days <= 1 else 0,
+            "longest_day_streak": self.longest_day_streak,
+            "mood_streak": _describe_run(self.mood_run, MOOD_CATEGORIES),
+            "energy_streak": _describe_run(self.energy_run, ENERGY_LEVELS),
+            "longest_mood_streaks": dict(zip(MOOD_CATEGORIES, self.longest_mood_runs)),
+            "longest_energy_streaks": dict(zip(ENERGY_LEVELS, self.longest_energy_runs)),
+            "objective_completion_rate": (
+                round(self.objectives_completed / self.objectives_reviewed, 2)
+                if self.objectives_reviewed
+                else None
+            ),
+            "top_stressors": self.stressor_words.most_common(5),
+        }
+
+
+class TrendAnalytics:
+    """Per-process cache of TrendAggregates for the most recently active users"""
+
+    def __init__(self, max_users: int = 256):
+        """
+        Args:
+            max_users: Maximum number of users whose aggregates are kept in memory
+        """
+        self.max_users = max_users
+        self._aggregates: OrderedDict[str, TrendAggregates] = OrderedDict()
+        self._loading: dict[str, asyncio.Future] = {}
+        self._stale: set[str] = set()
+
+    async def trends(self, user_id: str, store: Any) -> TrendAggregates:
+        """
+        Return a user's aggregates, computing them from their full history on first use
+
+        Args:
+            user_id: User to look up
+            store: AsyncWellnessStore the history is read from
+        """
+        aggregates = self._aggregates.get(user_id)
+        if aggregates is not None:
+            self._aggregates.move_to_end(user_id)
+            return aggregates
+
+        loading = self._loading.get(user_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(user_id, store))
+            self._loading[user_id] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        return await asyncio.shield(loading)
+
+    def record(self, user_id: str, entry: dict[str, Any]) -> None:
+        """Fold a newly saved check-in into the user's aggregates, if they are loaded"""
+        if user_id in self._loading:
+            # The history being read may or may not include this entry
+            self._stale.add(user_id)
+            return
+        aggregates = self._aggregates.get(user_id)
+        if aggregates is not None:
+            aggregates.update(entry)
+
+    async def _load(self, user_id: str, store: Any) -> TrendAggregates:
+        entries = await store.entries(user_id)
+        # One pass over the whole history, kept off the event loop
+        aggregates = await asyncio.get_running_loop().run_in_executor(
+            None, TrendAggregates.from_entries, entries
+        )
+        if user_id in self._stale:
+            self._stale.discard(user_id)
+        else:
+            self._aggregates[user_id] = aggregates
+            while len(self._aggregates) > self.max_users:
+                self._aggregates.popitem(last=False)
+        return aggregates
+
+
+def classify_energy(value: Any) -> int:
+    """Map a free-text energy level to an index into ENERGY_LEVELS, or -1"""
+    return _classify(value, ENERGY_LEVELS, _ENERGY_WORDS, default=_UNKNOWN)
+
+
+def classify_mood(value: Any) -> int:
+    """Map a free-text mood to an index into MOOD_CATEGORIES (neutral if unrecognized), or -1"""
+    return _classify(value, MOOD_CATEGORIES, _MOOD_WORDS, default=MOOD_CATEGORIES.index("neutral"))
+
+
+def stressor_keywords(text: Any) -> list[str]:
+    """Return the meaningful words of a stressors description"""
+    if not isinstance(text, str):
+        return []
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def format_trends(summary: dict[str, Any]) -> str:
+    """Render a trend summary as short text for the agent to talk through"""
+    period = "your whole history" if summary["period_days"] is None else f"the last {summary['period_days']} days"
+    if not summary["check_ins"]:
+        return f"No check-ins recorded in {period}."
+
+    lines = [f"Trends over {period} ({summary['check_ins']} check-ins):"]
+    lines.append("Energy: " + _format_counts(summary["energy"]) + (
+        f" (average {summary['average_energy']} on a 1-3 scale)" if summary["average_energy"] else ""
+    ))
+    lines.append("Mood: " + _format_counts(summary["mood"]))
+    for week, stats in summary["weekly"].items():
+        if stats["average_energy"]:
+            lines.append(f"Week of {week}: average energy {stats['average_energy']}, {stats['check_ins']} check-ins")
+    lines.append(
+        f"Check-in streak: {summary['day_streak']} day(s) in a row (longest {summary['longest_day_streak']})"
+    )
+    for label, streak in (("Mood", summary["mood_streak"]), ("Energy", summary["energy_streak"])):
+        if streak:
+            lines.append(f"{label} streak: {streak['length']} {streak['value']} check-in(s) in a row")
+    if summary["objective_completion_rate"] is not None:
+        lines.append(f"Objective completion: {round(summary['objective_completion_rate'] * 100)}%")
+    if summary["top_stressors"]:
+        lines.append("Common stressors: " + ", ".join(f"{word} ({count})" for word, count in summary["top_stressors"]))
+    return "\n".join(lines)
+
+
+def _classify(value: Any, labels: tuple[str, ...], words: dict[str, set[str]], default: int) -> int:
+    if not isinstance(value, str) or not value.strip():
+        return _UNKNOWN
+    tokens = _WORD.findall(value.lower())
+    for label, vocabulary in words.items():
+        if any(token in vocabulary for token in tokens):
+            return labels.index(label)
+    return default
+
+
+def _parse_day(value: Any) -> Optional[date]:
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def _run_lengths(continues: np.ndarray) -> tuple[np.ndarray, int]:
+    """Lengths of runs in a sequence, given whether each element continues the previous run"""
+    starts = np.flatnonzero(np.r_[True, ~continues])
+    lengths = np.diff(np.r_[starts, len(continues) + 1])
+    return lengths, int(lengths[-1])
+
+
+def _category_runs(codes: np.ndarray, categories: int) -> tuple[tuple[int, int], list[int]]:
+    """Return (current run, longest run per category) for consecutive identical codes"""
+    longest = [0] * categories
+    if not len(codes):
+        return (_UNKNOWN, 0), longest
+    lengths, last_length = _run_lengths(codes[1:] == codes[:-1])
+    values = codes[np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])]
+    known = values != _UNKNOWN
+    maxima = np.zeros(categories, dtype=np.int64)
+    np.maximum.at(maxima, values[known].astype(np.int64), lengths[known])
+    return (int(codes[-1]), last_length), maxima.tolist()
+
+
+def _extend_run(run: tuple[int, int], code: int, longest: list[int]) -> tuple[int, int]:
+    value, length = run
+    run = (code, length + 1) if value == code and length else (code, 1)
+    if code != _UNKNOWN:
+        longest[code] = max(longest[code], run[1])
+    return run
+
+
+def _describe_run(run: tuple[int, int], labels: tuple[str, ...]) -> Optional[dict[str, Any]]:
+    value, length = run
+    if value == _UNKNOWN or not length:
+        return None
+    return {"value": labels[value], "length": length}
+
+
+def _objective_set(objectives: Any) -> set[str]:
+    if not isinstance(objectives, list):
+        return set()
+    return {str(objective).strip().lower() for objective in objectives if str(objective).strip()}
+
+
+def _objective_progress(previous: set[str], entry: dict[str, Any]) -> tuple[int, int]:
+    """Return (previous objectives reviewed, of which completed) for an entry reporting completions"""
+    if not previous or "completed_objectives" not in entry:
+        return 0, 0
+    return len(previous), len(previous & _objective_set(entry["completed_objectives"]))
+
+
+def _average_energy(counts: Iterable[int]) -> Optional[float]:
+    counts = np.asarray(list(counts), dtype=np.float64)
+    if not counts.sum():
+        return None
+    return round(float(np.dot(counts, np.arange(1, len(counts) + 1)) / counts.sum()), 1)
+
+
+def _format_counts(counts: dict[str, int]) -> str:
+    return ", ".join(f"{label} {count}" for label, count in counts.items() if count) or "not recorded"
+
+
+_analytics_instance = None
+
+
+def get_trend_analytics() -> TrendAnalytics:
+    """Get singleton trend analytics instance"""
+    global _analytics_instance
+    if _analytics_instance is None:
+        _analytics_instance = TrendAnalytics()
+    return _analytics_instance
@@ -0,0 +1,278 @@
+"""
+Check-in Archive for Wellness Companion
+Compact columnar segments holding the older part of a user's check-in history
+"""
+
+import json
+import logging
+import os
+import struct
+import zlib
+from array import array
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from wellness_io import atomic_write
+
+logger = logging.getLogger("wellness_archive")
+
+_MAGIC = b"WLAR"
+_VERSION = 1
+# Magic, version, header length
+_PREFIX = struct.Struct("<4sBI")
+
+_EPOCH = datetime(1970, 1, 1)
+# Timestamp column value for entries without a parseable timestamp
+_NO_TIMESTAMP = -(2**63)
+# Mood/energy column value for entries without one
+_NO_CODE = 0xFFFF
+
+# Flag bits: date / time can be rebuilt from the timestamp column
+_DATE_DERIVED = 1
+_TIME_DERIVED = 2
+
+
+class CheckInArchive:
+    """Append-only file of compressed, columnar check-in segments
+
+    Each segment holds a run of check-ins as separate columns: delta-encoded
+    timestamps (from which date and time are rebuilt), dictionary-encoded mood
+    and energy, and zlib-compressed JSON for objectives, stressors, summaries
+    and any other fields. Segments are only ever added, by rewriting the file
+    atomically, and each records which journal bytes it was compacted from so
+    an interrupted compaction can be finished later.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: Location of the archive file
+        """
+        self.path = Path(path)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def entries(self) -> list[dict[str, Any]]:
+        """Return every archived check-in, oldest first"""
+        entries: list[dict[str, Any]] = []
+        for header, blob in self._segments():
+            entries.extend(_decode_segment(header, blob))
+        return entries
+
+    def tail(self, n: int) -> list[dict[str, Any]]:
+        """Return the last `n` archived check-ins, decoding only the segments needed"""
+        if n <= 0:
+            return []
+        segments = list(self._segments())
+        entries: list[dict[str, Any]] = []
+        for header, blob in reversed(segments):
+            entries = _decode_segment(header, blob) + entries
+            if len(entries) >= n:
+                break
+        return entries[-n:]
+
+    def count(self) -> int:
+        """Return the number of archived check-ins"""
+        return sum(header["count"] for header, _ in self._segments())
+
+    def last_source(self) -> Optional[tuple[int, int]]:
+        """Return (inode, bytes) of the journal prefix the newest segment was compacted from"""
+        source = None
+        for header, _ in self._segments():
+            source = header.get("source")
+        return tuple(source) if source else None
+
+    def append_segment(
+        self, entries: list[dict[str, Any]], source: Optional[tuple[int, int]] = None
+    ) -> None:
+        """
+        Add a segment holding `entries` to the end of the archive
+
+        Args:
+            entries: Check-ins to archive, oldest first
+            source: (inode, bytes) of the journal prefix these entries came from
+        """
+        if not entries:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                existing = f.read()
+        except FileNotFoundError:
+            existing = b""
+        atomic_write(self.path, existing + _encode_segment(entries, source))
+
+    def stamp(self) -> Optional[tuple[int, int, int]]:
+        """Identify the current version of the archive by (inode, mtime, size)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _segments(self) -> Iterator[tuple[dict[str, Any], memoryview]]:
+        try:
+            with open(self.path, "rb") as f:
+                data = memoryview(f.read())
+        except FileNotFoundError:
+            return
+
+        pos = 0
+        while pos < len(data):
+            magic, version, header_len = _PREFIX.unpack_from(data, pos)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"Unrecognized wellness archive segment in {self.path}")
+            pos += _PREFIX.size
+            header = json.loads(bytes(data[pos:pos + header_len]))
+            pos += header_len
+            size = sum(header["columns"].values())
+            yield header, data[pos:pos + size]
+            pos += size
+
+
+def _encode_segment(entries: list[dict[str, Any]], source: Optional[tuple[int, int]]) -> bytes:
+    moods: dict[str, int] = {}
+    energies: dict[str, int] = {}
+    timestamps = array("q")
+    flags = array("B")
+    mood_codes = array("H")
+    energy_codes = array("H")
+    objectives, stressors, summaries, rest = [], [], [], []
+
+    previous = 0
+    for entry in entries:
+        ts, flag = _encode_time(entry)
+        # Deltas between consecutive check-ins are small and compress well
+        timestamps.append(ts if ts == _NO_TIMESTAMP else ts - previous)
+        if ts != _NO_TIMESTAMP:
+            previous = ts
+        flags.append(flag)
+        mood_codes.append(_dictionary_code(moods, entry.get("mood")))
+        energy_codes.append(_dictionary_code(energies, entry.get("energy")))
+        objectives.append(entry.get("objectives"))
+        stressors.append(entry.get("stressors"))
+        summaries.append(entry.get("summary"))
+
+        # Keep anything the typed columns cannot reproduce exactly
+        stored = {
+            "date": flag & _DATE_DERIVED,
+            "time": flag & _TIME_DERIVED,
+            "timestamp": ts != _NO_TIMESTAMP,
+            "mood": isinstance(entry.get("mood"), str),
+            "energy": isinstance(entry.get("energy"), str),
+            "objectives": entry.get("objectives") is not None,
+            "stressors": entry.get("stressors") is not None,
+            "summary": entry.get("summary") is not None,
+        }
+        extra = {key: value for key, value in entry.items() if not stored.get(key)}
+        rest.append(extra or None)
+
+    columns = {
+        "timestamp": zlib.compress(timestamps.tobytes(), 9),
+        "flags": zlib.compress(flags.tobytes(), 9),
+        "mood": zlib.compress(mood_codes.tobytes(), 9),
+        "energy": zlib.compress(energy_codes.tobytes(), 9),
+        "objectives": _compress_json(objectives),
+        "stressors": _compress_json(stressors),
+        "summary": _compress_json(summaries),
+        "rest": _compress_json(rest),
+    }
+    header = json.dumps(
+        {
+            "count": len(entries),
+            "moods": list(moods),
+            "energies": list(energies),
+            "source": list(source) if source else None,
+            "columns": {name: len(blob) for name, blob in columns.items()},
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return _PREFIX.pack(_MAGIC, _VERSION, len(header)) + header + b"".join(columns.values())
+
+
+def _decode_segment(header: dict[str, Any], blob: memoryview) -> list[dict[str, Any]]:
+    columns: dict[str, bytes] = {}
+    pos = 0
+    for name, size in header["columns"].items():
+        columns[name] = zlib.decompress(blob[pos:pos + size])
+        pos += size
+
+    timestamps = array("q", columns["timestamp"])
+    flags = array("B", columns["flags"])
+    mood_codes = array("H", columns["mood"])
+    energy_codes = array("H", columns["energy"])
+    objectives = json.loads(columns["objectives"])
+    stressors = json.loads(columns["stressors"])
+    summaries = json.loads(columns["summary"])
+    rest = json.loads(columns["rest"])
+    moods, energies = header["moods"], header["energies"]
+
+    entries = []
+    previous = 0
+    for i in range(header["count"]):
+        extra = rest[i] or {}
+        entry: dict[str, Any] = {}
+        if timestamps[i] != _NO_TIMESTAMP:
+            previous += timestamps[i]
+            timestamp = _decode_timestamp(previous)
+            if flags[i] & _DATE_DERIVED:
+                entry["date"] = timestamp[:10]
+            if flags[i] & _TIME_DERIVED:
+                entry["time"] = timestamp[11:19]
+            entry["timestamp"] = timestamp
+        for key in ("date", "time", "timestamp"):
+            if key in extra:
+                entry[key] = extra.pop(key)
+        if mood_codes[i] != _NO_CODE:
+            entry["mood"] = moods[mood_codes[i]]
+        if energy_codes[i] != _NO_CODE:
+            entry["energy"] = energies[energy_codes[i]]
+        if objectives[i] is not None:
+            entry["objectives"] = objectives[i]
+        if stressors[i] is not None:
+            entry["stressors"] = stressors[i]
+        if summaries[i] is not None:
+            entry["summary"] = summaries[i]
+        entry.update(extra)
+        entries.append(entry)
+    return entries
+
+
+def _encode_time(entry: dict[str, Any]) -> tuple[int, int]:
+    """Return (microseconds since the epoch, flags), or _NO_TIMESTAMP if it cannot round-trip"""
+    value = entry.get("timestamp")
+    if not isinstance(value, str):
+        return _NO_TIMESTAMP, 0
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return _NO_TIMESTAMP, 0
+    if parsed.tzinfo is not None or parsed.isoformat() != value:
+        return _NO_TIMESTAMP, 0
+
+    flag = 0
+    if entry.get("date") == value[:10]:
+        flag |= _DATE_DERIVED
+    if entry.get("time") == value[11:19]:
+        flag |= _TIME_DERIVED
+    delta = parsed - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds, flag
+
+
+def _decode_timestamp(micros: int) -> str:
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def _dictionary_code(dictionary: dict[str, int], value: Any) -> int:
+    if not isinstance(value, str):
+        return _NO_CODE
+    code = dictionary.setdefault(value, len(dictionary))
+    if code >= _NO_CODE:
+        raise ValueError("Too many distinct values for a dictionary-encoded column")
+    return code
+
+
+def _compress_json(values: list[Any]) -> bytes:
+    return zlib.compress(json.dumps(values, separators=(",", ":")).encode("utf-8"), 9)
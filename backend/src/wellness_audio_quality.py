@@ -0,0 +1,372 @@
+"""
+Audio Quality for Wellness Companion
+Measures each participant's SNR and noise floor and runs noise cancellation only when it is needed
+"""
+
+import asyncio
+import inspect
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Optional
+
+import numpy as np
+import prometheus_client
+from livekit import rtc
+
+from wellness_tracing import RollingPercentiles
+
+logger = logging.getLogger("wellness_audio_quality")
+
+NOISE_CANCELLATION_AUDIO_SECONDS = prometheus_client.Counter(
+    "wellness_noise_cancellation_audio_seconds",
+    "Seconds of user audio received, by whether noise cancellation ran on it",
+    ["state"],
+)
+
+NOISE_CANCELLATION_SWITCHES = prometheus_client.Counter(
+    "wellness_noise_cancellation_switches",
+    "Times noise cancellation was turned on or off mid-session",
+    ["state"],
+)
+
+NOISE_CANCELLATION_CPU_SKIPPED_ESTIMATE_SECONDS = prometheus_client.Counter(
+    "wellness_noise_cancellation_cpu_skipped_estimate_seconds",
+    "Filter CPU time skipped on clean audio, estimated from WELLNESS_NC_CPU_COST; overhead not subtracted",
+)
+
+NOISE_CANCELLATION_MONITOR_CPU_SECONDS = prometheus_client.Counter(
+    "wellness_noise_cancellation_monitor_cpu_seconds",
+    "Measured CPU time spent measuring audio quality to decide when to run noise cancellation",
+)
+
+AUDIO_SNR_DB = prometheus_client.Histogram(
+    "wellness_audio_snr_db",
+    "Estimated signal-to-noise ratio of user audio",
+    buckets=[0, 5, 10, 15, 20, 25, 30, 40, 50],
+)
+
+# Audio is measured at this rate, in frames of FRAME_MS
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+# Frame levels are (re)evaluated every this many frames
+EVALUATE_EVERY = 10
+# Level difference above the noise floor that counts as speech
+SPEECH_MARGIN_DB = 6.0
+# Level of digital silence, so log10 never sees zero
+_SILENCE_DB = -100.0
+
+
+def frame_level_db(samples: np.ndarray) -> float:
+    """RMS level of int16 samples in dBFS"""
+    if samples.size == 0:
+        return _SILENCE_DB
+    power = np.mean(np.square(samples.astype(np.float32) / 32768.0))
+    return max(10 * math.log10(power), _SILENCE_DB) if power > 0 else _SILENCE_DB
+
+
+class AudioQualityEstimator:
+    """Rolling noise floor and SNR of one audio stream
+
+    Frame levels over the last `window` seconds are kept; the noise floor
+    is their 10th percentile (the pauses between words) and the speech
+    level their 95th percentile, so SNR is measured without a VAD. The
+    floor also rises to the quietest frame of the last `recent` seconds,
+    so a room that gets noisy is noticed long before the window fills.
+    """
+
+    def __init__(self, window: float = 5.0, recent: float = 1.5, frame_ms: int = FRAME_MS):
+        self.frame_ms = frame_ms
+        self._levels: deque[float] = deque(maxlen=int(window * 1000 / frame_ms))
+        self._recent = int(recent * 1000 / frame_ms)
+        self.noise_floor_db: Optional[float] = None
+        self.speech_level_db: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether at least a second of audio has been measured"""
+        return len(self._levels) * self.frame_ms >= 1000
+
+    @property
+    def snr_db(self) -> Optional[float]:
+        if self.noise_floor_db is None or self.speech_level_db is None:
+            return None
+        return self.speech_level_db - self.noise_floor_db
+
+    @property
+    def speaking(self) -> bool:
+        """Whether the most recent frames are well above the noise floor"""
+        if self.noise_floor_db is None or not self._levels:
+            return False
+        recent = list(self._levels)[-EVALUATE_EVERY:]
+        return max(recent) > self.noise_floor_db + SPEECH_MARGIN_DB
+
+    def push(self, samples: np.ndarray) -> None:
+        """Add one frame of int16 samples"""
+        self._levels.append(frame_level_db(samples))
+
+    def evaluate(self) -> None:
+        """Recompute the noise floor and speech level from the window"""
+        if not self.ready:
+            return
+        levels = np.fromiter(self._levels, dtype=np.float32)
+        self.noise_floor_db = max(float(np.percentile(levels, 10)), float(levels[-self._recent:].min()))
+        self.speech_level_db = float(np.percentile(levels, 95))
+
+
+class AdaptiveNoiseCancellation:
+    """Per-session noise cancellation that only runs while the audio needs it
+
+    Passed to RoomInputOptions as the noise cancellation selector, it hands
+    out the enhancement filter while enabled and nothing while disabled. A
+    separate, unfiltered 16 kHz stream of the same track feeds an
+    AudioQualityEstimator. Noise cancellation turns on within `enable_hold`
+    seconds of the audio becoming noisy (a high noise floor, or speech
+    with an SNR below `enable_snr_db`) and off only after `disable_hold`
+    seconds of clean audio (a low floor and an SNR above `disable_snr_db`
+    or no speech at all), so it does not flap around one threshold.
+
+    The filter is native and fixed when an audio stream is created, so a
+    switch re-creates the session's input stream; it waits for a pause in
+    the user's speech to do so.
+
+    The filter's own cost cannot be measured from here, so the CPU it
+    saves is an estimate (`cpu_cost` per second of audio skipped). The
+    thread CPU time of measuring each frame is measured and reported next
+    to it; decoding and resampling of the second stream happen in native
+    threads and are in neither figure.
+    """
+
+    def __init__(
+        self,
+        options: Any,
+        *,
+        enable_snr_db: float = 15.0,
+        disable_snr_db: float = 25.0,
+        noise_floor_db: float = -50.0,
+        enable_hold: float = 0.5,
+        disable_hold: float = 10.0,
+        cpu_cost: float = 0.05,
+        start_enabled: bool = True,
+    ):
+        self.options = options
+        self.enable_snr_db = enable_snr_db
+        self.disable_snr_db = disable_snr_db
+        self.noise_floor_limit_db = noise_floor_db
+        self.enable_hold = enable_hold
+        self.disable_hold = disable_hold
+        # Estimated CPU seconds the filter spends per second of audio
+        self.cpu_cost = cpu_cost
+        self.enabled = start_enabled
+        self.estimator = AudioQualityEstimator()
+        self.seconds = {"on": 0.0, "off": 0.0}
+        self.monitor_cpu_seconds = 0.0
+        self.switches = 0
+        self._wanted = start_enabled
+        # Seconds of audio for which the wanted state has differed from the current one
+        self._pending_for = 0.0
+        self._frames = 0
+        self._snr = RollingPercentiles()
+        self._noise_floor = RollingPercentiles()
+        self._audio_input: Any = None
+        self._participant: Optional[rtc.Participant] = None
+        self._track_sid: Optional[str] = None
+        self._monitor: Optional[asyncio.Task] = None
+
+    def __call__(self, params: Any) -> Any:
+        """Noise cancellation selector, called whenever the session opens an input stream"""
+        self._participant = params.participant
+        if params.track.sid != self._track_sid:
+            self._watch(params.track)
+        return self.options if self.enabled else None
+
+    def attach(self, audio_input: Any) -> None:
+        """Let the controller re-create the session's input stream when it switches"""
+        self._audio_input = audio_input
+
+    def push(self, samples: np.ndarray, duration: float) -> None:
+        """
+        Account for one frame of unfiltered audio and update the decision
+
+        Args:
+            samples: int16 samples of the frame
+            duration: Length of the frame in seconds
+        """
+        state = "on" if self.enabled else "off"
+        self.seconds[state] += duration
+        NOISE_CANCELLATION_AUDIO_SECONDS.labels(state=state).inc(duration)
+        if not self.enabled:
+            NOISE_CANCELLATION_CPU_SKIPPED_ESTIMATE_SECONDS.inc(duration * self.cpu_cost)
+
+        self.estimator.push(samples)
+        self._frames += 1
+        if self._frames % EVALUATE_EVERY == 0:
+            self._evaluate(duration * EVALUATE_EVERY)
+
+    def stats(self) -> dict[str, Any]:
+        """Duty cycle, estimated filter CPU skipped, measured monitoring CPU and the measured audio quality"""
+        total = self.seconds["on"] + self.seconds["off"]
+        skipped = self.seconds["off"] * self.cpu_cost
+        return {
+            "enabled": self.enabled,
+            "duty_cycle": round(self.seconds["on"] / total, 3) if total else None,
+            "audio_seconds": round(total, 1),
+            "cpu_skipped_estimate_seconds": round(skipped, 2),
+            "monitor_cpu_seconds": round(self.monitor_cpu_seconds, 2),
+            "net_cpu_saved_estimate_seconds": round(skipped - self.monitor_cpu_seconds, 2),
+            "switches": self.switches,
+            "snr_db": self._snr.percentiles(),
+            "noise_floor_db": self._noise_floor.percentiles(),
+        }
+
+    async def aclose(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+    def _evaluate(self, elapsed: float) -> None:
+        estimator = self.estimator
+        estimator.evaluate()
+        snr, floor = estimator.snr_db, estimator.noise_floor_db
+        if snr is None or floor is None:
+            return
+        self._snr.observe(round(snr, 1))
+        self._noise_floor.observe(round(floor, 1))
+        AUDIO_SNR_DB.observe(snr)
+
+        speech = snr >= SPEECH_MARGIN_DB
+        if self.enabled:
+            clean = floor < self.noise_floor_limit_db - SPEECH_MARGIN_DB and (not speech or snr >= self.disable_snr_db)
+            wanted = not clean
+        else:
+            noisy = floor > self.noise_floor_limit_db or (speech and snr < self.enable_snr_db)
+            wanted = noisy
+
+        if wanted != self._wanted:
+            self._wanted = wanted
+            self._pending_for = 0.0
+        if wanted == self.enabled:
+            return
+        self._pending_for += elapsed
+        hold = self.enable_hold if wanted else self.disable_hold
+        # Re-creating the input stream drops a few frames, so only switch between words
+        if self._pending_for >= hold and not estimator.speaking:
+            self._switch(wanted)
+
+    def _switch(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._pending_for = 0.0
+        self.switches += 1
+        state = "on" if enabled else "off"
+        NOISE_CANCELLATION_SWITCHES.labels(state=state).inc()
+        logger.info(
+            f"Noise cancellation {state}: SNR {self.estimator.snr_db:.1f} dB, "
+            f"noise floor {self.estimator.noise_floor_db:.1f} dBFS"
+        )
+        self._restart_stream()
+
+    def _restart_stream(self) -> None:
+        audio_input = self._audio_input
+        # RoomIO has no public way to re-open a stream, so this reaches into its audio input;
+        # check_stream_restart_support() verifies at startup that it still can
+        track = getattr(audio_input, "_track", None)
+        publication = getattr(audio_input, "_publication", None)
+        if track is None or publication is None or self._participant is None:
+            # Takes effect when the next stream is opened
+            return
+        try:
+            audio_input._close_stream()
+            audio_input._on_track_available(track, publication, self._participant)
+        except Exception as e:
+            logger.error(f"Error re-creating the audio input stream: {e}")
+
+    def _watch(self, track: rtc.Track) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+        self._track_sid = track.sid
+        self._monitor = asyncio.ensure_future(self._measure(track))
+
+    async def _measure(self, track: rtc.Track) -> None:
+        stream = rtc.AudioStream.from_track(
+            track=track, sample_rate=SAMPLE_RATE, num_channels=1, frame_size_ms=FRAME_MS
+        )
+        try:
+            async for event in stream:
+                started = time.thread_time()
+                frame = event.frame
+                samples = np.frombuffer(frame.data, dtype=np.int16)
+                self.push(samples, frame.samples_per_channel / frame.sample_rate)
+                cost = time.thread_time() - started
+                self.monitor_cpu_seconds += cost
+                NOISE_CANCELLATION_MONITOR_CPU_SECONDS.inc(cost)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error measuring audio quality: {e}")
+        finally:
+            await stream.aclose()
+
+
+def check_stream_restart_support(stream_class: Any = None) -> None:
+    """
+    Check that RoomIO's audio input still has the private members used to re-create its stream
+
+    Args:
+        stream_class: Audio input class to check, RoomIO's by default
+
+    Raises:
+        RuntimeError: If a member is missing or its signature changed
+    """
+    if stream_class is None:
+        from livekit.agents.voice.room_io._input import _ParticipantAudioInputStream
+
+        stream_class = _ParticipantAudioInputStream
+
+    problems = []
+    for name, params in (("_close_stream", []), ("_on_track_available", ["track", "publication", "participant"])):
+        method = getattr(stream_class, name, None)
+        if not callable(method):
+            problems.append(f"{name}() is missing")
+        elif list(inspect.signature(method).parameters)[1:] != params:
+            problems.append(f"{name}() no longer takes ({', '.join(params)})")
+    assigned = set()
+    for cls in stream_class.__mro__:
+        init = cls.__dict__.get("__init__")
+        if init is not None and hasattr(init, "__code__"):
+            assigned.update(init.__code__.co_names)
+    for name in ("_track", "_publication"):
+        if name not in assigned:
+            problems.append(f"{name} is no longer set")
+    if problems:
+        raise RuntimeError(
+            f"Adaptive noise cancellation cannot re-create {stream_class.__name__} streams: "
+            f"{'; '.join(problems)}. Set WELLNESS_NC_ADAPTIVE=0 or update wellness_audio_quality.py"
+        )
+
+
+def adaptive_noise_cancellation_enabled() -> bool:
+    """Whether WELLNESS_NC_ADAPTIVE leaves adaptive noise cancellation on"""
+    return os.getenv("WELLNESS_NC_ADAPTIVE", "1").lower() not in ("0", "false", "no")
+
+
+def create_noise_cancellation(options: Any) -> Any:
+    """
+    Noise cancellation for one session, adaptive unless WELLNESS_NC_ADAPTIVE is off
+
+    Args:
+        options: The enhancement filter, e.g. noise_cancellation.BVC()
+
+    Returns:
+        An AdaptiveNoiseCancellation selector, or the filter itself to always run it
+    """
+    if options is None or not adaptive_noise_cancellation_enabled():
+        return options
+    return AdaptiveNoiseCancellation(
+        options,
+        enable_snr_db=float(os.getenv("WELLNESS_NC_ENABLE_SNR_DB", "15")),
+        disable_snr_db=float(os.getenv("WELLNESS_NC_DISABLE_SNR_DB", "25")),
+        noise_floor_db=float(os.getenv("WELLNESS_NC_NOISE_FLOOR_DB", "-50")),
+        cpu_cost=float(os.getenv("WELLNESS_NC_CPU_COST", "0.05")),
+    )
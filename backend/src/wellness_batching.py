@@ -0,0 +1,287 @@
+"""
+Inference Batching for Wellness Companion
+Runs concurrent VAD inferences from all sessions in a process as one batch
+"""
+
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Hashable
+from typing import Any, Callable, Optional
+
+import numpy as np
+import prometheus_client
+from livekit.plugins import silero
+
+from wellness_tracing import RollingPercentiles
+
+logger = logging.getLogger("wellness_batching")
+
+INFERENCE_BATCH_SIZE = prometheus_client.Histogram(
+    "wellness_inference_batch_size",
+    "Inferences run together in one model call",
+    ["model"],
+    buckets=[1, 2, 4, 8, 16, 32, 64],
+)
+
+INFERENCE_QUEUE_SECONDS = prometheus_client.Histogram(
+    "wellness_inference_queue_seconds",
+    "Time an inference waited for its batch to start",
+    ["model"],
+    buckets=[0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05],
+)
+
+# Every batcher created in this process, for stats()
+_batchers: list["InferenceBatcher"] = []
+
+
+class _Request:
+    __slots__ = ("done", "error", "item", "lead", "result", "submitted_at")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.lead = False
+        self.submitted_at = time.perf_counter()
+        self.done = threading.Event()
+
+
+class InferenceBatcher:
+    """Groups blocking inference calls from many threads into batched model calls
+
+    Callers block in `submit()`. The first caller with no batch in flight
+    becomes the batch leader: it waits up to `max_delay` for others to
+    join, runs `run_batch` once for everyone and hands each caller its
+    result, then passes leadership to the oldest caller still waiting.
+    Only items with the same `key` share a batch.
+
+    The leader only waits when the recent arrival rate says another
+    request is expected within `max_delay`, so a lone session (one job
+    per process, or a quiet worker) pays no latency for batching.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[list[Any]], list[Any]],
+        key: Optional[Callable[[Any], Hashable]] = None,
+        max_batch: int = 32,
+        max_delay: float = 0.005,
+    ):
+        self.name = name
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._run_batch = run_batch
+        self._key = key or (lambda item: None)
+        self._cond = threading.Condition()
+        self._pending: dict[Hashable, list[_Request]] = {}
+        # Keys with a leader waiting for or running a batch; one leader per key at a time
+        self._leading: set[Hashable] = set()
+        self._arrivals: deque[float] = deque(maxlen=64)
+        self._batch_sizes = RollingPercentiles()
+        self._queue_delays = RollingPercentiles()
+        self._batches = 0
+        self._items = 0
+        _batchers.append(self)
+
+    def submit(self, item: Any) -> Any:
+        """Run one inference as part of a batch and return its result"""
+        request = _Request(item)
+        key = self._key(item)
+        with self._cond:
+            self._arrivals.append(request.submitted_at)
+            queue = self._pending.setdefault(key, [])
+            queue.append(request)
+            if key not in self._leading:
+                self._leading.add(key)
+                request.lead = True
+            if len(queue) >= self.max_batch:
+                self._cond.notify_all()
+
+        while True:
+            if request.lead:
+                request.lead = False
+                self._lead(key)
+            request.done.wait()
+            if not request.lead:
+                break
+            request.done.clear()
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def stats(self) -> dict[str, Any]:
+        """Batch sizes and queue delays of recent batches"""
+        with self._cond:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "batch_size": self._batch_sizes.percentiles(),
+                "queue_seconds": self._queue_delays.percentiles(),
+            }
+
+    def _expected_arrivals(self, now: float) -> float:
+        """Requests expected within max_delay at the recent arrival rate"""
+        if len(self._arrivals) < 2 or now <= self._arrivals[0]:
+            return 0.0
+        rate = (len(self._arrivals) - 1) / (now - self._arrivals[0])
+        return rate * self.max_delay
+
+    def _lead(self, key: Hashable) -> None:
+        with self._cond:
+            now = time.perf_counter()
+            if self._expected_arrivals(now) >= 1.0:
+                deadline = now + self.max_delay
+                while len(self._pending[key]) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            queue = self._pending[key]
+            batch, rest = queue[: self.max_batch], queue[self.max_batch:]
+            if rest:
+                self._pending[key] = rest
+            else:
+                del self._pending[key]
+
+        started = time.perf_counter()
+        try:
+            results = self._run_batch([request.item for request in batch])
+            for request, result in zip(batch, results):
+                request.result = result
+        except Exception as e:
+            for request in batch:
+                request.error = e
+
+        with self._cond:
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes.observe(len(batch))
+            INFERENCE_BATCH_SIZE.labels(model=self.name).observe(len(batch))
+            for request in batch:
+                delay = started - request.submitted_at
+                self._queue_delays.observe(delay)
+                INFERENCE_QUEUE_SECONDS.labels(model=self.name).observe(delay)
+            # Requests that arrived while this batch ran get a leader of their own
+            waiting = self._pending.get(key)
+            if waiting:
+                waiting[0].lead = True
+                waiting[0].done.set()
+            else:
+                self._leading.discard(key)
+
+        for request in batch:
+            request.done.set()
+
+
+def _batcher_options() -> dict[str, Any]:
+    return {
+        "max_batch": int(os.getenv("WELLNESS_BATCH_MAX", "32")),
+        "max_delay": float(os.getenv("WELLNESS_BATCH_DELAY_MS", "5")) / 1000,
+    }
+
+
+class BatchedVADSession:
+    """Stand-in for Silero's onnxruntime session that batches concurrent windows
+
+    Every VAD stream keeps its own recurrent state and calls `run()` from an
+    executor thread once per 32 ms window. Silero accepts a batch of
+    windows with their states stacked along the batch axis, which gives the
+    same per-stream results as separate calls at a fraction of the cost.
+
+    Only sessions in the same process can share a batch, so this is used
+    when WELLNESS_BATCH_VAD runs jobs as threads of one process.
+    """
+
+    def __init__(self, session: Any, **options):
+        self._session = session
+        self._batcher = InferenceBatcher(
+            "vad",
+            self._run_batch,
+            # Windows can only be stacked when their sample rate and length match
+            key=lambda inputs: (int(inputs["sr"]), inputs["input"].shape[1]),
+            **(options or _batcher_options()),
+        )
+
+    def run(self, output_names: Optional[list[str]], inputs: dict[str, np.ndarray]) -> list[np.ndarray]:
+        return self._batcher.submit(inputs)
+
+    def stats(self) -> dict[str, Any]:
+        return self._batcher.stats()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    def _run_batch(self, items: list[dict[str, np.ndarray]]) -> list[list[np.ndarray]]:
+        if len(items) == 1:
+            return [self._session.run(None, items[0])]
+        out, state = self._session.run(
+            None,
+            {
+                "input": np.concatenate([inputs["input"] for inputs in items]),
+                "state": np.concatenate([inputs["state"] for inputs in items], axis=1),
+                "sr": items[0]["sr"],
+            },
+        )
+        return [[out[i:i + 1], state[:, i:i + 1]] for i in range(len(items))]
+
+
+def vad_batching_enabled() -> bool:
+    """Whether WELLNESS_BATCH_VAD opts in to batched VAD, which also runs jobs as threads of one process"""
+    return os.getenv("WELLNESS_BATCH_VAD", "0").lower() in ("1", "true", "yes")
+
+
+def check_vad_batching_support(vad_class: Any = None, session_class: Any = None) -> None:
+    """
+    Check that Silero VAD still keeps the private session BatchedVADSession stands in for
+
+    Args:
+        vad_class: VAD class to check, Silero's by default
+        session_class: Inference session class to check, onnxruntime's by default
+
+    Raises:
+        RuntimeError: If the session attribute is gone or `run()` takes different arguments
+    """
+    if vad_class is None:
+        vad_class = silero.VAD
+    if session_class is None:
+        import onnxruntime
+
+        session_class = onnxruntime.InferenceSession
+
+    problems = []
+    assigned = set()
+    for cls in vad_class.__mro__:
+        init = cls.__dict__.get("__init__")
+        if init is not None and hasattr(init, "__code__"):
+            assigned.update(init.__code__.co_names)
+    if "_onnx_session" not in assigned:
+        problems.append(f"{vad_class.__name__}._onnx_session is no longer set")
+    run = getattr(session_class, "run", None)
+    if not callable(run):
+        problems.append(f"{session_class.__name__}.run() is missing")
+    elif list(inspect.signature(run).parameters)[1:3] != ["output_names", "input_feed"]:
+        problems.append(f"{session_class.__name__}.run() no longer takes (output_names, input_feed)")
+    if problems:
+        raise RuntimeError(
+            f"Batched VAD cannot stand in for Silero's inference session: {'; '.join(problems)}. "
+            "Set WELLNESS_BATCH_VAD=0 or update wellness_batching.py"
+        )
+
+
+def load_batched_vad(**kwargs) -> Any:
+    """Load Silero VAD with its inference session shared through a BatchedVADSession"""
+    vad = silero.VAD.load(**kwargs)
+    # Streams build their models from this session when they are created
+    vad._onnx_session = BatchedVADSession(vad._onnx_session)
+    return vad
+
+
+def batching_stats() -> dict[str, Any]:
+    """Stats of every batcher in this process"""
+    return {batcher.name: batcher.stats() for batcher in _batchers}
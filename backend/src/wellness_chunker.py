@@ -0,0 +1,264 @@
+"""
+TTS Text Chunker for Wellness Companion
+Sentence tokenizer that sends the first clause of each reply to TTS early
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Optional
+
+import prometheus_client
+from livekit.agents import tokenize
+from livekit.agents.tokenize import TokenData
+
+from wellness_tracing import RollingPercentiles
+
+logger = logging.getLogger("wellness_chunker")
+
+TTS_FIRST_CHUNKS = prometheus_client.Counter(
+    "wellness_tts_first_chunks",
+    "First text chunks of a reply sent to TTS, by what ended them",
+    ["reason"],
+)
+
+TTS_FIRST_CHUNK_SAVED_SECONDS = prometheus_client.Histogram(
+    "wellness_tts_first_chunk_saved_seconds",
+    "How much earlier the first chunk reached TTS than its full sentence would have",
+    buckets=[0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.5],
+)
+
+# Where a first chunk may end, in order of preference for prosody
+_SENTENCE_END = re.compile(r"[.!?…][\"')\]]*\s")
+# Em and en dashes are escaped so they cannot be mistaken for hyphens
+_CLAUSE_END = re.compile(r"[,;:\u2014\u2013]\s|\s-\s")
+_CONJUNCTION = re.compile(r"\s(?=(?:and|but|so|because|or|then|which|while)\s)", re.IGNORECASE)
+
+# Rough characters per word, to turn a measured character rate into words
+_CHARS_PER_WORD = 6.0
+# Smoothing of the measured LLM text rate
+_RATE_ALPHA = 0.3
+
+
+class FirstChunkTokenizer(tokenize.SentenceTokenizer):
+    """Sentence tokenizer that flushes the first clause of a reply early
+
+    Until the first chunk of a reply has been sent, text is held back only
+    as long as needed: it goes out at the first sentence end, clause break
+    (comma, semicolon, dash) or conjunction after `min_words` words, after
+    `first_words` words, or once `first_chunk_delay` has passed since the
+    reply's first text. Everything after the first chunk is split at
+    sentence boundaries as usual, so only the opening clause gives up
+    sentence-level prosody.
+
+    `first_words` adapts to the measured LLM text rate: a fast model fills
+    a longer first chunk within the same delay, a slow one flushes sooner.
+    For every early flush, the time until the first sentence actually ended
+    is recorded as time-to-first-audio saved.
+    """
+
+    def __init__(
+        self,
+        *,
+        first_chunk_delay: float = 0.3,
+        min_words: int = 3,
+        max_words: int = 12,
+        min_sentence_len: int = 2,
+        stream_context_len: int = 10,
+    ):
+        self.first_chunk_delay = first_chunk_delay
+        self.min_words = min_words
+        self.max_words = max_words
+        self.min_sentence_len = min_sentence_len
+        self.stream_context_len = stream_context_len
+        self._sentences = tokenize.basic.SentenceTokenizer(min_sentence_len=min_sentence_len)
+        # Measured LLM text rate in characters per second, None until the first reply
+        self.text_rate: Optional[float] = None
+        self._reasons: Counter = Counter()
+        self._saved = RollingPercentiles()
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> list:
+        return self._sentences.tokenize(text, language=language)
+
+    def stream(self, *, language: Optional[str] = None) -> "FirstChunkStream":
+        return FirstChunkStream(self)
+
+    @property
+    def first_words(self) -> int:
+        """Words the LLM is expected to produce within `first_chunk_delay`"""
+        if self.text_rate is None:
+            return (self.min_words + self.max_words) // 2
+        words = self.text_rate * self.first_chunk_delay / _CHARS_PER_WORD
+        return int(min(max(words, self.min_words), self.max_words))
+
+    def record_rate(self, chars: int, seconds: float) -> None:
+        """Fold one reply's text rate into the running estimate"""
+        if chars < 20 or seconds < 0.05:
+            return
+        rate = chars / seconds
+        self.text_rate = rate if self.text_rate is None else self.text_rate + _RATE_ALPHA * (rate - self.text_rate)
+
+    def record_first_chunk(self, reason: str, saved: Optional[float]) -> None:
+        """Count a first chunk and, for early ones, the time it saved"""
+        self._reasons[reason] += 1
+        TTS_FIRST_CHUNKS.labels(reason=reason).inc()
+        if saved is not None:
+            self._saved.observe(saved)
+            TTS_FIRST_CHUNK_SAVED_SECONDS.observe(saved)
+
+    def stats(self) -> dict[str, Any]:
+        """First chunks by reason, time saved by early flushes and the current tuning"""
+        return {
+            "first_chunks": dict(self._reasons),
+            "saved_seconds": {"count": self._saved.count, **self._saved.percentiles()},
+            "text_rate": round(self.text_rate, 1) if self.text_rate is not None else None,
+            "first_words": self.first_words,
+        }
+
+
+class FirstChunkStream(tokenize.BufferedSentenceStream):
+    """One reply's stream of text chunks; see FirstChunkTokenizer"""
+
+    def __init__(self, tokenizer: FirstChunkTokenizer):
+        super().__init__(
+            tokenizer=tokenizer.tokenize,
+            min_token_len=tokenizer.min_sentence_len,
+            min_ctx_len=tokenizer.stream_context_len,
+        )
+        self._tokenizer = tokenizer
+        self._reset()
+
+    def push_text(self, text: str) -> None:
+        self._check_not_closed()
+        if not text:
+            return
+
+        now = time.perf_counter()
+        if self._started_at is None:
+            self._started_at = now
+            self._arm_deadline()
+        self._last_text_at = now
+        self._chars += len(text)
+
+        if self._head is None:
+            self._watch_sentence_end(text, now)
+            super().push_text(text)
+            return
+
+        self._head += text
+        split = self._find_split()
+        if split is not None:
+            self._send_head(*split)
+
+    def flush(self) -> None:
+        self._check_not_closed()
+        now = time.perf_counter()
+        if self._head:
+            # The reply ended within its first chunk, so nothing was sent early
+            self._tokenizer.record_first_chunk("complete", None)
+            super().push_text(self._head)
+        elif self._early_at is not None:
+            self._tokenizer.record_first_chunk(self._early_reason, now - self._early_at)
+        if self._started_at is not None and self._last_text_at is not None:
+            self._tokenizer.record_rate(self._chars, self._last_text_at - self._started_at)
+        super().flush()
+        self._reset()
+
+    async def aclose(self) -> None:
+        self._cancel_deadline()
+        await super().aclose()
+
+    def _reset(self) -> None:
+        # Text of the reply's first chunk still being held back; None once it was sent
+        self._head: Optional[str] = ""
+        self._started_at: Optional[float] = None
+        self._last_text_at: Optional[float] = None
+        self._chars = 0
+        self._early_at: Optional[float] = None
+        self._early_reason = ""
+        self._tail = ""
+        self._cancel_deadline()
+
+    def _find_split(self) -> Optional[tuple[int, str]]:
+        head = self._head
+        min_words = self._tokenizer.min_words
+
+        match = _SENTENCE_END.search(head)
+        if match is not None:
+            return match.end(), "sentence"
+
+        candidates = [(m.end(), "clause") for m in _CLAUSE_END.finditer(head)]
+        candidates += [(m.start(), "conjunction") for m in _CONJUNCTION.finditer(head)]
+        for position, reason in sorted(candidates):
+            if len(head[:position].split()) >= min_words:
+                return position, reason
+
+        words = list(re.finditer(r"\S+(?=\s)", head))
+        if len(words) >= self._tokenizer.first_words:
+            return words[self._tokenizer.first_words - 1].end(), "words"
+        return None
+
+    def _send_head(self, position: int, reason: str) -> None:
+        chunk, rest = self._head[:position].strip(), self._head[position:]
+        self._head = None
+        self._cancel_deadline()
+        if chunk:
+            self._event_ch.send_nowait(TokenData(token=chunk, segment_id=self._current_segment_id))
+        if reason == "sentence":
+            self._tokenizer.record_first_chunk(reason, None)
+        else:
+            self._early_at, self._early_reason = time.perf_counter(), reason
+        rest = rest.lstrip()
+        if rest:
+            self._watch_sentence_end(rest, time.perf_counter())
+            super().push_text(rest)
+
+    def _watch_sentence_end(self, text: str, now: float) -> None:
+        """Record how much sooner the early first chunk went out than its sentence ended"""
+        if self._early_at is None:
+            return
+        self._tail = (self._tail + text)[-64:]
+        if _SENTENCE_END.search(self._tail):
+            self._tokenizer.record_first_chunk(self._early_reason, now - self._early_at)
+            self._early_at = None
+            self._tail = ""
+
+    def _arm_deadline(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._deadline = loop.call_later(self._tokenizer.first_chunk_delay, self._on_deadline)
+
+    def _cancel_deadline(self) -> None:
+        deadline = getattr(self, "_deadline", None)
+        if deadline is not None:
+            deadline.cancel()
+        self._deadline = None
+
+    def _on_deadline(self) -> None:
+        self._deadline = None
+        if not self._head or self.closed:
+            return
+        # Send every complete word; a trailing partial word waits for the rest of the text
+        words = list(re.finditer(r"\S+(?=\s)", self._head))
+        if len(words) >= self._tokenizer.min_words:
+            self._send_head(words[-1].end(), "time")
+
+
+_tokenizer_instance = None
+
+
+def get_first_chunk_tokenizer() -> tokenize.SentenceTokenizer:
+    """Get singleton TTS sentence tokenizer, a plain sentence tokenizer when early flushing is off"""
+    global _tokenizer_instance
+    if _tokenizer_instance is None:
+        delay_ms = float(os.getenv("WELLNESS_TTS_FIRST_CHUNK_MS", "300"))
+        if delay_ms > 0:
+            _tokenizer_instance = FirstChunkTokenizer(first_chunk_delay=delay_ms / 1000)
+        else:
+            _tokenizer_instance = tokenize.basic.SentenceTokenizer(min_sentence_len=2)
+    return _tokenizer_instance
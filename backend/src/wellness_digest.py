@@ -0,0 +1,217 @@
+"""
+Memory Digest for Wellness Companion
+Bounded-size rolling summary of a user's check-ins, used as the prompt's previous-session context
+"""
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+from wellness_analytics import ENERGY_LEVELS, classify_energy, stressor_keywords
+
+logger = logging.getLogger("wellness_digest")
+
+# Bounds that keep the digest (and the prompt) the same size however long the history grows
+MAX_RECENT_MOODS = 5
+MAX_STRESSORS = 8
+MAX_OBJECTIVES = 5
+MAX_TEXT_CHARS = 120
+
+# Weight kept by older stressor mentions at each new check-in
+_STRESSOR_DECAY = 0.8
+# Smoothing of the fast and slow energy averages
+_FAST_ALPHA = 0.5
+_SLOW_ALPHA = 0.2
+# Gap between the fast and slow averages reported as a trend
+_TREND_THRESHOLD = 0.25
+
+
+class MemoryDigest:
+    """Rolling summary of a user's check-in history
+
+    Every field is bounded: the last few moods, decayed stressor weights for
+    a handful of keywords, fast and slow moving averages of energy and the
+    latest objectives. `update()` folds in a new check-in in constant time,
+    and `render()` produces prompt text of roughly constant length.
+    """
+
+    def __init__(self, data: Optional[dict[str, Any]] = None):
+        data = data or {}
+        self.check_ins: int = data.get("check_ins", 0)
+        self.first_date: Optional[str] = data.get("first_date")
+        self.last: dict[str, Any] = data.get("last", {})
+        self.recent_moods: list[str] = data.get("recent_moods", [])
+        self.energy_fast: Optional[float] = data.get("energy_fast")
+        self.energy_slow: Optional[float] = data.get("energy_slow")
+        self.stressors: dict[str, float] = data.get("stressors", {})
+        self.open_objectives: list[str] = data.get("open_objectives", [])
+        self.last_timestamp: Optional[str] = data.get("last_timestamp")
+
+    @classmethod
+    def from_entries(cls, entries: list[dict[str, Any]]) -> "MemoryDigest":
+        """Build a digest by folding in a whole history, oldest entry first"""
+        digest = cls()
+        for entry in entries:
+            digest.update(entry)
+        return digest
+
+    def update(self, entry: dict[str, Any]) -> None:
+        """Fold one new check-in into the digest"""
+        self.check_ins += 1
+        self.last_timestamp = entry.get("timestamp")
+        if self.first_date is None and entry.get("date"):
+            self.first_date = entry["date"]
+
+        objectives = [_clip(str(o)) for o in entry.get("objectives") or []][:MAX_OBJECTIVES]
+        completed = {str(o).strip().lower() for o in entry.get("completed_objectives") or []}
+        if "completed_objectives" in entry:
+            # Objectives from last time that were not reported done
+            self.open_objectives = [
+                o for o in self.last.get("objectives", []) if o.strip().lower() not in completed
+            ][:MAX_OBJECTIVES]
+        else:
+            self.open_objectives = []
+
+        self.last = {
+            "date": entry.get("date"),
+            "mood": _clip(entry.get("mood")),
+            "energy": _clip(entry.get("energy")),
+            "objectives": objectives,
+            "summary": _clip(entry.get("summary")),
+        }
+
+        if entry.get("mood"):
+            self.recent_moods = ([*self.recent_moods, _clip(entry["mood"], 30)])[-MAX_RECENT_MOODS:]
+
+        level = classify_energy(entry.get("energy"))
+        if level >= 0:
+            score = float(level + 1)
+            self.energy_fast = _ema(self.energy_fast, score, _FAST_ALPHA)
+            self.energy_slow = _ema(self.energy_slow, score, _SLOW_ALPHA)
+
+        weights = {word: weight * _STRESSOR_DECAY for word, weight in self.stressors.items()}
+        for word in stressor_keywords(entry.get("stressors")):
+            weights[word] = weights.get(word, 0.0) + 1.0
+        top = sorted(weights.items(), key=lambda item: item[1], reverse=True)[:MAX_STRESSORS]
+        self.stressors = {word: round(weight, 3) for word, weight in top if weight >= 0.05}
+
+    def energy_trend(self) -> Optional[tuple[float, str]]:
+        """Return (recent average energy on a 1-3 scale, "rising"/"falling"/"steady")"""
+        if self.energy_fast is None:
+            return None
+        gap = self.energy_fast - self.energy_slow
+        direction = "rising" if gap > _TREND_THRESHOLD else "falling" if gap < -_TREND_THRESHOLD else "steady"
+        return round(self.energy_fast, 1), direction
+
+    def render(self) -> str:
+        """Describe the digest as previous-session context for the system prompt"""
+        if not self.check_ins:
+            return "This is the user's first check-in session."
+
+        last = self.last
+        lines = [
+            f"PREVIOUS CHECK-IN CONTEXT ({self.check_ins} check-in(s) since {self.first_date or 'an unknown date'}):",
+            f"- Last check-in on {last.get('date') or 'unknown date'}: mood {last.get('mood') or 'not recorded'}, "
+            f"energy {last.get('energy') or 'not recorded'}",
+            f"- Objectives last time: {', '.join(last.get('objectives', [])) or 'none recorded'}",
+        ]
+        if len(self.recent_moods) > 1:
+            lines.append(f"- Recent moods, oldest first: {', '.join(self.recent_moods)}")
+        trend = self.energy_trend()
+        if trend is not None:
+            average, direction = trend
+            label = ENERGY_LEVELS[min(max(round(average) - 1, 0), len(ENERGY_LEVELS) - 1)]
+            lines.append(f"- Energy lately: mostly {label} ({average} on a 1-3 scale), {direction}")
+        if self.stressors:
+            lines.append(f"- Recurring stressors: {', '.join(list(self.stressors)[:3])}")
+        if self.open_objectives:
+            lines.append(f"- Still open from an earlier check-in: {', '.join(self.open_objectives)}")
+        lines.append(
+            "Start the conversation by referencing this previous session naturally.\n"
+            f"For example: \"Last time we talked, you mentioned {last.get('mood') or 'feeling'}. How does today compare?\""
+        )
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "check_ins": self.check_ins,
+            "first_date": self.first_date,
+            "last": self.last,
+            "recent_moods": self.recent_moods,
+            "energy_fast": self.energy_fast,
+            "energy_slow": self.energy_slow,
+            "stressors": self.stressors,
+            "open_objectives": self.open_objectives,
+            "last_timestamp": self.last_timestamp,
+        }
+
+
+class MemoryDigests:
+    """Loads, updates and persists per-user digests through an AsyncWellnessStore"""
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def get(self, user_id: str, store: Any) -> MemoryDigest:
+        """Return a user's digest, rebuilding it from their history if it is missing or stale"""
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            digest, rebuilt = await self._load(user_id, store)
+            if not rebuilt:
+                # The digest is saved without fsync, so a crash can leave it behind the history
+                latest = await store.latest(user_id)
+                if latest is not None and latest.get("timestamp") != digest.last_timestamp:
+                    digest, rebuilt = await self._rebuild(user_id, store), True
+            if rebuilt and digest.check_ins:
+                await store.put_digest(user_id, digest.to_dict())
+        return digest
+
+    async def record(self, user_id: str, entry: dict[str, Any], store: Any) -> MemoryDigest:
+        """
+        Fold a check-in that was just saved into the user's digest and persist it
+
+        Args:
+            user_id: User who saved the check-in
+            entry: The saved check-in
+            store: AsyncWellnessStore holding the user's history and digest
+        """
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            digest, rebuilt = await self._load(user_id, store)
+            # A digest rebuilt from history already includes the entry
+            if not rebuilt:
+                digest.update(entry)
+            await store.put_digest(user_id, digest.to_dict())
+        return digest
+
+    async def _load(self, user_id: str, store: Any) -> tuple[MemoryDigest, bool]:
+        data = await store.get_digest(user_id)
+        if data is not None:
+            return MemoryDigest(data), False
+        return await self._rebuild(user_id, store), True
+
+    async def _rebuild(self, user_id: str, store: Any) -> MemoryDigest:
+        logger.info(f"Building memory digest for {user_id} from full history")
+        return MemoryDigest.from_entries(await store.entries(user_id))
+
+
+def _clip(value: Any, limit: int = MAX_TEXT_CHARS) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _ema(current: Optional[float], value: float, alpha: float) -> float:
+    return value if current is None else current + alpha * (value - current)
+
+
+_digests_instance = None
+
+
+def get_memory_digests() -> MemoryDigests:
+    """Get singleton memory digest manager"""
+    global _digests_instance
+    if _digests_instance is None:
+        _digests_instance = MemoryDigests()
+    return _digests_instance
@@ -0,0 +1,222 @@
+"""
+Greeting Pipeline for Wellness Companion
+Prepares the opening line's text and audio while the participant is still joining
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import prometheus_client
+from livekit import rtc
+from livekit.agents import llm
+
+from wellness_digest import MemoryDigest, get_memory_digests
+from wellness_prompt import FIRST_GREETING, build_instructions
+
+logger = logging.getLogger("wellness_greeting")
+
+GREETING_WAIT_SECONDS = prometheus_client.Histogram(
+    "wellness_greeting_wait_seconds",
+    "Time the session waited for the prepared greeting's first audio",
+    buckets=[0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0],
+)
+
+# Asked of the LLM, after the full instructions, to write a returning user's opening line
+GREETING_REQUEST = (
+    "The user has just joined. Greet them warmly in one or two short sentences, "
+    "referencing their previous check-in, and ask how they are feeling today."
+)
+
+
+class AudioBuffer:
+    """Frames of one utterance that can be played while they are still being synthesized"""
+
+    def __init__(self):
+        self.frames: list[rtc.AudioFrame] = []
+        self.done = False
+        self._changed = asyncio.Event()
+
+    def push(self, frame: rtc.AudioFrame) -> None:
+        self.frames.append(frame)
+        self._changed.set()
+
+    def close(self) -> None:
+        self.done = True
+        self._changed.set()
+
+    async def first_frame(self) -> bool:
+        """Wait for the first frame; False if synthesis ended without any audio"""
+        while not self.frames and not self.done:
+            self._changed.clear()
+            await self._changed.wait()
+        return bool(self.frames)
+
+    async def play(self) -> AsyncIterator[rtc.AudioFrame]:
+        """Yield every frame, waiting for new ones until synthesis is done"""
+        index = 0
+        while True:
+            if index < len(self.frames):
+                yield self.frames[index]
+                index += 1
+            elif self.done:
+                return
+            else:
+                self._changed.clear()
+                await self._changed.wait()
+
+
+@dataclass
+class PreparedGreeting:
+    """Opening line of a session, with its audio synthesized or being synthesized"""
+
+    text: str
+    audio: Optional[AudioBuffer]
+    personalized: bool
+
+
+class GreetingPipeline:
+    """Opening turn prepared from the moment a job is dispatched
+
+    The pipeline loads the user's memory digest, then writes the greeting:
+    new users get the fixed FIRST_GREETING, served from the TTS audio
+    cache, while returning users get one line generated by the LLM from
+    the same instructions the session uses. The greeting's audio is
+    synthesized straight away into an AudioBuffer. All of this overlaps
+    with connecting to the room and waiting for the participant, so when
+    the agent enters, it can start playing, even before synthesis finishes.
+    """
+
+    def __init__(self, user_id: str, store: Any, llm_provider: Any, tts: Any, tts_cache: Any = None):
+        self.user_id = user_id
+        self.store = store
+        self.llm = llm_provider
+        self.tts = tts
+        self.tts_cache = tts_cache
+        self.timings: dict[str, float] = {}
+        self._started_at = time.perf_counter()
+        self._digest: Optional[asyncio.Task] = None
+        self._greeting: Optional[asyncio.Task] = None
+        self._synthesis: Optional[asyncio.Task] = None
+
+    def start(self) -> "GreetingPipeline":
+        """Start preparing the digest and greeting in the background"""
+        self._started_at = time.perf_counter()
+        self._digest = asyncio.ensure_future(self._load_digest())
+        self._greeting = asyncio.ensure_future(self._prepare())
+        return self
+
+    async def digest(self) -> Optional[MemoryDigest]:
+        """The user's memory digest, None if it could not be loaded"""
+        return await asyncio.shield(self._digest)
+
+    async def greeting(self, timeout: float) -> Optional[PreparedGreeting]:
+        """
+        Wait for the prepared greeting and its first audio
+
+        Args:
+            timeout: Seconds to wait before giving up on the prepared greeting
+
+        Returns:
+            The greeting, or None when it failed or took too long; the caller
+            then has the session generate a greeting itself
+        """
+        waited_from = time.perf_counter()
+        try:
+            prepared = await asyncio.wait_for(asyncio.shield(self._greeting), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Greeting not ready after {timeout}s, generating it in the session")
+            return None
+        except Exception as e:
+            logger.error(f"Error preparing greeting: {e}")
+            return None
+
+        if prepared.audio is not None:
+            remaining = max(timeout - (time.perf_counter() - waited_from), 0.0)
+            try:
+                has_audio = await asyncio.wait_for(prepared.audio.first_frame(), remaining)
+            except asyncio.TimeoutError:
+                has_audio = False
+            if not has_audio:
+                # Keep the text; the session's own TTS speaks it
+                logger.warning("Greeting audio not ready, synthesizing it in the session")
+                prepared.audio = None
+
+        wait = time.perf_counter() - waited_from
+        self.timings["session_wait"] = round(wait, 3)
+        GREETING_WAIT_SECONDS.observe(wait)
+        logger.info(f"Greeting timings: {self.timings}")
+        return prepared
+
+    async def aclose(self) -> None:
+        """Stop any work that is still running"""
+        for task in (self._digest, self._greeting, self._synthesis):
+            if task is not None and not task.done():
+                task.cancel()
+
+    def _mark(self, stage: str) -> None:
+        self.timings[stage] = round(time.perf_counter() - self._started_at, 3)
+
+    async def _load_digest(self) -> Optional[MemoryDigest]:
+        try:
+            digest = await get_memory_digests().get(self.user_id, self.store)
+        except Exception as e:
+            logger.error(f"Error loading previous context: {e}")
+            digest = None
+        self._mark("digest")
+        return digest
+
+    async def _prepare(self) -> PreparedGreeting:
+        digest = await self._digest or MemoryDigest()
+        if digest.check_ins == 0:
+            text, personalized = FIRST_GREETING, False
+        else:
+            text, personalized = await self._generate_text(digest), True
+        self._mark("text")
+
+        audio = None
+        if self.tts is not None:
+            audio = AudioBuffer()
+            self._synthesis = asyncio.ensure_future(self._synthesize(text, audio, cacheable=not personalized))
+        return PreparedGreeting(text=text, audio=audio, personalized=personalized)
+
+    async def _generate_text(self, digest: MemoryDigest) -> str:
+        chat_ctx = llm.ChatContext()
+        # Same instructions as the session, so the provider's prompt cache covers them
+        chat_ctx.add_message(role="system", content=build_instructions(digest.render()))
+        chat_ctx.add_message(role="user", content=GREETING_REQUEST)
+
+        parts = []
+        async with self.llm.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta is not None and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        text = "".join(parts).strip()
+        if not text:
+            raise ValueError("LLM returned an empty greeting")
+        return text
+
+    async def _synthesize(self, text: str, audio: AudioBuffer, cacheable: bool) -> None:
+        try:
+            if cacheable and self.tts_cache is not None:
+                frames = self.tts_cache.audio(text, self.tts)
+            else:
+                frames = _synthesize_frames(self.tts, text)
+            async for frame in frames:
+                if not audio.frames:
+                    self._mark("first_audio")
+                audio.push(frame)
+            self._mark("audio")
+        except Exception as e:
+            logger.error(f"Error synthesizing greeting: {e}")
+        finally:
+            audio.close()
+
+
+async def _synthesize_frames(tts: Any, text: str) -> AsyncIterator[rtc.AudioFrame]:
+    async with tts.synthesize(text) as stream:
+        async for event in stream:
+            yield event.frame
@@ -0,0 +1,216 @@
+"""
+Async Storage I/O for Wellness Companion
+Runs check-in reads and writes on a dedicated thread pool so the event loop never waits on disk,
+group-committing bursts of saves into one write and fsync
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+logger = logging.getLogger("wellness_io")
+
+
+def atomic_write(path: Union[str, Path], data: Union[bytes, str], fsync: bool = True) -> None:
+    """
+    Replace a file's contents all at once
+
+    The data is written to a temporary file next to `path` and moved over it
+    with `os.replace`, so readers see either the old or the new contents,
+    never a partial write.
+
+    Args:
+        path: File to write
+        data: New contents
+        fsync: Whether to force the contents to disk before the rename
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per thread so concurrent writers never share a temporary file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class AsyncWellnessStore:
+    """Async front for a check-in store (WellnessStore or SQLiteWellnessStore)
+
+    Every call runs on a bounded pool of `max_workers` I/O threads. Identical
+    reads that are in flight at the same time share one trip to disk; a
+    write to a user's history makes later reads start afresh instead of
+    joining a read that began before the write.
+
+    Appends are group-committed: saves arriving within `commit_window`
+    seconds of each other are handed to the store's `append_many` as one
+    batch (one write and one fsync per journal), and each caller resumes once
+    the whole batch is durable. Batches are committed one at a time, in the
+    order they were formed, so a user's check-ins reach the store in the
+    order they were saved.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        max_workers: int = 4,
+        commit_window: float = 0.01,
+        max_batch: int = 256,
+    ):
+        """
+        Args:
+            store: Synchronous check-in store to wrap
+            max_workers: Maximum number of threads doing storage I/O at once
+            commit_window: Seconds to wait for more saves before committing a batch
+            max_batch: Number of pending saves that triggers an immediate commit
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.commit_window = commit_window
+        self.max_batch = max_batch
+        self.coalesced_reads = 0
+        self.group_commits = 0
+        self.grouped_appends = 0
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._generations: dict[str, int] = {}
+        self._pending: list[tuple[str, dict[str, Any], asyncio.Future]] = []
+        self._commit_handle: Optional[asyncio.TimerHandle] = None
+        self._commits: set[asyncio.Task] = set()
+        # Held for each batch's store call; waiters acquire it in the order their batches were formed
+        self._commit_lock = asyncio.Lock()
+
+    async def append(self, user_id: str, entry: dict[str, Any]) -> None:
+        """Append a check-in to a user's history, returning once it is durable"""
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user_id, entry, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._start_commit()
+        elif self._commit_handle is None:
+            self._commit_handle = loop.call_later(self.commit_window, self._start_commit)
+        # Shielded so a caller giving up does not fail the rest of the batch
+        await asyncio.shield(future)
+
+    async def latest(self, user_id: str) -> Optional[dict[str, Any]]:
+        """Return a user's most recent check-in, or None"""
+        return await self._read("latest", user_id)
+
+    async def tail(self, user_id: str, n: int) -> list[dict[str, Any]]:
+        """Return a user's last `n` check-ins, oldest first"""
+        return list(await self._read("tail", user_id, n))
+
+    async def entries(self, user_id: str) -> list[dict[str, Any]]:
+        """Return a user's full check-in history, oldest first"""
+        return list(await self._read("entries", user_id))
+
+    async def get_digest(self, user_id: str) -> Optional[dict[str, Any]]:
+        """Return the memory digest saved for a user, or None"""
+        return await self._run(self.store.get_digest, user_id)
+
+    async def put_digest(self, user_id: str, digest: dict[str, Any]) -> None:
+        """Save a user's memory digest"""
+        await self._run(self.store.put_digest, user_id, digest)
+
+    async def compact(self, user_id: str, keep_recent: int = 50, min_entries: int = 50) -> int:
+        """Roll a user's older check-ins into the store's archive, if it has one"""
+        if not hasattr(self.store, "compact"):
+            return 0
+        await self._drain_commits()
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        return await self._run(self.store.compact, user_id, keep_recent, min_entries)
+
+    async def stats(self) -> dict[str, Any]:
+        """Return the wrapped store's statistics plus read coalescing and group commit counters"""
+        stats = await self._run(self.store.stats)
+        return {
+            **stats,
+            "coalesced_reads": self.coalesced_reads,
+            "group_commits": self.group_commits,
+            "grouped_appends": self.grouped_appends,
+        }
+
+    async def flush(self) -> None:
+        """Commit pending saves and force buffered writes of the wrapped store to disk"""
+        await self._drain_commits()
+        await self._run(self.store.flush)
+
+    async def write_file(self, path: Union[str, Path], data: Union[bytes, str]) -> None:
+        """Atomically replace a file's contents off the event loop"""
+        await self._run(atomic_write, path, data)
+
+    async def close(self) -> None:
+        """Commit pending saves, close the wrapped store and stop the I/O threads"""
+        await self._drain_commits()
+        await self._run(self.store.close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _read(self, method: str, user_id: str, *args) -> Any:
+        key = (method, user_id, args, self._generations.get(user_id, 0))
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced_reads += 1
+        else:
+            future = asyncio.ensure_future(self._run(getattr(self.store, method), user_id, *args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller giving up does not cancel the read for the others
+        return await asyncio.shield(future)
+
+    def _start_commit(self) -> None:
+        if self._commit_handle is not None:
+            self._commit_handle.cancel()
+            self._commit_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._commit(batch))
+            self._commits.add(task)
+            task.add_done_callback(self._commits.discard)
+
+    async def _commit(self, batch: list[tuple[str, dict[str, Any], asyncio.Future]]) -> None:
+        items = [(user_id, entry) for user_id, entry, _ in batch]
+        try:
+            async with self._commit_lock:
+                await self._run(self.store.append_many, items)
+        except Exception as e:
+            logger.error(f"Group commit of {len(items)} check-ins failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.group_commits += 1
+        self.grouped_appends += len(items)
+        for _, _, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+    async def _drain_commits(self) -> None:
+        self._start_commit()
+        if self._commits:
+            await asyncio.gather(*self._commits, return_exceptions=True)
+
+    def _run(self, fn: Callable, *args) -> "asyncio.Future":
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="wellness_io")
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
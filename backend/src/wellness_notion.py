@@ -3,15 +3,45 @@ Notion Client for Wellness Companion
 Handles all interactions with Notion API for storing check-in data
 """
 
+import asyncio
 import os
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime
-from notion_client import Client
+import time
+from typing import Optional, List, Dict, Any, Tuple
+
+import httpx
+from notion_client import AsyncClient
 from notion_client.errors import APIResponseError
 
 logger = logging.getLogger("notion_client")
 
+# Keep-alive pool shared by every Notion request made from this worker process
+NOTION_HTTP_LIMITS = httpx.Limits(
+    max_connections=10,
+    max_keepalive_connections=5,
+    keepalive_expiry=60.0,
+)
+
+# Maximum page size accepted by the Notion query API
+NOTION_PAGE_SIZE = 100
+
+# Seconds the schema lookup in warm_up() may take before it is given up on
+NOTION_SCHEMA_TIMEOUT = 5.0
+
+# Properties written by create_wellness_entry and the Notion type each must have
+REQUIRED_PROPERTIES = {
+    "Name": "title",
+    "Date": "date",
+    "Mood": "select",
+    "Energy": "select",
+    "Objectives": "rich_text",
+    "Status": "select",
+}
+OPTIONAL_PROPERTIES = {
+    "Stressors": "rich_text",
+    "Summary": "rich_text",
+}
+
 
 class NotionWellnessClient:
     """Client for managing wellness check-ins in Notion database"""
@@ -22,6 +52,16 @@ class NotionWellnessClient:
         self.database_id = os.getenv("NOTION_DATABASE_ID")
         self.enabled = os.getenv("ENABLE_NOTION_MCP", "false").lower() == "true"
         
+        # Read cache for get_recent_entries, keyed by database id
+        self.cache_ttl = float(os.getenv("NOTION_CACHE_TTL", "30"))
+        self.full_sync_interval = float(os.getenv("NOTION_FULL_SYNC_INTERVAL", "900"))
+        self._page_caches: Dict[str, _PageCache] = {}
+        
+        # Database schema, loaded once by load_schema() when the first job warms up
+        self.schema: Optional[Dict[str, Any]] = None
+        # Data source holding the database's pages; queries go through it
+        self.data_source_id: Optional[str] = None
+        
         if not self.enabled:
             logger.info("Notion integration is disabled")
             self.client = None
@@ -40,7 +80,12 @@ class NotionWellnessClient:
             return
         
         try:
-            self.client = Client(auth=self.api_key)
+            # Async SDK client over a pooled httpx transport, so API calls never
+            # block the event loop that carries the live audio
+            self.client = AsyncClient(
+                auth=self.api_key,
+                client=httpx.AsyncClient(limits=NOTION_HTTP_LIMITS),
+            )
             logger.info("Notion client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Notion client: {e}")
@@ -51,6 +96,80 @@ class NotionWellnessClient:
         """Check if Notion integration is enabled and configured"""
         return self.enabled and self.client is not None
     
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections"""
+        if self.client is not None:
+            await self.client.aclose()
+    
+    async def load_schema(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fetch and validate the database schema
+        
+        Runs from the job's warm_up() rather than worker prewarm: process
+        initialization has a hard time limit, and a slow Notion API would get
+        the process killed. Problems with the schema are logged as warnings.
+        
+        Args:
+            timeout: Seconds to wait for Notion before giving up, NOTION_SCHEMA_TIMEOUT by default
+            
+        Returns:
+            Dictionary with property types and select options, or None if disabled
+            
+        Raises:
+            asyncio.TimeoutError: If Notion did not answer within `timeout`
+        """
+        if not self.is_enabled():
+            return None
+        
+        properties = await asyncio.wait_for(self._retrieve_properties(), timeout or NOTION_SCHEMA_TIMEOUT)
+        
+        schema = {
+            "properties": {name: prop.get("type") for name, prop in (properties or {}).items()},
+            "options": {
+                name: [option["name"] for option in prop.get("select", {}).get("options", [])]
+                for name, prop in (properties or {}).items()
+                if prop.get("type") == "select"
+            }
+        }
+        
+        for problem in validate_schema(schema):
+            logger.warning(f"Notion database schema: {problem}")
+        
+        self.schema = schema
+        logger.info(f"Loaded Notion database schema with {len(schema['properties'])} properties")
+        return schema
+    
+    async def _retrieve_properties(self) -> Optional[Dict[str, Any]]:
+        database = await self.client.databases.retrieve(database_id=self.database_id)
+        properties = database.get("properties")
+        if database.get("data_sources"):
+            self.data_source_id = database["data_sources"][0]["id"]
+        if properties is None and self.data_source_id is not None:
+            # Newer API versions keep the properties on the data source
+            data_source = await self.client.data_sources.retrieve(data_source_id=self.data_source_id)
+            properties = data_source.get("properties")
+        return properties
+    
+    async def warm_up(self) -> None:
+        """Open a pooled connection to the Notion API and load the schema ahead of the first real request"""
+        if not self.is_enabled():
+            return
+        try:
+            if self.schema is None:
+                await self.load_schema()
+            else:
+                await self.client.users.me()
+        except Exception as e:
+            logger.warning(f"Notion warm-up request failed: {e!r}")
+    
+    def _select_option(self, prop: str, value: str) -> str:
+        """Match a value to an existing select option, ignoring case"""
+        if self.schema is not None:
+            for option in self.schema["options"].get(prop, []):
+                if option.lower() == value.lower():
+                    return option
+        return value.capitalize()
+    
     async def create_wellness_entry(
         self,
         date: str,
@@ -100,12 +219,12 @@ class NotionWellnessClient:
             },
             "Mood": {
                 "select": {
-                    "name": mood.capitalize()
+                    "name": self._select_option("Mood", mood)
                 }
             },
             "Energy": {
                 "select": {
-                    "name": energy.capitalize()
+                    "name": self._select_option("Energy", energy)
                 }
             },
             "Objectives": {
@@ -149,12 +268,13 @@ class NotionWellnessClient:
         
         try:
             
-            response = self.client.pages.create(
+            response = await self.client.pages.create(
                 parent={"database_id": self.database_id},
                 properties=properties
             )
             
             logger.info(f"Created Notion entry: {response['id']}")
+            self._remember_page(response)
             return {
                 "success": True,
                 "page_id": response["id"],
@@ -188,7 +308,7 @@ class NotionWellnessClient:
             raise ValueError("Notion integration is not enabled")
         
         try:
-            response = self.client.pages.update(
+            response = await self.client.pages.update(
                 page_id=page_id,
                 properties={
                     "Status": {
@@ -200,6 +320,7 @@ class NotionWellnessClient:
             )
             
             logger.info(f"Updated Notion entry {page_id} to status: {status}")
+            self._remember_page(response)
             return {
                 "success": True,
                 "page_id": response["id"],
@@ -212,63 +333,218 @@ class NotionWellnessClient:
     
     async def get_recent_entries(
         self,
-        limit: int = 5
+        limit: int = 5,
+        force_refresh: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Retrieve recent wellness entries from Notion
         
+        Entries are served from a per-database cache while it is younger than
+        `cache_ttl`. After that, only pages edited since the last sync are
+        fetched; a full resync of the most recent pages runs every
+        `full_sync_interval` to drop pages that were deleted in Notion, when
+        more entries are asked for than the cache holds, or when no page
+        gave the cache an edit time to sync from.
+        
         Args:
             limit: Maximum number of entries to retrieve
+            force_refresh: Refresh from Notion even if the cache is fresh
             
         Returns:
-            List of entry dictionaries
+            List of entry dictionaries, most recent date first
         """
         if not self.is_enabled():
             raise ValueError("Notion integration is not enabled")
         
+        cache = self._page_caches.setdefault(self.database_id, _PageCache())
+        
         try:
-            response = self.client.databases.query(
-                database_id=self.database_id,
-                sorts=[
-                    {
-                        "property": "Date",
-                        "direction": "descending"
-                    }
-                ],
-                page_size=limit
-            )
-            
-            entries = []
-            for page in response["results"]:
-                props = page["properties"]
-                
-                
-                entry = {
-                    "page_id": page["id"],
-                    "url": page["url"],
-                    "date": props.get("Date", {}).get("date", {}).get("start", "Unknown"),
-                    "mood": props.get("Mood", {}).get("select", {}).get("name", "Not set"),
-                    "energy": props.get("Energy", {}).get("select", {}).get("name", "Not set"),
-                    "status": props.get("Status", {}).get("select", {}).get("name", "Unknown"),
-                }
-                
-               
-                objectives_rich_text = props.get("Objectives", {}).get("rich_text", [])
-                if objectives_rich_text:
-                    entry["objectives"] = objectives_rich_text[0].get("text", {}).get("content", "")
-                else:
-                    entry["objectives"] = ""
-                
-                entries.append(entry)
-            
-            logger.info(f"Retrieved {len(entries)} entries from Notion")
-            return entries
+            async with cache.lock:
+                now = time.monotonic()
+                stale = force_refresh or cache.refreshed_at is None or now - cache.refreshed_at >= self.cache_ttl
+                too_short = not cache.complete and cache.depth < limit
+                # Without a high-water mark an incremental sync has nothing to filter on
+                # and would read the whole database, so resync the most recent pages instead
+                needs_full_sync = (
+                    cache.high_water is None
+                    or cache.full_sync_at is None
+                    or now - cache.full_sync_at >= self.full_sync_interval
+                )
+                if too_short or (stale and needs_full_sync):
+                    await self._full_sync(cache, limit)
+                elif stale:
+                    await self._incremental_sync(cache)
             
         except APIResponseError as e:
             logger.error(f"Notion API error retrieving entries: {e}")
             raise
+        
+        entries = sorted(
+            cache.entries.values(),
+            key=lambda entry: (entry["date"], cache.edited.get(entry["page_id"], "")),
+            reverse=True
+        )
+        return entries[:limit]
+    
+    async def _full_sync(self, cache: "_PageCache", limit: int) -> None:
+        """Replace the cache with the database's `limit` most recent pages"""
+        pages, has_more = await self._query(limit=limit)
+        cache.entries.clear()
+        cache.edited.clear()
+        cache.high_water = None
+        for page in pages:
+            cache.remember(page)
+        cache.depth = len(pages)
+        cache.complete = not has_more
+        cache.refreshed_at = cache.full_sync_at = time.monotonic()
+        logger.info(f"Synced {len(pages)} entries from Notion")
+    
+    async def _incremental_sync(self, cache: "_PageCache") -> None:
+        """Fetch only the pages edited since the last sync"""
+        query_filter = {
+            "timestamp": "last_edited_time",
+            "last_edited_time": {"on_or_after": cache.high_water}
+        }
+        pages, _ = await self._query(query_filter)
+        for page in pages:
+            cache.remember(page)
+        cache.refreshed_at = time.monotonic()
+        logger.info(f"Refreshed {len(pages)} changed entries from Notion")
+    
+    async def _query(
+        self,
+        query_filter: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Query the database's pages, most recent first, following `next_cursor`
+        
+        Args:
+            query_filter: Optional Notion filter
+            limit: Stop once this many pages are read; None reads every page
+            
+        Returns:
+            The pages read, and whether more pages match the query
+        """
+        params: Dict[str, Any] = {
+            "data_source_id": await self._resolve_data_source(),
+            "sorts": [
+                {
+                    "property": "Date",
+                    "direction": "descending"
+                },
+                {
+                    "timestamp": "last_edited_time",
+                    "direction": "descending"
+                }
+            ],
+            "page_size": min(limit, NOTION_PAGE_SIZE) if limit else NOTION_PAGE_SIZE
+        }
+        if query_filter is not None:
+            params["filter"] = query_filter
+        
+        pages = []
+        while True:
+            response = await self.client.data_sources.query(**params)
+            pages.extend(response["results"])
+            has_more = bool(response.get("has_more") and response.get("next_cursor"))
+            if not has_more or (limit is not None and len(pages) >= limit):
+                return pages, has_more
+            params["start_cursor"] = response["next_cursor"]
+    
+    async def _resolve_data_source(self) -> str:
+        """The database's data source id, looked up once if load_schema did not find it"""
+        if self.data_source_id is None:
+            database = await self.client.databases.retrieve(database_id=self.database_id)
+            data_sources = database.get("data_sources") or []
+            if not data_sources:
+                raise ValueError(f"Notion database {self.database_id} has no data source")
+            self.data_source_id = data_sources[0]["id"]
+        return self.data_source_id
+    
+    def _remember_page(self, page: Dict[str, Any]) -> None:
+        """Keep a page we just wrote in the read cache"""
+        cache = self._page_caches.get(self.database_id)
+        if cache is not None and "properties" in page:
+            # Our own write says nothing about edits made by others since the last
+            # sync, so it must not move the incremental sync's starting point
+            cache.remember(page, advance_high_water=False)
+
+
+class _PageCache:
+    """Parsed wellness entries of one Notion database"""
+    
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # page id -> last_edited_time, used to order same-day entries
+        self.edited: Dict[str, str] = {}
+        # Latest last_edited_time seen in query results; the next incremental sync starts here
+        self.high_water: Optional[str] = None
+        # Pages read by the last full sync, and whether that was every page
+        self.depth = 0
+        self.complete = False
+        self.refreshed_at: Optional[float] = None
+        self.full_sync_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+    
+    def remember(self, page: Dict[str, Any], advance_high_water: bool = True) -> None:
+        entry = _parse_page(page)
+        self.entries[entry["page_id"]] = entry
+        edited = page.get("last_edited_time")
+        if edited:
+            self.edited[entry["page_id"]] = edited
+            if advance_high_water and (self.high_water is None or edited > self.high_water):
+                self.high_water = edited
+
+
+def validate_schema(schema: Dict[str, Any]) -> List[str]:
+    """
+    Check a database schema against the properties the wellness client writes
+    
+    Args:
+        schema: Schema as returned by NotionWellnessClient.load_schema
+        
+    Returns:
+        List of human-readable problems (empty if the schema is usable)
+    """
+    problems = []
+    properties = schema["properties"]
+    
+    for name, expected in {**REQUIRED_PROPERTIES, **OPTIONAL_PROPERTIES}.items():
+        actual = properties.get(name)
+        if actual is None:
+            if name in REQUIRED_PROPERTIES:
+                problems.append(f"missing property '{name}' ({expected})")
+        elif actual != expected:
+            problems.append(f"property '{name}' is {actual}, expected {expected}")
+    
+    if properties.get("Status") == "select" and "Planned" not in schema["options"].get("Status", []):
+        problems.append("select property 'Status' has no 'Planned' option")
+    
+    return problems
 
 
+def _parse_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Notion page into a wellness entry dictionary"""
+    props = page["properties"]
+    
+    entry = {
+        "page_id": page["id"],
+        "url": page["url"],
+        "date": (props.get("Date", {}).get("date") or {}).get("start", "Unknown"),
+        "mood": (props.get("Mood", {}).get("select") or {}).get("name", "Not set"),
+        "energy": (props.get("Energy", {}).get("select") or {}).get("name", "Not set"),
+        "status": (props.get("Status", {}).get("select") or {}).get("name", "Unknown"),
+    }
+    
+    objectives_rich_text = props.get("Objectives", {}).get("rich_text", [])
+    if objectives_rich_text:
+        entry["objectives"] = objectives_rich_text[0].get("text", {}).get("content", "")
+    else:
+        entry["objectives"] = ""
+    
+    return entry
+
 
 _notion_client_instance = None
 
@@ -0,0 +1,413 @@
+"""
+Background Notion Sync for Wellness Companion
+Durable outbound queue that delivers check-ins to Notion off the conversation path
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import httpx
+from notion_client.errors import APIErrorCode, APIResponseError, RequestTimeoutError
+
+from wellness_io import atomic_write
+from wellness_notion import NotionWellnessClient, get_notion_client
+
+logger = logging.getLogger("notion_sync")
+
+# Notion errors worth retrying; anything else is a permanent failure
+RETRYABLE_CODES = {
+    APIErrorCode.RateLimited,
+    APIErrorCode.ConflictError,
+    APIErrorCode.InternalServerError,
+    APIErrorCode.ServiceUnavailable,
+}
+
+# Number of delivered keys remembered to drop duplicate enqueues
+_SENT_KEYS_LIMIT = 1024
+
+
+class NotionSyncQueue:
+    """Durable queue of check-ins waiting to be written to Notion
+
+    `enqueue()` persists the item to `root/pending/<key>.json` and returns
+    immediately; a background task delivers items through
+    `NotionWellnessClient.create_wellness_entry`, paced to Notion's ~3
+    requests per second and retried with exponential backoff and jitter.
+    Items whose retries are exhausted, or that Notion rejects outright, are
+    moved to `root/failed/`.
+
+    Each item carries an idempotency key derived from the user and the
+    check-in timestamp, so saving the same check-in twice only creates one
+    Notion page. Every job process may run a queue on the same directory,
+    so an item is claimed before it is sent by renaming it into the
+    process's own `root/inflight/<pid>/` directory; whoever loses the rename
+    leaves it alone. Delivered keys are appended to `root/sent.log`, and
+    pending items left on disk, including those claimed by a process that
+    has since died, are picked up again by `start()` after a restart.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        client_factory: Callable[[], NotionWellnessClient] = get_notion_client,
+        rate_per_sec: float = 3.0,
+        max_attempts: int = 8,
+        base_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+    ):
+        """
+        Args:
+            root: Directory holding the pending and failed queue items
+            client_factory: Returns the Notion client used for delivery
+            rate_per_sec: Maximum number of Notion requests per second
+            max_attempts: Delivery attempts before an item is given up on
+            base_backoff: Delay in seconds before the first retry
+            max_backoff: Upper bound in seconds for the retry delay
+        """
+        self.root = Path(root)
+        self.pending_dir = self.root / "pending"
+        self.failed_dir = self.root / "failed"
+        self.inflight_root = self.root / "inflight"
+        self.inflight_dir = self.inflight_root / str(os.getpid())
+        self.sent_log = self.root / "sent.log"
+        self.client_factory = client_factory
+        self.rate_per_sec = rate_per_sec
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._sent: OrderedDict[str, None] = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._next_slot = 0.0
+
+    def start(self) -> None:
+        """Start the delivery task, which first loads items left on disk (idempotent)"""
+        if self._task is not None and not self._task.done():
+            return
+
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="notion_sync")
+
+    async def stop(self) -> None:
+        """Cancel the delivery task; undelivered items stay on disk"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait until every pending item has been delivered or given up on
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            True if the queue emptied in time
+        """
+        if self._idle is None:
+            # Never started, so nothing is being delivered
+            return not self._pending
+        # Idle is only set once the items left on disk have been loaded
+        if not self._pending and self._idle.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return not self._pending
+
+    async def enqueue(self, user_id: str, entry: dict[str, Any]) -> str:
+        """
+        Queue a check-in for delivery to Notion
+
+        Args:
+            user_id: User the check-in belongs to
+            entry: Check-in data as stored in the wellness log
+
+        Returns:
+            The item's idempotency key
+        """
+        key = idempotency_key(user_id, entry)
+        if key in self._pending or key in self._sent:
+            logger.info(f"Notion sync item {key} is already queued or delivered")
+            return key
+
+        item = {
+            "key": key,
+            "user_id": user_id,
+            "entry": entry,
+            "attempts": 0,
+            "next_attempt_at": time.time(),
+        }
+        await asyncio.get_running_loop().run_in_executor(None, self._persist, item)
+
+        self._pending[key] = item
+        if self._idle is not None:
+            self._idle.clear()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return key
+
+    def pending_count(self) -> int:
+        """Return the number of items waiting for delivery"""
+        return len(self._pending)
+
+    async def _run(self) -> None:
+        loaded = await asyncio.get_running_loop().run_in_executor(None, self._load_pending)
+        for item in loaded:
+            self._pending.setdefault(item["key"], item)
+        if self._pending:
+            logger.info(f"Resuming {len(self._pending)} pending Notion sync item(s)")
+
+        while True:
+            item = self._next_due()
+            if item is None:
+                self._wakeup.clear()
+                if not self._pending:
+                    self._idle.set()
+                delay = self._seconds_until_next()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                continue
+
+            await self._pace()
+            await self._deliver(item)
+
+    async def _deliver(self, item: dict[str, Any]) -> None:
+        key = item["key"]
+        entry = item["entry"]
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self._claim, key):
+            # Another job process delivered it or is delivering it
+            logger.info(f"Notion sync item {key} was claimed by another process")
+            self._pending.pop(key, None)
+            return
+        item["attempts"] += 1
+
+        try:
+            client = self.client_factory()
+            result = await client.create_wellness_entry(
+                date=entry["date"],
+                mood=entry["mood"],
+                energy=entry["energy"],
+                objectives=entry.get("objectives", []),
+                stressors=entry.get("stressors"),
+                summary=entry.get("summary"),
+            )
+        except APIResponseError as e:
+            if e.code in RETRYABLE_CODES:
+                await self._retry(item, e, _retry_after(e))
+            else:
+                await self._fail(item, e)
+            return
+        except (RequestTimeoutError, httpx.TransportError) as e:
+            await self._retry(item, e)
+            return
+        except Exception as e:
+            await self._fail(item, e)
+            return
+
+        logger.info(f"Delivered Notion sync item {key}: {result.get('page_id')}")
+        self._pending.pop(key, None)
+        self._remember_sent(key)
+        await loop.run_in_executor(None, self._mark_delivered, key)
+
+    async def _retry(
+        self,
+        item: dict[str, Any],
+        error: Exception,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        if item["attempts"] >= self.max_attempts:
+            await self._fail(item, error)
+            return
+
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (item["attempts"] - 1)))
+        delay = delay * random.uniform(0.5, 1.0)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        item["next_attempt_at"] = time.time() + delay
+        await asyncio.get_running_loop().run_in_executor(None, self._release, item)
+        logger.warning(
+            f"Notion sync item {item['key']} failed (attempt {item['attempts']}), "
+            f"retrying in {delay:.1f}s: {error}"
+        )
+
+    async def _fail(self, item: dict[str, Any], error: Exception) -> None:
+        key = item["key"]
+        self._pending.pop(key, None)
+        item["error"] = str(error)
+        await asyncio.get_running_loop().run_in_executor(None, self._move_to_failed, item)
+        logger.error(f"Giving up on Notion sync item {key} after {item['attempts']} attempt(s): {error}")
+
+    async def _pace(self) -> None:
+        """Space requests so that at most `rate_per_sec` are sent each second"""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / self.rate_per_sec
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _next_due(self) -> Optional[dict[str, Any]]:
+        now = time.time()
+        due = [item for item in self._pending.values() if item["next_attempt_at"] <= now]
+        if not due:
+            return None
+        return min(due, key=lambda item: item["next_attempt_at"])
+
+    def _seconds_until_next(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        earliest = min(item["next_attempt_at"] for item in self._pending.values())
+        return max(0.0, earliest - time.time())
+
+    def _remember_sent(self, key: str) -> None:
+        self._sent[key] = None
+        while len(self._sent) > _SENT_KEYS_LIMIT:
+            self._sent.popitem(last=False)
+
+    def _load_pending(self) -> list[dict[str, Any]]:
+        """Read delivered keys and unclaimed items; runs on an executor thread"""
+        sent = self._load_sent()
+        for key in sent:
+            self._remember_sent(key)
+        self._recover_orphans(sent)
+
+        items = []
+        if not self.pending_dir.exists():
+            return items
+        for path in sorted(self.pending_dir.glob("*.json")):
+            try:
+                item = json.loads(path.read_text())
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping unreadable Notion sync item {path}: {e}")
+                continue
+            if item["key"] in sent:
+                # Delivered, but the process stopped before removing it
+                self._unlink(path)
+                continue
+            items.append(item)
+        return items
+
+    def _load_sent(self) -> set[str]:
+        try:
+            keys = self.sent_log.read_text().split()
+        except FileNotFoundError:
+            return set()
+        if len(keys) > 4 * _SENT_KEYS_LIMIT:
+            keys = keys[-_SENT_KEYS_LIMIT:]
+            atomic_write(self.sent_log, "".join(f"{key}\n" for key in keys))
+        return set(keys)
+
+    def _recover_orphans(self, sent: set[str]) -> None:
+        """Return items claimed by job processes that have exited to pending/"""
+        if not self.inflight_root.exists():
+            return
+        for owner in self.inflight_root.iterdir():
+            if owner == self.inflight_dir or _process_alive(owner.name):
+                continue
+            for path in owner.glob("*.json"):
+                if path.stem in sent:
+                    self._unlink(path)
+                    continue
+                self.pending_dir.mkdir(parents=True, exist_ok=True)
+                # Another process may have recovered it first
+                with contextlib.suppress(FileNotFoundError):
+                    os.rename(path, self.pending_dir / path.name)
+            with contextlib.suppress(OSError):
+                owner.rmdir()
+
+    def _item_path(self, key: str) -> Path:
+        return self.pending_dir / f"{key}.json"
+
+    def _inflight_path(self, key: str) -> Path:
+        return self.inflight_dir / f"{key}.json"
+
+    def _persist(self, item: dict[str, Any]) -> None:
+        atomic_write(self._item_path(item["key"]), json.dumps(item))
+
+    def _claim(self, key: str) -> bool:
+        """Atomically take an item out of pending/ for this process"""
+        self.inflight_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            os.rename(self._item_path(key), self._inflight_path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _release(self, item: dict[str, Any]) -> None:
+        """Hand a claimed item back to pending/ until its next attempt"""
+        self._persist(item)
+        self._unlink(self._inflight_path(item["key"]))
+
+    def _mark_delivered(self, key: str) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.sent_log, "a") as f:
+            f.write(f"{key}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._unlink(self._inflight_path(key))
+
+    def _move_to_failed(self, item: dict[str, Any]) -> None:
+        self.failed_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write(self.failed_dir / f"{item['key']}.json", json.dumps(item))
+        self._unlink(self._inflight_path(item["key"]))
+        self._unlink(self._item_path(item["key"]))
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def idempotency_key(user_id: str, entry: dict[str, Any]) -> str:
+    """Derive a stable key identifying one user's check-in"""
+    identity = entry.get("timestamp") or json.dumps(entry, sort_keys=True)
+    return hashlib.sha256(f"{user_id}\n{identity}".encode()).hexdigest()[:32]
+
+
+def _process_alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _retry_after(error: APIResponseError) -> Optional[float]:
+    try:
+        return float(error.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+_sync_queue_instance = None
+
+
+def get_notion_sync_queue() -> NotionSyncQueue:
+    """Get singleton Notion sync queue instance"""
+    global _sync_queue_instance
+    if _sync_queue_instance is None:
+        _sync_queue_instance = NotionSyncQueue(os.getenv("NOTION_SYNC_QUEUE_DIR", "notion_sync_queue"))
+    return _sync_queue_instance
@@ -0,0 +1,181 @@
+"""
+Provider Registry for Wellness Companion
+Builds the speech, language and audio providers once per worker process and hands them to each session
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+# Plugins register themselves on import, which has to happen on the main thread at startup
+from livekit.plugins import deepgram, google, murf, noise_cancellation, silero
+from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+from wellness_batching import load_batched_vad, vad_batching_enabled
+from wellness_chunker import get_first_chunk_tokenizer
+
+logger = logging.getLogger("wellness_providers")
+
+# Providers holding no per-connection state; one instance serves every session in the process
+SHARED_PROVIDERS = ("vad", "noise_cancellation")
+# Shared the same way, but built on the first acquire(): the turn detector takes its inference
+# executor from the job context, which does not exist yet while the process prewarms
+JOB_SHARED_PROVIDERS = ("turn_detection",)
+# Providers that pool HTTP/WebSocket connections. Those connections belong to one event loop,
+# so these are shared by the sessions on a loop and closed when the loop's job is done
+LOOP_PROVIDERS = ("stt", "llm", "tts")
+
+
+# Voice every line is spoken in; also part of the TTS audio cache key
+TTS_VOICE = "en-US-matthew"
+TTS_STYLE = "Conversation"
+TTS_SAMPLE_RATE = 24000
+
+
+def create_tts(http_session=None) -> Any:
+    """Build the Murf TTS provider, optionally on a given aiohttp session"""
+    return murf.TTS(
+        voice=TTS_VOICE,
+        style=TTS_STYLE,
+        sample_rate=TTS_SAMPLE_RATE,
+        # Sends each reply's first clause early, then whole sentences
+        tokenizer=get_first_chunk_tokenizer(),
+        text_pacing=True,
+        http_session=http_session,
+    )
+
+
+def _default_factories() -> dict[str, Callable[[], Any]]:
+    return {
+        # With WELLNESS_BATCH_VAD, concurrent VAD windows of all sessions in the process run as one batch
+        "vad": load_batched_vad if vad_batching_enabled() else silero.VAD.load,
+        # The turn detector's weights live in the worker's inference process; this is a handle
+        "turn_detection": MultilingualModel,
+        # For telephony applications, use `BVCTelephony` for best results
+        "noise_cancellation": noise_cancellation.BVC,
+        "stt": lambda: deepgram.STT(model="nova-3"),
+        "llm": lambda: google.LLM(model="gemini-2.5-flash"),
+        "tts": create_tts,
+    }
+
+
+@dataclass
+class SessionProviders:
+    """Providers handed to one AgentSession; owned by the registry, not the session"""
+
+    stt: Any
+    llm: Any
+    tts: Any
+    turn_detection: Any
+    vad: Any
+    noise_cancellation: Any
+
+
+class ProviderRegistry:
+    """Per-process cache of provider instances
+
+    `prewarm()` runs in the worker's prewarm hook, before a job is assigned.
+    It builds the shared providers (except those needing a job context,
+    which the first job builds) and a standby set of connection-pooling
+    providers that is not yet bound to any event loop. `acquire()` hands the
+    calling loop that standby set (or builds one if there is none), so the
+    job's critical path does no provider construction, and sessions on the
+    same loop share one set of connection pools. Each `acquire()` must be
+    paired with a `release()`; the last release on a loop closes its set,
+    since its connections cannot outlive the loop.
+    """
+
+    def __init__(self, factories: Optional[dict[str, Callable[[], Any]]] = None):
+        self._factories = factories
+        self._shared: dict[str, Any] = {}
+        self._standby: Optional[dict[str, Any]] = None
+        self._per_loop: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, Any]] = (
+            weakref.WeakKeyDictionary()
+        )
+        # Sessions on each loop still holding the loop's providers
+        self._refs: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def prewarm(self) -> None:
+        """Build the shared providers and a standby set for the next job"""
+        with self._lock:
+            self._ensure_shared(SHARED_PROVIDERS)
+            if self._standby is None:
+                self._standby = self._build(LOOP_PROVIDERS)
+
+    def acquire(self) -> SessionProviders:
+        """
+        Get the providers for a session on the running event loop
+
+        Returns:
+            Shared providers plus the loop's connection-pooling providers
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._ensure_shared(SHARED_PROVIDERS + JOB_SHARED_PROVIDERS)
+            providers = self._per_loop.get(loop)
+            if providers is not None:
+                self._counts["reused"] += 1
+            elif self._standby is not None:
+                providers, self._standby = self._standby, None
+                self._counts["prewarmed"] += 1
+            else:
+                providers = self._build(LOOP_PROVIDERS)
+                self._counts["cold"] += 1
+            self._per_loop[loop] = providers
+            self._refs[loop] = self._refs.get(loop, 0) + 1
+            return SessionProviders(**self._shared, **providers)
+
+    async def release(self) -> None:
+        """Drop a session's hold on the running loop's providers, closing them after the last one"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            refs = self._refs.get(loop, 0) - 1
+            if refs > 0:
+                self._refs[loop] = refs
+                return
+            self._refs.pop(loop, None)
+            providers = self._per_loop.pop(loop, None)
+        if not providers:
+            return
+        for name, provider in providers.items():
+            try:
+                await provider.aclose()
+            except Exception as e:
+                logger.warning(f"Could not close {name} provider: {e}")
+
+    def stats(self) -> dict[str, int]:
+        """Count how sessions got their providers: prewarmed, reused or built cold"""
+        with self._lock:
+            return {
+                "prewarmed": self._counts["prewarmed"],
+                "reused": self._counts["reused"],
+                "cold": self._counts["cold"],
+                "active_loops": len(self._per_loop),
+            }
+
+    def _ensure_shared(self, names) -> None:
+        missing = [name for name in names if name not in self._shared]
+        if missing:
+            self._shared.update(self._build(missing))
+
+    def _build(self, names) -> dict[str, Any]:
+        if self._factories is None:
+            self._factories = _default_factories()
+        return {name: self._factories[name]() for name in names}
+
+
+_registry_instance = None
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """Get singleton provider registry"""
+    global _registry_instance
+    if _registry_instance is None:
+        _registry_instance = ProviderRegistry()
+    return _registry_instance
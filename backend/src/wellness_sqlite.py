@@ -0,0 +1,307 @@
+"""
+SQLite Storage for Wellness Companion
+Indexed check-in history, selectable with WELLNESS_STORAGE_BACKEND=sqlite
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from wellness_storage import DEFAULT_USER_ID
+
+logger = logging.getLogger("wellness_sqlite")
+
+# Columns stored directly; any other entry keys are kept in `extra`
+_COLUMNS = ("date", "time", "timestamp", "mood", "energy", "objectives", "stressors", "summary")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS check_ins (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    date TEXT,
+    time TEXT,
+    timestamp TEXT,
+    mood TEXT,
+    energy TEXT,
+    objectives TEXT NOT NULL DEFAULT '[]',
+    stressors TEXT,
+    summary TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_check_ins_user_date ON check_ins (user_id, date);
+CREATE INDEX IF NOT EXISTS idx_check_ins_user_timestamp ON check_ins (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_check_ins_user_mood ON check_ins (user_id, mood COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_check_ins_user_energy ON check_ins (user_id, energy COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS digests (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+_INSERT = """
+INSERT INTO check_ins (user_id, date, time, timestamp, mood, energy, objectives, stressors, summary, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_FIELDS = "date, time, timestamp, mood, energy, objectives, stressors, summary, extra"
+
+_SELECT = f"SELECT {_FIELDS} FROM check_ins"
+
+_TAIL = f"""
+SELECT {_FIELDS} FROM (
+    SELECT id, {_FIELDS} FROM check_ins WHERE user_id = ? ORDER BY id DESC LIMIT ?
+) ORDER BY id
+"""
+
+
+class SQLiteWellnessStore:
+    """Check-in storage backed by a single SQLite database in WAL mode
+
+    Offers the same interface as WellnessStore (append/latest/tail/entries)
+    plus `query()` for indexed lookups by date range, mood and energy. Each
+    thread gets its own connection; all statements are parameterized so
+    sqlite3's statement cache reuses the prepared plans.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        legacy_path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Args:
+            path: Location of the SQLite database file
+            legacy_path: Optional `{"entries": [...]}` log imported for the default user
+        """
+        self.path = Path(path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def append(self, user_id: str, entry: dict[str, Any]) -> None:
+        """Append a check-in to a user's history"""
+        conn = self._connection()
+        with conn:
+            conn.execute(_INSERT, _to_row(user_id, entry))
+
+    def append_many(self, items: list[tuple[str, dict[str, Any]]]) -> None:
+        """
+        Durably append a batch of check-ins in a single transaction
+
+        The commit runs with `synchronous=FULL`, so the write-ahead log is
+        fsynced once for the whole batch before this returns.
+
+        Args:
+            items: (user_id, entry) pairs, in the order they were saved
+        """
+        if not items:
+            return
+        conn = self._connection()
+        conn.execute("PRAGMA synchronous=FULL")
+        try:
+            with conn:
+                conn.executemany(_INSERT, [_to_row(user_id, entry) for user_id, entry in items])
+        finally:
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+    def latest(self, user_id: str) -> Optional[dict[str, Any]]:
+        """Return a user's most recent check-in, or None"""
+        entries = self.tail(user_id, 1)
+        return entries[-1] if entries else None
+
+    def tail(self, user_id: str, n: int) -> list[dict[str, Any]]:
+        """Return a user's last `n` check-ins, oldest first"""
+        if n <= 0:
+            return []
+        rows = self._connection().execute(_TAIL, (user_id, n)).fetchall()
+        return [_from_row(row) for row in rows]
+
+    def entries(self, user_id: str) -> list[dict[str, Any]]:
+        """Return a user's full check-in history, oldest first"""
+        rows = self._connection().execute(
+            f"{_SELECT} WHERE user_id = ? ORDER BY id", (user_id,)
+        ).fetchall()
+        return [_from_row(row) for row in rows]
+
+    def query(
+        self,
+        user_id: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        mood: Optional[str] = None,
+        energy: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Look up check-ins using the date, mood and energy indexes
+
+        Args:
+            user_id: User whose history to search
+            since: Earliest date to include (YYYY-MM-DD, inclusive)
+            until: Latest date to include (YYYY-MM-DD, inclusive)
+            mood: Only include entries with this mood (case-insensitive)
+            energy: Only include entries with this energy level (case-insensitive)
+            limit: Maximum number of (most recent) entries to return
+
+        Returns:
+            Matching entry dictionaries, oldest first
+        """
+        clauses = ["user_id = ?"]
+        params: list[Any] = [user_id]
+        if since is not None:
+            clauses.append("date >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("date <= ?")
+            params.append(until)
+        if mood is not None:
+            clauses.append("mood = ? COLLATE NOCASE")
+            params.append(mood)
+        if energy is not None:
+            clauses.append("energy = ? COLLATE NOCASE")
+            params.append(energy)
+
+        sql = f"{_SELECT} WHERE {' AND '.join(clauses)} ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self._connection().execute(sql, params).fetchall()
+        return [_from_row(row) for row in reversed(rows)]
+
+    def get_digest(self, user_id: str) -> Optional[dict[str, Any]]:
+        """Return the memory digest saved for a user, or None"""
+        row = self._connection().execute(
+            "SELECT data FROM digests WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_digest(self, user_id: str, digest: dict[str, Any]) -> None:
+        """Save a user's memory digest"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO digests (user_id, data) VALUES (?, ?)",
+                (user_id, json.dumps(digest)),
+            )
+
+    def stats(self) -> dict[str, Any]:
+        """Return basic storage statistics"""
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM check_ins").fetchone()
+        return {"backend": "sqlite", "check_ins": count}
+
+    def flush(self) -> None:
+        """Checkpoint the write-ahead log into the main database"""
+        self._connection().execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        """Close every connection opened by this store"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._lock:
+            if not self._initialized:
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+                if self.legacy_path is not None:
+                    import_legacy_log(self.legacy_path, conn=conn)
+            self._connections.append(conn)
+
+        self._local.conn = conn
+        return conn
+
+
+def import_legacy_log(
+    legacy_path: Union[str, Path],
+    store: Optional[SQLiteWellnessStore] = None,
+    user_id: str = DEFAULT_USER_ID,
+    conn: Optional[sqlite3.Connection] = None,
+) -> int:
+    """
+    Import a legacy `{"entries": [...]}` wellness log into SQLite
+
+    The import runs in one transaction and the legacy file is renamed with a
+    `.migrated` suffix afterwards, so it only ever happens once.
+
+    Args:
+        legacy_path: Path to the legacy JSON log
+        store: Store to import into
+        user_id: User the legacy entries belong to
+        conn: Connection to use instead of one from `store`
+
+    Returns:
+        Number of imported entries
+    """
+    legacy_path = Path(legacy_path)
+    if not legacy_path.exists():
+        return 0
+    if conn is None:
+        conn = store._connection()
+
+    with open(legacy_path) as f:
+        entries = json.load(f).get("entries", [])
+
+    with conn:
+        conn.executemany(_INSERT, [_to_row(user_id, entry) for entry in entries])
+    os.replace(legacy_path, legacy_path.with_name(legacy_path.name + ".migrated"))
+
+    logger.info(f"Imported {len(entries)} entries from {legacy_path} into SQLite")
+    return len(entries)
+
+
+def _to_row(user_id: str, entry: dict[str, Any]) -> tuple:
+    extra = {key: value for key, value in entry.items() if key not in _COLUMNS}
+    return (
+        user_id,
+        entry.get("date"),
+        entry.get("time"),
+        entry.get("timestamp"),
+        entry.get("mood"),
+        entry.get("energy"),
+        json.dumps(entry.get("objectives", [])),
+        entry.get("stressors"),
+        entry.get("summary"),
+        json.dumps(extra) if extra else None,
+    )
+
+
+def _from_row(row: tuple) -> dict[str, Any]:
+    date, time, timestamp, mood, energy, objectives, stressors, summary, extra = row
+    entry: dict[str, Any] = {}
+    for key, value in (
+        ("date", date),
+        ("time", time),
+        ("timestamp", timestamp),
+        ("mood", mood),
+        ("energy", energy),
+    ):
+        if value is not None:
+            entry[key] = value
+    entry["objectives"] = json.loads(objectives)
+    if stressors is not None:
+        entry["stressors"] = stressors
+    if summary is not None:
+        entry["summary"] = summary
+    if extra:
+        entry.update(json.loads(extra))
+    return entry
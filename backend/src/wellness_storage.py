@@ -0,0 +1,759 @@
+"""
+Wellness Storage for Wellness Companion
+Per-user append-only JSONL journals for check-in history, with an in-process cache
+and a compact archive for older entries
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from wellness_archive import CheckInArchive
+from wellness_io import atomic_write
+
+logger = logging.getLogger("wellness_storage")
+
+# Shard used when a session cannot be tied to a specific user
+DEFAULT_USER_ID = "default"
+
+# Size of the blocks read when scanning the journal backwards
+_TAIL_BLOCK_SIZE = 8192
+
+
+class WellnessJournal:
+    """Append-only JSONL journal of wellness check-ins
+
+    Every check-in is one line of JSON, so saving a check-in costs the same
+    no matter how long the history is. Writes are flushed to the OS on every
+    append and fsynced in batches (every `fsync_every` appends or
+    `fsync_interval` seconds, whichever comes first). A torn last line left
+    behind by a crash is truncated the next time the journal is opened.
+
+    Recent entries are read by seeking from the end of the file, so
+    `latest()` and `tail()` cost the same no matter how long the history is.
+
+    Appends hold a per-journal thread lock and an exclusive `flock` on the
+    file, so writers in different processes never interleave lines.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        legacy_path: Optional[Union[str, Path]] = None,
+        fsync_every: int = 16,
+        fsync_interval: float = 1.0,
+    ):
+        """
+        Args:
+            path: Location of the JSONL journal file
+            legacy_path: Optional `{"entries": [...]}` log to migrate from
+            fsync_every: Number of appends after which the journal is fsynced
+            fsync_interval: Maximum seconds an append may stay un-fsynced
+        """
+        self.path = Path(path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, entry: dict[str, Any]) -> int:
+        """
+        Append a single check-in entry to the journal
+
+        Args:
+            entry: JSON-serializable check-in data
+
+        Returns:
+            Byte offset at which the entry was written
+        """
+        return self.append_many([entry])[0]
+
+    def append_many(self, entries: list[dict[str, Any]], sync: bool = False) -> list[int]:
+        """
+        Append several check-ins with a single write
+
+        Args:
+            entries: JSON-serializable check-in data, in order
+            sync: Fsync before returning instead of waiting for the next batched fsync
+
+        Returns:
+            Byte offset at which each entry was written
+        """
+        lines = [(json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8") for entry in entries]
+        if not lines:
+            return []
+
+        with self._lock:
+            f = self._lock_for_append()
+            try:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(b"".join(lines))
+                f.flush()
+                self._unsynced += len(lines)
+                offsets = []
+                for line in lines:
+                    offsets.append(offset)
+                    offset += len(line)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+            if (
+                sync
+                or self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+
+        return offsets
+
+    def entries(self) -> list[dict[str, Any]]:
+        """
+        Read every check-in in the journal, oldest first
+
+        Returns:
+            List of entry dictionaries (empty if there is no history)
+        """
+        self._prepare()
+        if not self.path.exists():
+            return []
+
+        entries = []
+        with open(self.path, "rb") as f:
+            for line in f:
+                entry = _decode_line(line)
+                if entry is not None:
+                    entries.append(entry)
+        return entries
+
+    def tail(self, n: int) -> list[dict[str, Any]]:
+        """
+        Read the last `n` check-ins by seeking backwards from the end of the journal
+
+        Args:
+            n: Number of entries to return
+
+        Returns:
+            Up to `n` entry dictionaries, oldest first
+        """
+        self._prepare()
+        if n <= 0 or not self.path.exists():
+            return []
+
+        with open(self.path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            lines = _read_tail_lines(f, size, n)
+
+        entries = [_decode_line(line) for line in lines]
+        return [entry for entry in entries if entry is not None][-n:]
+
+    def latest(self) -> Optional[dict[str, Any]]:
+        """
+        Read the most recent check-in
+
+        Returns:
+            The last entry, or None if there is no history
+        """
+        entries = self.tail(1)
+        return entries[-1] if entries else None
+
+    def compact(self, archive: CheckInArchive, keep_recent: int, min_entries: int = 0) -> int:
+        """
+        Move all but the last `keep_recent` check-ins into an archive
+
+        The archive segment is written first and records which journal bytes
+        it holds; the journal is then atomically replaced by its remaining
+        lines. If the process dies in between, `finish_compaction` drops the
+        already-archived prefix the next time the store opens the journal.
+
+        Args:
+            archive: Archive receiving the older entries
+            keep_recent: Number of recent entries left in the journal
+            min_entries: Only compact when at least this many entries would move
+
+        Returns:
+            Number of entries moved into the archive
+        """
+        with self._lock:
+            if not self.path.exists():
+                return 0
+            f = self._lock_for_append()
+            try:
+                f.seek(0)
+                lines = [line for line in f if line.strip()]
+                moved = len(lines) - max(keep_recent, 0)
+                if moved <= 0 or moved < min_entries:
+                    return 0
+                consumed = sum(len(line) for line in lines[:moved])
+                entries = [_decode_line(line) for line in lines[:moved]]
+                archive.append_segment(
+                    [entry for entry in entries if entry is not None],
+                    source=(os.fstat(f.fileno()).st_ino, consumed),
+                )
+                self._replace_with_suffix(f, consumed)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        logger.info(f"Compacted {moved} entries from {self.path} into {archive.path}")
+        return moved
+
+    def finish_compaction(self, archive: CheckInArchive) -> bool:
+        """
+        Drop a journal prefix that an interrupted compaction already archived
+
+        Returns:
+            True if the journal was trimmed
+        """
+        source = archive.last_source()
+        if source is None:
+            return False
+        ino, consumed = source
+        with self._lock:
+            try:
+                if os.stat(self.path).st_ino != ino:
+                    return False
+            except FileNotFoundError:
+                return False
+            f = self._lock_for_append()
+            try:
+                if os.fstat(f.fileno()).st_ino != ino:
+                    return False
+                self._replace_with_suffix(f, consumed)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        logger.warning(f"Finished interrupted compaction of {self.path}")
+        return True
+
+    def flush(self) -> None:
+        """Force any batched appends to disk"""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._sync()
+
+    def close(self) -> None:
+        """Flush and close the journal file"""
+        with self._lock:
+            if self._file is not None:
+                if self._unsynced:
+                    self._sync()
+                self._file.close()
+                self._file = None
+
+    def recover(self) -> int:
+        """
+        Truncate a torn (unterminated) last line left behind by a crash
+
+        Returns:
+            Number of bytes dropped from the end of the journal
+        """
+        if not self.path.exists():
+            return 0
+
+        with open(self.path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return 0
+
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return 0
+
+            end = _find_last_newline(f, size)
+            keep = end + 1 if end >= 0 else 0
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+
+        dropped = size - keep
+        logger.warning(f"Recovered wellness journal {self.path}: dropped {dropped} torn bytes")
+        return dropped
+
+    def _prepare(self) -> None:
+        """Run the one-time legacy migration if the journal does not exist yet"""
+        if self.legacy_path is not None and not self.path.exists():
+            migrate_legacy_log(self.legacy_path, self)
+
+    def _open_for_append(self):
+        """Return the append handle, reopening it if the file was replaced or removed"""
+        if self._file is not None:
+            try:
+                current = os.stat(self.path)
+                opened = os.fstat(self._file.fileno())
+                if (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                    return self._file
+            except FileNotFoundError:
+                pass
+            self._file.close()
+            self._file = None
+
+        self._prepare()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.recover()
+        # Kept open across appends; readable too, so compaction can scan the file it holds the lock on
+        self._file = open(self.path, "a+b")  # noqa: SIM115
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        return self._file
+
+    def _lock_for_append(self):
+        """Return the append handle holding an exclusive flock on the current journal file"""
+        while True:
+            f = self._open_for_append()
+            if fcntl is None:
+                return f
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                # A compaction may have replaced the file while we waited for the lock
+                if os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+            self._file = None
+
+    def _replace_with_suffix(self, f, offset: int) -> None:
+        """Atomically replace the journal with its contents from `offset` on"""
+        f.seek(offset)
+        atomic_write(self.path, f.read())
+        # The next append sees the new inode and reopens; the suffix is already fsynced
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+
+class HistoryCache:
+    """Per-process write-through cache of recent check-ins
+
+    Keeps the last `window` entries of up to `max_users` journals in memory,
+    evicting the least recently used journal when full. Cached history is
+    validated against the journal's inode, mtime and size on every read, so a
+    write from another process invalidates it. Appends made through the cache
+    update the cached entries in place.
+    """
+
+    def __init__(self, max_users: int = 128, window: int = 50):
+        """
+        Args:
+            max_users: Maximum number of journals kept in memory
+            window: Number of recent entries cached per journal
+        """
+        self.max_users = max_users
+        self.window = window
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, _CachedHistory] = OrderedDict()
+
+    def tail(self, journal: WellnessJournal, n: int) -> list[dict[str, Any]]:
+        """
+        Return the last `n` check-ins of a journal, serving them from memory when possible
+
+        Args:
+            journal: Journal to read
+            n: Number of entries to return
+
+        Returns:
+            Up to `n` entry dictionaries, oldest first
+        """
+        if n <= 0:
+            return []
+
+        key = str(journal.path)
+        with self._lock:
+            cached = self._lookup(key, journal)
+            if cached is not None and n <= self.window:
+                self.hits += 1
+                return cached.entries[-n:]
+            self.misses += 1
+
+        if n > self.window:
+            return journal.tail(n)
+
+        stamp = _stamp(journal.path)
+        entries = journal.tail(self.window)
+        with self._lock:
+            self._store(key, _CachedHistory(entries, stamp))
+        return entries[-n:]
+
+    def latest(self, journal: WellnessJournal) -> Optional[dict[str, Any]]:
+        """
+        Return the most recent check-in of a journal
+
+        Args:
+            journal: Journal to read
+
+        Returns:
+            The last entry, or None if there is no history
+        """
+        entries = self.tail(journal, 1)
+        return entries[-1] if entries else None
+
+    def append(self, journal: WellnessJournal, entry: dict[str, Any]) -> None:
+        """
+        Append a check-in to a journal and keep the cached history coherent
+
+        Args:
+            journal: Journal to write
+            entry: JSON-serializable check-in data
+        """
+        self.append_many(journal, [entry])
+
+    def append_many(
+        self, journal: WellnessJournal, entries: list[dict[str, Any]], sync: bool = False
+    ) -> None:
+        """
+        Append several check-ins to a journal in one write and keep the cached history coherent
+
+        Args:
+            journal: Journal to write
+            entries: JSON-serializable check-in data, in order
+            sync: Fsync the journal before returning
+        """
+        if not entries:
+            return
+        key = str(journal.path)
+        before = _stamp(journal.path)
+        offsets = journal.append_many(entries, sync=sync)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                return
+            # Only extend the cached history if nothing else wrote in between
+            if cached.stamp == before and before is not None and offsets[0] == before[2]:
+                cached.entries.extend(entries)
+                del cached.entries[: -self.window]
+                cached.stamp = _stamp(journal.path)
+            else:
+                del self._cache[key]
+
+    def invalidate(self, journal: Optional[WellnessJournal] = None) -> None:
+        """Drop the cached history of one journal, or of every journal"""
+        with self._lock:
+            if journal is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(str(journal.path), None)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "users": len(self._cache),
+            }
+
+    def _lookup(self, key: str, journal: WellnessJournal) -> Optional["_CachedHistory"]:
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        if cached.stamp != _stamp(journal.path):
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return cached
+
+    def _store(self, key: str, cached: "_CachedHistory") -> None:
+        self._cache[key] = cached
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_users:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+
+class WellnessStore:
+    """Check-in storage partitioned into one journal per user
+
+    Each user gets their own shard under `root`, so saves for different
+    users never contend on the same file or lock and can run fully in
+    parallel. Open journals are kept in an LRU of at most `max_open` shards
+    to bound file handles; reads go through a shared HistoryCache.
+
+    `compact()` rolls a user's older entries into a columnar CheckInArchive
+    (`<shard>.archive`) and leaves only the recent ones in the journal. Reads
+    combine the two, so callers see one continuous history.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        legacy_path: Optional[Union[str, Path]] = None,
+        cache: Optional[HistoryCache] = None,
+        max_open: int = 256,
+    ):
+        """
+        Args:
+            root: Directory holding the per-user journals
+            legacy_path: Optional single-file log migrated into the default user's shard
+            cache: History cache to use (a new one is created if omitted)
+            max_open: Maximum number of journals kept open at once
+        """
+        self.root = Path(root)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.cache = cache if cache is not None else HistoryCache()
+        self.max_open = max_open
+
+        self._lock = threading.Lock()
+        self._journals: OrderedDict[str, WellnessJournal] = OrderedDict()
+
+    def journal(self, user_id: str) -> WellnessJournal:
+        """Return the journal shard for a user"""
+        name = shard_name(user_id)
+        with self._lock:
+            journal = self._journals.get(name)
+            if journal is None:
+                legacy = self.legacy_path if name == DEFAULT_USER_ID else None
+                journal = WellnessJournal(self.root / f"{name}.jsonl", legacy_path=legacy)
+                archive = self.archive(user_id)
+                if archive.exists():
+                    journal.finish_compaction(archive)
+                self._journals[name] = journal
+                while len(self._journals) > self.max_open:
+                    _, evicted = self._journals.popitem(last=False)
+                    evicted.close()
+            self._journals.move_to_end(name)
+            return journal
+
+    def append(self, user_id: str, entry: dict[str, Any]) -> None:
+        """Append a check-in to a user's history"""
+        self.cache.append(self.journal(user_id), entry)
+
+    def append_many(self, items: list[tuple[str, dict[str, Any]]]) -> None:
+        """
+        Durably append a batch of check-ins for any number of users
+
+        Each user's entries are written to their journal in one write followed
+        by one fsync, so a batch costs one fsync per user rather than per entry.
+
+        Args:
+            items: (user_id, entry) pairs, in the order they were saved
+        """
+        by_user: dict[str, list[dict[str, Any]]] = {}
+        for user_id, entry in items:
+            by_user.setdefault(user_id, []).append(entry)
+        for user_id, entries in by_user.items():
+            self.cache.append_many(self.journal(user_id), entries, sync=True)
+
+    def archive(self, user_id: str) -> CheckInArchive:
+        """Return the archive holding a user's compacted history"""
+        return CheckInArchive(self.root / f"{shard_name(user_id)}.archive")
+
+    def latest(self, user_id: str) -> Optional[dict[str, Any]]:
+        """Return a user's most recent check-in, or None"""
+        entries = self.tail(user_id, 1)
+        return entries[-1] if entries else None
+
+    def tail(self, user_id: str, n: int) -> list[dict[str, Any]]:
+        """Return a user's last `n` check-ins, oldest first"""
+        journal = self.journal(user_id)
+        archive = self.archive(user_id)
+
+        def read() -> list[dict[str, Any]]:
+            recent = self.cache.tail(journal, n)
+            if len(recent) >= n or not archive.exists():
+                return recent
+            return archive.tail(n - len(recent)) + recent
+
+        return _read_consistent(archive, read)
+
+    def entries(self, user_id: str) -> list[dict[str, Any]]:
+        """Return a user's full check-in history (archived and recent), oldest first"""
+        journal = self.journal(user_id)
+        archive = self.archive(user_id)
+        return _read_consistent(archive, lambda: archive.entries() + journal.entries())
+
+    def get_digest(self, user_id: str) -> Optional[dict[str, Any]]:
+        """Return the memory digest saved for a user, or None"""
+        try:
+            with open(self._digest_path(user_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_digest(self, user_id: str, digest: dict[str, Any]) -> None:
+        """Save a user's memory digest next to their journal; it can be rebuilt, so it is not fsynced"""
+        atomic_write(self._digest_path(user_id), json.dumps(digest), fsync=False)
+
+    def compact(self, user_id: str, keep_recent: int = 50, min_entries: int = 50) -> int:
+        """
+        Roll a user's older check-ins into their compact archive
+
+        Args:
+            user_id: User whose history to compact
+            keep_recent: Number of recent entries kept in the journal
+            min_entries: Only compact once at least this many entries would move
+
+        Returns:
+            Number of entries archived
+        """
+        journal = self.journal(user_id)
+        moved = journal.compact(self.archive(user_id), keep_recent, min_entries)
+        if moved:
+            self.cache.invalidate(journal)
+        return moved
+
+    def _digest_path(self, user_id: str) -> Path:
+        return self.root / f"{shard_name(user_id)}.digest.json"
+
+    def stats(self) -> dict[str, Any]:
+        """Return history cache statistics"""
+        return {"backend": "jsonl", **self.cache.stats()}
+
+    def flush(self) -> None:
+        """Force batched appends of every open journal to disk"""
+        with self._lock:
+            journals = list(self._journals.values())
+        for journal in journals:
+            journal.flush()
+
+    def close(self) -> None:
+        """Flush and close every open journal"""
+        with self._lock:
+            journals = list(self._journals.values())
+            self._journals.clear()
+        for journal in journals:
+            journal.close()
+
+
+class _CachedHistory:
+    __slots__ = ("entries", "stamp")
+
+    def __init__(self, entries: list[dict[str, Any]], stamp: Optional[tuple[int, int, int]]):
+        self.entries = entries
+        self.stamp = stamp
+
+
+def _read_consistent(archive: CheckInArchive, read: Callable[[], Any], attempts: int = 3) -> Any:
+    """Run a read spanning archive and journal again if a compaction changed the archive meanwhile"""
+    for _ in range(attempts - 1):
+        before = archive.stamp()
+        result = read()
+        if archive.stamp() == before:
+            return result
+    return read()
+
+
+def migrate_legacy_log(legacy_path: Union[str, Path], journal: WellnessJournal) -> int:
+    """
+    Convert a legacy `{"entries": [...]}` wellness log into a JSONL journal
+
+    The journal is written to a temporary file and moved into place, and the
+    legacy file is renamed with a `.migrated` suffix so the migration only
+    ever runs once.
+
+    Args:
+        legacy_path: Path to the legacy JSON log
+        journal: Journal to migrate into (must not exist yet)
+
+    Returns:
+        Number of migrated entries
+    """
+    legacy_path = Path(legacy_path)
+    if not legacy_path.exists() or journal.path.exists():
+        return 0
+
+    with open(legacy_path) as f:
+        data = json.load(f)
+    entries = data.get("entries", [])
+
+    atomic_write(
+        journal.path,
+        "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries),
+    )
+    os.replace(legacy_path, legacy_path.with_name(legacy_path.name + ".migrated"))
+
+    logger.info(f"Migrated {len(entries)} entries from {legacy_path} to {journal.path}")
+    return len(entries)
+
+
+def shard_name(user_id: str) -> str:
+    """
+    Map a participant or room identity to a safe, stable shard file name
+
+    Identities made of letters, digits, `-`, `_` and `.` are used as-is;
+    anything else is hashed so unrelated users can never collide.
+    """
+    if not user_id:
+        return DEFAULT_USER_ID
+    if re.fullmatch(r"[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}", user_id):
+        return user_id
+    prefix = re.sub(r"[^A-Za-z0-9_-]", "_", user_id)[:32]
+    digest = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:16]
+    return f"{prefix}-{digest}"
+
+
+def _stamp(path: Path) -> Optional[tuple[int, int, int]]:
+    """Identify the current version of a file by (inode, mtime, size)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _decode_line(line: bytes) -> Optional[dict[str, Any]]:
+    """Decode one journal line, returning None for blank or torn lines"""
+    if not line.endswith(b"\n") or not line.strip():
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        logger.warning("Skipping unreadable line in wellness journal")
+        return None
+
+
+def _read_tail_lines(f, size: int, n: int) -> list[bytes]:
+    """Return the last `n` complete lines before `size`, reading backwards in blocks"""
+    pos = size
+    buf = b""
+    while pos > 0 and buf.count(b"\n") <= n:
+        start = max(0, pos - _TAIL_BLOCK_SIZE)
+        f.seek(start)
+        buf = f.read(pos - start) + buf
+        pos = start
+
+    lines = buf.splitlines(keepends=True)
+    if pos > 0:
+        # The first line was only partially read
+        lines = lines[1:]
+    return lines[-n - 1:]
+
+
+def _find_last_newline(f, size: int) -> int:
+    """Return the offset of the last newline before `size`, or -1 if there is none"""
+    pos = size
+    while pos > 0:
+        start = max(0, pos - _TAIL_BLOCK_SIZE)
+        f.seek(start)
+        block = f.read(pos - start)
+        idx = block.rfind(b"\n")
+        if idx >= 0:
+            return start + idx
+        pos = start
+    return -1
@@ -0,0 +1,320 @@
+"""
+Turn Latency Tracing for Wellness Companion
+Links the per-stage pipeline metrics of each conversational turn into one span
+"""
+
+import json
+import logging
+import math
+import os
+import queue
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import prometheus_client
+from livekit.agents import metrics
+from livekit.agents.voice.events import (
+    AgentStateChangedEvent,
+    FunctionToolsExecutedEvent,
+    MetricsCollectedEvent,
+    UserInputTranscribedEvent,
+    UserStateChangedEvent,
+)
+
+logger = logging.getLogger("wellness_tracing")
+
+# Percentiles reported for every stage
+PERCENTILES = (50, 95, 99)
+
+# Buckets (seconds) for the exported stage histograms
+_LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0]
+
+TURN_STAGE_SECONDS = prometheus_client.Histogram(
+    "wellness_turn_stage_seconds",
+    "Latency of each pipeline stage within a conversational turn",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+LLM_PROMPT_TOKENS = prometheus_client.Counter(
+    "wellness_llm_prompt_tokens",
+    "Prompt tokens sent to the LLM, split by whether the provider served them from its prompt cache",
+    ["prefix", "cached"],
+)
+
+
+class RollingPercentiles:
+    """Percentiles over the most recent `window` observations of one stage"""
+
+    def __init__(self, window: int = 1000):
+        self._values: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self._values.append(value)
+        self.count += 1
+
+    def percentiles(self) -> dict[str, float]:
+        """Return {"p50": ..., "p95": ..., "p99": ...} using nearest-rank"""
+        values = sorted(self._values)
+        if not values:
+            return {}
+        return {
+            f"p{p}": values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+            for p in PERCENTILES
+        }
+
+
+@dataclass
+class TurnSpan:
+    """Latency breakdown of one user turn and the agent's reply to it
+
+    `started_at` is when the user stopped speaking; every stage is a duration
+    in seconds. `time_to_first_audio` is the end-to-end latency the user
+    hears: from the end of their speech until the agent starts speaking.
+    """
+
+    started_at: float
+    speech_id: Optional[str] = None
+    transcript: Optional[str] = None
+    stages: dict[str, float] = field(default_factory=dict)
+
+    def record(self, stage: str, seconds: float) -> None:
+        # Tool follow-ups produce more LLM/TTS metrics; the first ones are what delays the reply
+        if seconds is not None and seconds >= 0:
+            self.stages.setdefault(stage, seconds)
+
+
+class LatencyTracer:
+    """Process-wide aggregation of turn spans
+
+    Finished spans update rolling p50/p95/p99 per stage and the
+    `wellness_turn_stage_seconds` Prometheus histogram, and are appended as
+    JSON lines to `export_path` when one is configured. Spans are written by
+    a background thread so recording a turn never touches the disk on the
+    event loop; `flush()` waits for it to catch up. Prompt and cached
+    prompt tokens of every LLM request are counted per static prompt prefix
+    (`wellness_llm_prompt_tokens_total`) to track provider cache hit rates.
+    """
+
+    def __init__(self, export_path: Optional[Union[str, Path]] = None, window: int = 1000):
+        """
+        Args:
+            export_path: Optional JSONL file that receives one line per finished turn
+            window: Number of recent observations kept per stage for percentiles
+        """
+        self.export_path = Path(export_path) if export_path else None
+        self.window = window
+        self.turns = 0
+
+        self._stages: dict[str, RollingPercentiles] = {}
+        self._prompt_usage: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+        # Lines waiting for the writer thread, plus Events queued by flush()
+        self._export_queue: queue.SimpleQueue[Union[str, threading.Event]] = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+    def attach(self, session, prompt_fingerprint: Optional[str] = None) -> "TurnTracker":
+        """
+        Start tracing the turns of an AgentSession
+
+        Args:
+            session: Session whose events are traced
+            prompt_fingerprint: Identifier of the session's static prompt prefix, used to label
+                prompt cache metrics
+        """
+        return TurnTracker(self, session, prompt_fingerprint)
+
+    def record_prompt_usage(self, prefix: str, prompt_tokens: int, cached_tokens: int) -> None:
+        """Count the prompt tokens of one LLM request and how many were served from cache"""
+        cached_tokens = min(max(cached_tokens, 0), prompt_tokens)
+        with self._lock:
+            usage = self._prompt_usage.setdefault(
+                prefix, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+            )
+            usage["requests"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["cached_tokens"] += cached_tokens
+
+        LLM_PROMPT_TOKENS.labels(prefix=prefix, cached="true").inc(cached_tokens)
+        LLM_PROMPT_TOKENS.labels(prefix=prefix, cached="false").inc(prompt_tokens - cached_tokens)
+
+    def prompt_cache_summary(self) -> dict[str, dict[str, Any]]:
+        """Return request and token counts plus the cached token ratio per prompt prefix"""
+        with self._lock:
+            return {
+                prefix: {
+                    **usage,
+                    "cache_hit_rate": (
+                        round(usage["cached_tokens"] / usage["prompt_tokens"], 3)
+                        if usage["prompt_tokens"]
+                        else None
+                    ),
+                }
+                for prefix, usage in sorted(self._prompt_usage.items())
+            }
+
+    def record(self, span: TurnSpan) -> None:
+        """Aggregate and export a finished turn span"""
+        if not span.stages:
+            return
+
+        with self._lock:
+            self.turns += 1
+            for stage, seconds in span.stages.items():
+                if stage not in self._stages:
+                    self._stages[stage] = RollingPercentiles(self.window)
+                self._stages[stage].observe(seconds)
+
+        for stage, seconds in span.stages.items():
+            TURN_STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+        if self.export_path is not None:
+            self._export(span)
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """Return count and rolling percentiles for every stage seen so far"""
+        with self._lock:
+            return {
+                stage: {"count": rolling.count, **rolling.percentiles()}
+                for stage, rolling in sorted(self._stages.items())
+            }
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait for every span recorded so far to be written to `export_path`
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the export caught up within `timeout`
+        """
+        if self._writer is None:
+            return True
+        written = threading.Event()
+        self._export_queue.put(written)
+        return written.wait(timeout)
+
+    def _export(self, span: TurnSpan) -> None:
+        self._export_queue.put(json.dumps(asdict(span)) + "\n")
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_spans, name="wellness_trace_export", daemon=True)
+                self._writer.start()
+
+    def _write_spans(self) -> None:
+        while True:
+            # Everything queued while the last write ran goes out in one write
+            items = [self._export_queue.get()]
+            while True:
+                try:
+                    items.append(self._export_queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [item for item in items if isinstance(item, str)]
+            if lines:
+                try:
+                    self.export_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.export_path, "a") as f:
+                        f.write("".join(lines))
+                except OSError as e:
+                    logger.warning(f"Could not export {len(lines)} turn spans to {self.export_path}: {e}")
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+
+class TurnTracker:
+    """Builds one TurnSpan per user turn from an AgentSession's events
+
+    A span opens when the user stops speaking and collects the STT, end of
+    utterance, LLM, tool and TTS timings reported for that turn. It is
+    closed when the next turn starts or when `close()` is called, because
+    the LLM and TTS metrics only arrive once their streams have finished.
+    """
+
+    def __init__(self, tracer: LatencyTracer, session, prompt_fingerprint: Optional[str] = None):
+        self.tracer = tracer
+        self.prompt_fingerprint = prompt_fingerprint or "unknown"
+        self._span: Optional[TurnSpan] = None
+        self._replied = False
+
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("user_input_transcribed", self._on_user_input_transcribed)
+        session.on("metrics_collected", self._on_metrics_collected)
+        session.on("function_tools_executed", self._on_function_tools_executed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+
+    def close(self) -> None:
+        """Finish the turn in progress"""
+        self._finish()
+
+    def _on_user_state_changed(self, ev: UserStateChangedEvent) -> None:
+        if ev.old_state == "speaking" and ev.new_state != "speaking":
+            # Speech that resumes before the agent replied is still the same turn
+            if self._span is not None and not self._replied:
+                self._span.started_at = ev.created_at
+                return
+            self._finish()
+            self._span = TurnSpan(started_at=ev.created_at)
+            self._replied = False
+
+    def _on_user_input_transcribed(self, ev: UserInputTranscribedEvent) -> None:
+        if not ev.is_final or self._span is None or self._replied:
+            return
+        self._span.transcript = ev.transcript
+        self._span.record("stt_final", ev.created_at - self._span.started_at)
+
+    def _on_metrics_collected(self, ev: MetricsCollectedEvent) -> None:
+        m = ev.metrics
+        # Every LLM request counts towards prompt cache usage, inside a user turn or not
+        if isinstance(m, metrics.LLMMetrics):
+            self.tracer.record_prompt_usage(
+                self.prompt_fingerprint, m.prompt_tokens, m.prompt_cached_tokens
+            )
+
+        span = self._span
+        if span is None:
+            return
+
+        if isinstance(m, metrics.EOUMetrics):
+            span.speech_id = span.speech_id or m.speech_id
+            span.record("end_of_utterance_delay", m.end_of_utterance_delay)
+            span.record("transcription_delay", m.transcription_delay)
+        elif isinstance(m, metrics.LLMMetrics):
+            span.record("llm_ttft", m.ttft)
+        elif isinstance(m, metrics.TTSMetrics):
+            span.record("tts_ttfb", m.ttfb)
+
+    def _on_function_tools_executed(self, ev: FunctionToolsExecutedEvent) -> None:
+        if self._span is None:
+            return
+        for call, output in zip(ev.function_calls, ev.function_call_outputs):
+            if output is not None:
+                self._span.record(f"tool.{call.name}", output.created_at - call.created_at)
+
+    def _on_agent_state_changed(self, ev: AgentStateChangedEvent) -> None:
+        if ev.new_state != "speaking" or self._span is None or self._replied:
+            return
+        self._replied = True
+        self._span.record("time_to_first_audio", ev.created_at - self._span.started_at)
+
+    def _finish(self) -> None:
+        span, self._span = self._span, None
+        if span is not None:
+            self.tracer.record(span)
+
+
+_tracer_instance = None
+
+
+def get_latency_tracer() -> LatencyTracer:
+    """Get singleton latency tracer instance"""
+    global _tracer_instance
+    if _tracer_instance is None:
+        _tracer_instance = LatencyTracer(os.getenv("WELLNESS_TRACE_FILE") or None)
+    return _tracer_instance
@@ -0,0 +1,254 @@
+"""
+TTS Audio Cache for Wellness Companion
+Content-addressed cache of synthesized audio for lines the agent speaks word for word
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from livekit import rtc
+
+from wellness_io import atomic_write
+from wellness_providers import TTS_SAMPLE_RATE, TTS_STYLE, TTS_VOICE
+
+logger = logging.getLogger("wellness_tts_cache")
+
+# Magic, sample rate and channel count ahead of the raw 16-bit PCM in each cache file
+_HEADER = struct.Struct("<4sII")
+_MAGIC = b"WTTS"
+# Length of the frames cached audio is played back in
+FRAME_MS = 20
+
+
+@dataclass(frozen=True)
+class CachedAudio:
+    """Synthesized speech as 16-bit PCM"""
+
+    pcm: bytes
+    sample_rate: int
+    num_channels: int
+
+    def frames(self, frame_ms: int = FRAME_MS) -> Iterator[rtc.AudioFrame]:
+        """Split the audio into playback frames"""
+        samples = self.sample_rate * frame_ms // 1000
+        step = samples * self.num_channels * 2
+        for start in range(0, len(self.pcm), step):
+            chunk = self.pcm[start:start + step]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (2 * self.num_channels),
+            )
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_MAGIC, self.sample_rate, self.num_channels) + self.pcm
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedAudio":
+        magic, sample_rate, num_channels = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("not a cached audio file")
+        return cls(data[_HEADER.size:], sample_rate, num_channels)
+
+
+class TTSAudioCache:
+    """Two-tier cache of synthesized phrases for one TTS voice
+
+    Entries are keyed by a hash of the normalized text, voice, style,
+    sample rate and channel count, so a change to any of them misses
+    instead of playing the wrong audio. Recently used entries stay in
+    memory up to `memory_bytes`; every entry is also written to
+    `directory` (when set) so other worker processes and restarts start
+    warm. A hit plays back without touching the TTS provider, with the
+    first frame available immediately.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        voice: str = TTS_VOICE,
+        style: str = TTS_STYLE,
+        memory_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.directory = Path(directory) if directory else None
+        self.voice = voice
+        self.style = style
+        self.memory_bytes = memory_bytes
+        self._memory: OrderedDict[str, CachedAudio] = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._warming: Optional[asyncio.Future] = None
+
+    def key(self, text: str, sample_rate: int, num_channels: int) -> str:
+        """Content address of a phrase spoken with this cache's voice"""
+        normalized = " ".join(text.split())
+        material = json.dumps([normalized, self.voice, self.style, sample_rate, num_channels])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def lookup(self, text: str, tts) -> Optional[CachedAudio]:
+        """Return a phrase's cached audio from memory or disk, or None"""
+        key = self.key(text, tts.sample_rate, tts.num_channels)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return audio
+
+        audio = await asyncio.to_thread(self._read, key)
+        with self._lock:
+            if audio is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, audio)
+        return audio
+
+    async def store(self, text: str, tts, audio: CachedAudio) -> None:
+        """Add a phrase's audio to both tiers"""
+        key = self.key(text, tts.sample_rate, tts.num_channels)
+        with self._lock:
+            self._remember(key, audio)
+        if self.directory is not None:
+            try:
+                await asyncio.to_thread(atomic_write, self._path(key), audio.to_bytes(), False)
+            except OSError as e:
+                logger.warning(f"Could not write TTS cache entry: {e}")
+
+    async def audio(self, text: str, tts) -> AsyncIterator[rtc.AudioFrame]:
+        """
+        Stream a phrase's audio, synthesizing and caching it on a miss
+
+        Args:
+            text: Exact text to speak
+            tts: TTS provider used on a miss; its sample rate is part of the key
+
+        Yields:
+            Audio frames, suitable for `AgentSession.say(text, audio=...)`
+        """
+        cached = await self.lookup(text, tts)
+        if cached is not None:
+            for frame in cached.frames():
+                yield frame
+            return
+
+        chunks = []
+        sample_rate = num_channels = None
+        async with tts.synthesize(text) as stream:
+            async for event in stream:
+                frame = event.frame
+                sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                chunks.append(bytes(frame.data))
+                yield frame
+        # Only complete syntheses are cached; an interrupted one never gets here
+        if chunks:
+            await self.store(text, tts, CachedAudio(b"".join(chunks), sample_rate, num_channels))
+
+    async def warm(self, phrases: Iterable[str], tts) -> int:
+        """Load phrases into memory, synthesizing any that are not cached yet; returns how many were synthesized"""
+        synthesized = 0
+        for text in phrases:
+            if await self.lookup(text, tts) is None:
+                async for _ in self.audio(text, tts):
+                    pass
+                synthesized += 1
+        return synthesized
+
+    def prewarm(self, phrases: Iterable[str], sample_rate: int = TTS_SAMPLE_RATE, num_channels: int = 1) -> int:
+        """
+        Load phrases cached on disk into memory from a worker's prewarm hook
+
+        Only reads local files, so it stays well inside the process's
+        initialization budget; phrases that are not on disk yet are
+        synthesized by `warm_in_background()` once a job is running.
+
+        Args:
+            phrases: Lines the agent speaks word for word
+            sample_rate: Sample rate the TTS provider synthesizes at
+            num_channels: Channel count of the TTS provider
+
+        Returns:
+            Number of phrases loaded
+        """
+        loaded = 0
+        for text in phrases:
+            key = self.key(text, sample_rate, num_channels)
+            audio = self._read(key)
+            if audio is not None:
+                with self._lock:
+                    self._remember(key, audio)
+                loaded += 1
+        logger.info(f"TTS cache prewarmed with {loaded} phrase(s) from disk")
+        return loaded
+
+    def warm_in_background(self, phrases: Iterable[str], tts) -> None:
+        """Synthesize phrases missing from the cache on the running loop, once per process"""
+        if self._warming is not None:
+            return
+
+        async def run() -> None:
+            try:
+                synthesized = await self.warm(phrases, tts)
+                logger.info(f"TTS cache ready, {synthesized} phrase(s) synthesized")
+            except Exception as e:
+                # Missing phrases are synthesized on first use instead
+                logger.warning(f"Could not warm TTS cache: {e}")
+
+        self._warming = asyncio.ensure_future(run())
+
+    def stats(self) -> dict[str, int]:
+        """Hit and miss counts plus the memory tier's size"""
+        with self._lock:
+            return {**self._stats, "entries": len(self._memory), "memory_bytes": self._memory_used}
+
+    def _remember(self, key: str, audio: CachedAudio) -> None:
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous.pcm)
+        if len(audio.pcm) > self.memory_bytes:
+            return
+        self._memory[key] = audio
+        self._memory_used += len(audio.pcm)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted.pcm)
+
+    def _read(self, key: str) -> Optional[CachedAudio]:
+        if self.directory is None:
+            return None
+        try:
+            return CachedAudio.from_bytes(self._path(key).read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable TTS cache entry {key}: {e}")
+            return None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pcm"
+
+
+_tts_cache_instance = None
+
+
+def get_tts_cache() -> TTSAudioCache:
+    """Get singleton TTS audio cache"""
+    global _tts_cache_instance
+    if _tts_cache_instance is None:
+        _tts_cache_instance = TTSAudioCache(
+            directory=os.getenv("WELLNESS_TTS_CACHE_DIR", "tts_cache") or None,
+            memory_bytes=int(os.getenv("WELLNESS_TTS_CACHE_MB", "32")) * 1024 * 1024,
+        )
+    return _tts_cache_instance
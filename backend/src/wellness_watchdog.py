@@ -0,0 +1,196 @@
+"""
+Event Loop Watchdog for Wellness Companion
+Measures event-loop lag and attributes blocking calls to the code that made them
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import prometheus_client
+
+from wellness_tracing import RollingPercentiles
+
+logger = logging.getLogger("wellness_watchdog")
+
+# Frames under this directory are preferred when attributing a block
+SRC_DIR = Path(__file__).resolve().parent
+
+# Number of innermost frames kept from each stack sample
+_STACK_DEPTH = 8
+
+EVENT_LOOP_LAG_SECONDS = prometheus_client.Histogram(
+    "wellness_event_loop_lag_seconds",
+    "How late the event loop ran the watchdog heartbeat",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+)
+
+EVENT_LOOP_BLOCKS = prometheus_client.Counter(
+    "wellness_event_loop_blocks",
+    "Callbacks that blocked the event loop for longer than the threshold",
+    ["where"],
+)
+
+
+@dataclass
+class BlockEvent:
+    """One stretch of time during which the event loop did not get to run"""
+
+    duration: float
+    where: str
+    stack: list[str]
+
+
+class LoopWatchdog:
+    """Continuously measures event-loop lag and catches blocking callbacks
+
+    A heartbeat task sleeps for `interval` on the loop and records how late
+    it wakes up. A monitor thread watches the heartbeat; once it is overdue
+    by `block_threshold` the thread samples the loop thread's stack, which
+    shows the callback that is holding the loop. When the loop recovers the
+    block is logged with that stack and counted per blocking function.
+    """
+
+    def __init__(
+        self,
+        block_threshold: float = 0.1,
+        interval: float = 0.05,
+        project_root: Union[str, Path] = SRC_DIR,
+        max_recent: int = 50,
+    ):
+        """
+        Args:
+            block_threshold: Lag in seconds that counts as a blocked loop
+            interval: Seconds between heartbeats
+            project_root: Directory whose frames are blamed first for a block
+            max_recent: Number of recent block events kept for inspection
+        """
+        self.block_threshold = block_threshold
+        self.interval = interval
+        self.project_root = str(Path(project_root).resolve())
+
+        self.lag = RollingPercentiles(window=10_000)
+        self.max_lag = 0.0
+        self.blocks = 0
+        self.blocked_seconds = 0.0
+        self.recent_blocks: deque[BlockEvent] = deque(maxlen=max_recent)
+        self._blockers: Counter = Counter()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._deadline = 0.0
+        self._sample: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        """Start watching the running event loop (idempotent)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._deadline = time.monotonic() + self.interval
+        self._stopping.clear()
+        self._task = loop.create_task(self._heartbeat(), name="loop_watchdog")
+        self._thread = threading.Thread(target=self._monitor, name="loop_watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and the monitor thread"""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        """Return lag percentiles and the functions that blocked the loop most"""
+        return {
+            "lag_s": {**self.lag.percentiles(), "max": round(self.max_lag, 4)},
+            "blocks": self.blocks,
+            "blocked_s": round(self.blocked_seconds, 3),
+            "top_blockers": self._blockers.most_common(5),
+        }
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._deadline = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self._beat(max(0.0, time.monotonic() - self._deadline))
+
+    def _beat(self, lag: float) -> None:
+        self.lag.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        if lag < self.block_threshold:
+            return
+
+        sample, self._sample = self._sample, None
+        summary = sample[1] if sample is not None and sample[0] == self._deadline else None
+        stack = traceback.format_list(summary) if summary else []
+        where = self._attribute(summary)
+
+        self.blocks += 1
+        self.blocked_seconds += lag
+        self._blockers[where] += 1
+        self.recent_blocks.append(BlockEvent(duration=lag, where=where, stack=stack))
+        EVENT_LOOP_BLOCKS.labels(where=where).inc()
+
+        logger.warning(
+            f"Event loop blocked for {lag:.3f}s in {where}"
+            + ("\n" + "".join(stack) if stack else "")
+        )
+
+    def _monitor(self) -> None:
+        # Check several times per threshold so the sample lands inside the block
+        poll = min(self.interval, self.block_threshold) / 2
+        while not self._stopping.wait(poll):
+            deadline = self._deadline
+            if time.monotonic() - deadline < self.block_threshold:
+                continue
+            if self._sample is not None and self._sample[0] == deadline:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._sample = (deadline, traceback.extract_stack(frame)[-_STACK_DEPTH:])
+
+    def _attribute(self, summary: Optional[traceback.StackSummary]) -> str:
+        """Name the innermost project frame of a sampled stack"""
+        if not summary:
+            return "unknown"
+        frame = next(
+            (f for f in reversed(summary) if os.path.abspath(f.filename).startswith(self.project_root)),
+            summary[-1],
+        )
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+
+
+_watchdog_instance = None
+
+
+def get_loop_watchdog() -> LoopWatchdog:
+    """Get singleton event loop watchdog instance"""
+    global _watchdog_instance
+    if _watchdog_instance is None:
+        _watchdog_instance = LoopWatchdog(
+            block_threshold=float(os.getenv("WELLNESS_LOOP_BLOCK_THRESHOLD", "0.1"))
+        )
+    return _watchdog_instance
@@ -2,11 +2,13 @@
 Tests for Notion integration with Wellness Companion
 """
 
+import asyncio
 import pytest
 import os
 from pathlib import Path
 from unittest.mock import Mock, patch, AsyncMock
-from wellness_notion import NotionWellnessClient, get_notion_client
+from wellness_notion import NotionWellnessClient, get_notion_client, validate_schema
+from wellness_notion_sync import NotionSyncQueue
 
 
 class TestNotionClient:
@@ -26,7 +28,7 @@ class TestNotionClient:
             'NOTION_DATABASE_ID': 'test_database_id',
             'ENABLE_NOTION_MCP': 'true'
         }):
-            with patch('wellness_notion.Client') as mock_client:
+            with patch('wellness_notion.AsyncClient'):
                 client = NotionWellnessClient()
                 assert client.api_key == 'test_secret_key'
                 assert client.database_id == 'test_database_id'
@@ -70,9 +72,9 @@ class TestNotionClient:
             'NOTION_DATABASE_ID': 'test_database_id',
             'ENABLE_NOTION_MCP': 'true'
         }):
-            with patch('wellness_notion.Client') as mock_client_class:
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
                 mock_client = Mock()
-                mock_client.pages.create.return_value = mock_response
+                mock_client.pages.create = AsyncMock(return_value=mock_response)
                 mock_client_class.return_value = mock_client
                 
                 client = NotionWellnessClient()
@@ -91,7 +93,7 @@ class TestNotionClient:
                 assert result["url"] == "https://notion.so/test-page"
                 
                 
-                mock_client.pages.create.assert_called_once()
+                mock_client.pages.create.assert_awaited_once()
                 call_args = mock_client.pages.create.call_args
                 
                 assert call_args[1]["parent"]["database_id"] == "test_database_id"
@@ -117,9 +119,9 @@ class TestNotionClient:
 : 'test_db',
             'ENABLE_NOTION_MCP': 'true'
         }):
-            with patch('wellness_notion.Client') as mock_client_class:
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
                 mock_client = Mock()
-                mock_client.pages.create.return_value = mock_response
+                mock_client.pages.create = AsyncMock(return_value=mock_response)
                 mock_client_class.return_value = mock_client
                 
                 client = NotionWellnessClient()
@@ -150,9 +152,9 @@ class TestNotionClient:
             'NOTION_DATABASE_ID': 'test_db',
             'ENABLE_NOTION_MCP': 'true'
         }):
-            with patch('wellness_notion.Client') as mock_client_class:
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
                 mock_client = Mock()
-                mock_client.pages.update.return_value = mock_response
+                mock_client.pages.update = AsyncMock(return_value=mock_response)
                 mock_client_class.return_value = mock_client
                 
                 client = NotionWellnessClient()
@@ -165,7 +167,7 @@ class TestNotionClient:
                 assert result["success"] == True
                 assert result["status"] == "Completed"
                 
-                mock_client.pages.update.assert_called_once_with(
+                mock_client.pages.update.assert_awaited_once_with(
                     page_id="test-page-id",
                     properties={
                         "Status": {
@@ -204,9 +206,10 @@ class TestNotionClient:
             'NOTION_DATABASE_ID': 'test_db',
             'ENABLE_NOTION_MCP': 'true'
         }):
-            with patch('wellness_notion.Client') as mock_client_class:
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
                 mock_client = Mock()
-                mock_client.databases.query.return_value = mock_response
+                mock_client.databases.retrieve = AsyncMock(return_value={"data_sources": [{"id": "ds-1"}]})
+                mock_client.data_sources.query = AsyncMock(return_value=mock_response)
                 mock_client_class.return_value = mock_client
                 
                 client = NotionWellnessClient()
@@ -221,6 +224,280 @@ class TestNotionClient:
                 assert entries[0]["status"] == "Planned"
                 assert "Exercise" in entries[0]["objectives"]
     
+    @pytest.mark.asyncio
+    async def test_get_recent_entries_paginates_and_caches(self):
+        """All result pages are read once, then repeat reads make no API calls"""
+        def page(page_id, date, edited):
+            return {
+                "id": page_id,
+                "url": f"https://notion.so/{page_id}",
+                "last_edited_time": edited,
+                "properties": {
+                    "Date": {"date": {"start": date}},
+                    "Mood": {"select": {"name": "Good"}},
+                    "Energy": {"select": {"name": "High"}},
+                    "Status": {"select": {"name": "Planned"}},
+                    "Objectives": {"rich_text": []}
+                }
+            }
+        
+        first_page = {
+            "results": [page("p3", "2025-11-23", "2025-11-23T10:00:00.000Z")],
+            "has_more": True,
+            "next_cursor": "cursor-1"
+        }
+        second_page = {
+            "results": [page("p1", "2025-11-21", "2025-11-21T10:00:00.000Z")],
+            "has_more": False,
+            "next_cursor": None
+        }
+        changed = {
+            "results": [page("p4", "2025-11-24", "2025-11-24T10:00:00.000Z")],
+            "has_more": False,
+            "next_cursor": None
+        }
+        
+        with patch.dict(os.environ, {
+            'NOTION_API_KEY': 'test_key',
+            'NOTION_DATABASE_ID': 'test_db',
+            'ENABLE_NOTION_MCP': 'true'
+        }):
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
+                mock_client = Mock()
+                mock_client.databases.retrieve = AsyncMock(return_value={"data_sources": [{"id": "ds-1"}]})
+                mock_client.data_sources.query = AsyncMock(side_effect=[first_page, second_page, changed])
+                mock_client_class.return_value = mock_client
+                
+                client = NotionWellnessClient()
+                
+                entries = await client.get_recent_entries(limit=5)
+                assert [e["page_id"] for e in entries] == ["p3", "p1"]
+                assert mock_client.data_sources.query.call_args_list[1][1]["start_cursor"] == "cursor-1"
+                
+                # Served from cache
+                await client.get_recent_entries(limit=1)
+                assert mock_client.data_sources.query.await_count == 2
+                
+                # After the TTL only pages edited since the last sync are fetched
+                client.cache_ttl = 0
+                entries = await client.get_recent_entries(limit=5)
+                assert [e["page_id"] for e in entries] == ["p4", "p3", "p1"]
+                incremental = mock_client.data_sources.query.call_args_list[2][1]
+                assert incremental["filter"]["last_edited_time"] == {"on_or_after": "2025-11-23T10:00:00.000Z"}
+                assert incremental["data_source_id"] == "ds-1"
+                mock_client.databases.retrieve.assert_awaited_once_with(database_id="test_db")
+    
+    @pytest.mark.asyncio
+    async def test_cold_read_stops_after_limit(self):
+        """A first read only pages through the database until it has `limit` entries"""
+        def page(page_id, date):
+            return {
+                "id": page_id,
+                "url": f"https://notion.so/{page_id}",
+                "last_edited_time": f"{date}T10:00:00.000Z",
+                "properties": {"Date": {"date": {"start": date}}}
+            }
+        
+        with patch.dict(os.environ, {
+            'NOTION_API_KEY': 'test_key',
+            'NOTION_DATABASE_ID': 'test_db',
+            'ENABLE_NOTION_MCP': 'true'
+        }):
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
+                mock_client = Mock()
+                mock_client.data_sources.query = AsyncMock(side_effect=[
+                    {"results": [page("p3", "2025-11-23"), page("p2", "2025-11-22")], "has_more": True, "next_cursor": "c1"},
+                    {"results": [page("p3", "2025-11-23"), page("p2", "2025-11-22"), page("p1", "2025-11-21")],
+                     "has_more": True, "next_cursor": "c2"},
+                ])
+                mock_client_class.return_value = mock_client
+                
+                client = NotionWellnessClient()
+                client.data_source_id = "ds-1"
+                
+                entries = await client.get_recent_entries(limit=2)
+                assert [e["page_id"] for e in entries] == ["p3", "p2"]
+                first = mock_client.data_sources.query.call_args_list[0][1]
+                assert first["page_size"] == 2
+                assert first["sorts"][0] == {"property": "Date", "direction": "descending"}
+                assert mock_client.data_sources.query.await_count == 1
+                
+                # Asking for more than the cache holds syncs again, deep enough for the new limit
+                entries = await client.get_recent_entries(limit=3)
+                assert [e["page_id"] for e in entries] == ["p3", "p2", "p1"]
+                assert mock_client.data_sources.query.call_args_list[1][1]["page_size"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_own_writes_do_not_advance_incremental_sync(self):
+        """Pages we write are cached, but the next sync still starts at the last query result"""
+        synced = {
+            "id": "p1",
+            "url": "https://notion.so/p1",
+            "last_edited_time": "2025-11-23T10:00:00.000Z",
+            "properties": {"Date": {"date": {"start": "2025-11-23"}}}
+        }
+        updated = {**synced, "last_edited_time": "2025-11-24T10:00:00.000Z"}
+        
+        with patch.dict(os.environ, {
+            'NOTION_API_KEY': 'test_key',
+            'NOTION_DATABASE_ID': 'test_db',
+            'ENABLE_NOTION_MCP': 'true'
+        }):
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
+                mock_client = Mock()
+                mock_client.data_sources.query = AsyncMock(return_value={"results": [synced], "has_more": False})
+                mock_client.pages.update = AsyncMock(return_value=updated)
+                mock_client_class.return_value = mock_client
+                
+                client = NotionWellnessClient()
+                client.data_source_id = "ds-1"
+                await client.get_recent_entries(limit=5)
+                await client.update_objective_status("p1", "Completed")
+                
+                client.cache_ttl = 0
+                await client.get_recent_entries(limit=5)
+                incremental = mock_client.data_sources.query.call_args_list[1][1]
+                assert incremental["filter"]["last_edited_time"] == {"on_or_after": "2025-11-23T10:00:00.000Z"}
+    
+    @pytest.mark.asyncio
+    async def test_sync_without_edit_times_stays_limited(self):
+        """With no edit time to filter on, a refresh resyncs the recent pages instead of the whole database"""
+        undated = {
+            "id": "p1",
+            "url": "https://notion.so/p1",
+            "properties": {"Date": {"date": {"start": "2025-11-23"}}}
+        }
+        
+        with patch.dict(os.environ, {
+            'NOTION_API_KEY': 'test_key',
+            'NOTION_DATABASE_ID': 'test_db',
+            'ENABLE_NOTION_MCP': 'true'
+        }):
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
+                mock_client = Mock()
+                mock_client.data_sources.query = AsyncMock(
+                    return_value={"results": [undated], "has_more": True, "next_cursor": "c1"}
+                )
+                mock_client_class.return_value = mock_client
+                
+                client = NotionWellnessClient()
+                client.data_source_id = "ds-1"
+                await client.get_recent_entries(limit=1)
+                
+                client.cache_ttl = 0
+                entries = await client.get_recent_entries(limit=1)
+                
+                assert [e["page_id"] for e in entries] == ["p1"]
+                assert mock_client.data_sources.query.await_count == 2
+                refresh = mock_client.data_sources.query.call_args_list[1][1]
+                assert "filter" not in refresh
+                assert refresh["page_size"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_slow_request_does_not_block_event_loop(self):
+        """Other tasks keep running while a Notion request is in flight"""
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.1)
+            return {"id": "slow", "url": "https://notion.so/slow", "created_time": "now"}
+        
+        with patch.dict(os.environ, {
+            'NOTION_API_KEY': 'test_key',
+            'NOTION_DATABASE_ID': 'test_db',
+            'ENABLE_NOTION_MCP': 'true'
+        }):
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
+                mock_client = Mock()
+                mock_client.pages.create = slow_create
+                mock_client_class.return_value = mock_client
+                
+                client = NotionWellnessClient()
+                ticks = 0
+                
+                async def ticker():
+                    nonlocal ticks
+                    while True:
+                        await asyncio.sleep(0.01)
+                        ticks += 1
+                
+                ticker_task = asyncio.create_task(ticker())
+                await client.create_wellness_entry(
+                    date="2025-11-24",
+                    mood="Good",
+                    energy="High",
+                    objectives=["Exercise"]
+                )
+                ticker_task.cancel()
+                
+                assert ticks >= 5
+    
+    @pytest.mark.asyncio
+    async def test_load_schema(self):
+        """The database schema is fetched once and used to match select options"""
+        database = {
+            "properties": {
+                "Name": {"type": "title"},
+                "Date": {"type": "date"},
+                "Mood": {"type": "select", "select": {"options": [{"name": "GOOD"}, {"name": "Low"}]}},
+                "Energy": {"type": "select", "select": {"options": [{"name": "High"}]}},
+                "Objectives": {"type": "rich_text"},
+                "Status": {"type": "select", "select": {"options": [{"name": "Planned"}]}},
+            }
+        }
+        
+        with patch.dict(os.environ, {
+            'NOTION_API_KEY': 'test_key',
+            'NOTION_DATABASE_ID': 'test_db',
+            'ENABLE_NOTION_MCP': 'true'
+        }):
+            with patch('wellness_notion.AsyncClient') as mock_client_class:
+                mock_client = mock_client_class.return_value
+                mock_client.databases.retrieve = AsyncMock(return_value=database)
+                
+                client = NotionWellnessClient()
+                schema = await client.load_schema()
+                
+                mock_client.databases.retrieve.assert_called_once_with(database_id='test_db')
+                assert schema["properties"]["Mood"] == "select"
+                assert schema["options"]["Mood"] == ["GOOD", "Low"]
+                assert validate_schema(schema) == []
+                assert client._select_option("Mood", "good") == "GOOD"
+                assert client._select_option("Mood", "tired") == "Tired"
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_gives_up_on_a_slow_schema_load(self):
+        """A slow Notion API is given up on after the schema timeout instead of stalling the job"""
+        async def slow_retrieve(**kwargs):
+            await asyncio.sleep(10)
+        
+        with patch.dict(os.environ, {
+            'NOTION_API_KEY': 'test_key',
+            'NOTION_DATABASE_ID': 'test_db',
+            'ENABLE_NOTION_MCP': 'true'
+        }):
+            with patch('wellness_notion.AsyncClient') as mock_client_class, \
+                    patch('wellness_notion.NOTION_SCHEMA_TIMEOUT', 0.05):
+                mock_client_class.return_value.databases.retrieve = slow_retrieve
+                
+                client = NotionWellnessClient()
+                start = asyncio.get_running_loop().time()
+                await client.warm_up()
+                
+                assert asyncio.get_running_loop().time() - start < 1
+                assert client.schema is None
+    
+    def test_validate_schema_reports_problems(self):
+        """Missing properties, wrong types and missing options are reported"""
+        schema = {
+            "properties": {"Name": "title", "Date": "rich_text", "Mood": "select", "Status": "select"},
+            "options": {"Mood": [], "Status": ["Done"]}
+        }
+        
+        problems = validate_schema(schema)
+        
+        assert "property 'Date' is rich_text, expected date" in problems
+        assert "missing property 'Energy' (select)" in problems
+        assert "select property 'Status' has no 'Planned' option" in problems
+    
     def test_singleton_pattern(self):
         """Test that get_notion_client returns the same instance"""
         with patch.dict(os.environ, {
@@ -238,29 +515,26 @@ class TestAgentNotionIntegration:
     """Test Notion integration within the agent"""
     
     @pytest.mark.asyncio
-    async def test_save_to_notion_tool_success(self):
+    async def test_save_to_notion_tool_success(self, tmp_path):
         """Test the save_to_notion tool in the agent"""
         from agent import WellnessAssistant
         from unittest.mock import MagicMock
+        from wellness_io import AsyncWellnessStore
+        from wellness_storage import WellnessStore
         
-        test_log_data = {
-            "entries": [
-                {
-                    "date": "2025-11-24",
-                    "mood": "Good",
-                    "energy": "High",
-                    "objectives": ["Exercise", "Work on project"],
-                    "summary": "Feeling great"
-                }
-            ]
-        }
+        store = WellnessStore(tmp_path)
+        store.append("default", {
+            "date": "2025-11-24",
+            "mood": "Good",
+            "energy": "High",
+            "objectives": ["Exercise", "Work on project"],
+            "summary": "Feeling great"
+        })
         
-        with patch('builtins.open', create=True) as mock_open:
-            mock_open.return_value.__enter__.return_value.read.return_value = str(test_log_data)
-            
+        with patch('agent.wellness_store', AsyncWellnessStore(store)):
             with patch('agent.get_notion_client') as mock_get_client:
                 mock_notion = AsyncMock()
-                mock_notion.is_enabled.return_value = True
+                mock_notion.is_enabled = Mock(return_value=True)
                 mock_notion.create_wellness_entry.return_value = {
                     "success": True,
                     "page_id": "test-id",
@@ -268,13 +542,25 @@ class TestAgentNotionIntegration:
                 }
                 mock_get_client.return_value = mock_notion
                 
-                assistant = WellnessAssistant()
-                mock_context = MagicMock()
-                
-                result = await assistant.save_to_notion(mock_context)
+                queue = NotionSyncQueue(tmp_path / "queue", client_factory=lambda: mock_notion)
+                with patch('agent.get_notion_sync_queue', return_value=queue):
+                    assistant = WellnessAssistant()
+                    mock_context = MagicMock()
+                    
+                    result = await assistant.save_to_notion(mock_context)
                 
                 assert "Perfect!" in result
                 assert "Daily Wellness database" in result
+                assert queue.pending_count() == 1
+                mock_notion.create_wellness_entry.assert_not_awaited()
+                
+                # The entry is delivered by the background worker
+                queue.start()
+                assert await queue.drain(timeout=2.0)
+                await queue.stop()
+                assert mock_notion.create_wellness_entry.call_args[1]["mood"] == "Good"
+        
+        store.close()
     
     @pytest.mark.asyncio
     async def test_save_to_notion_when_disabled(self):
@@ -1,13 +1,29 @@
 import pytest
 import json
 import os
+import shutil
 from pathlib import Path
 from livekit.agents import AgentSession, inference, llm
 from agent import WellnessAssistant
 
 from livekit.plugins import google
 
-WELLNESS_LOG_PATH = Path("wellness_log.json")
+WELLNESS_LOG_DIR = Path("wellness_logs")
+WELLNESS_LOG_PATH = WELLNESS_LOG_DIR / "default.jsonl"
+LEGACY_WELLNESS_LOG_PATH = Path("wellness_log.json")
+
+
+def _remove_logs() -> None:
+    if WELLNESS_LOG_DIR.exists():
+        shutil.rmtree(WELLNESS_LOG_DIR)
+    for path in (LEGACY_WELLNESS_LOG_PATH, Path("wellness_log.json.migrated")):
+        if path.exists():
+            os.remove(path)
+
+
+def _read_entries() -> list:
+    with open(WELLNESS_LOG_PATH) as f:
+        return [json.loads(line) for line in f if line.strip()]
 
 
 def _llm() -> llm.LLM:
@@ -17,8 +33,7 @@ def _llm() -> llm.LLM:
 @pytest.mark.asyncio
 async def test_wellness_check_in_flow() -> None:
     """Test the wellness companion's daily check-in flow."""
-    if WELLNESS_LOG_PATH.exists():
-        os.remove(WELLNESS_LOG_PATH)
+    _remove_logs()
     
     async with (
         _llm() as llm_instance,
@@ -48,16 +63,13 @@ async def test_wellness_check_in_flow() -> None:
         # The save_check_in tool should be called automatically by the agent
         await result.expect.next_event().is_message(role="assistant")
 
-        # Check if wellness_log.json exists and has correct structure
+        # Check if the wellness journal exists and has correct structure
         assert WELLNESS_LOG_PATH.exists(), "Wellness log file should be created"
         
-        with open(WELLNESS_LOG_PATH, "r") as f:
-            data = json.load(f)
+        entries = _read_entries()
+        assert len(entries) > 0, "At least one entry should be saved"
         
-        assert "entries" in data, "Log should have 'entries' key"
-        assert len(data["entries"]) > 0, "At least one entry should be saved"
-        
-        entry = data["entries"][0]
+        entry = entries[0]
         assert "date" in entry, "Entry should have a date"
         assert "time" in entry, "Entry should have a time"
         assert "timestamp" in entry, "Entry should have a timestamp"
@@ -68,8 +80,7 @@ async def test_wellness_check_in_flow() -> None:
         assert "summary" in entry, "Entry should have a summary"
 
     # Clean up
-    if WELLNESS_LOG_PATH.exists():
-        os.remove(WELLNESS_LOG_PATH)
+    _remove_logs()
 
 
 @pytest.mark.asyncio
@@ -90,14 +101,15 @@ async def test_wellness_with_previous_context() -> None:
         ]
     }
     
-    with open(WELLNESS_LOG_PATH, "w") as f:
+    # Written in the legacy format; the agent migrates it on first read
+    with open(LEGACY_WELLNESS_LOG_PATH, "w") as f:
         json.dump(previous_data, f, indent=2)
     
     async with (
         _llm() as llm_instance,
         AgentSession(llm=llm_instance) as session,
     ):
-        assistant = WellnessAssistant()
+        assistant = await WellnessAssistant.create()
         await session.start(assistant)
 
         # Agent should reference the previous check-in in the greeting
@@ -112,16 +124,14 @@ async def test_wellness_with_previous_context() -> None:
         await result.expect.next_event().is_message(role="assistant")
 
     # Clean up
-    if WELLNESS_LOG_PATH.exists():
-        os.remove(WELLNESS_LOG_PATH)
+    _remove_logs()
 
 
 @pytest.mark.asyncio
 async def test_wellness_no_medical_advice() -> None:
     """Test that the agent avoids giving medical advice."""
     # Clean up any existing test data
-    if WELLNESS_LOG_PATH.exists():
-        os.remove(WELLNESS_LOG_PATH)
+    _remove_logs()
     
     async with (
         _llm() as llm_instance,
@@ -142,16 +152,14 @@ async def test_wellness_no_medical_advice() -> None:
         # or encourage seeking professional help, but not diagnose
 
     # Clean up
-    if WELLNESS_LOG_PATH.exists():
-        os.remove(WELLNESS_LOG_PATH)
+    _remove_logs()
 
 
 @pytest.mark.asyncio
 async def test_save_check_in_tool() -> None:
     """Test the save_check_in tool directly."""
     # Clean up
-    if WELLNESS_LOG_PATH.exists():
-        os.remove(WELLNESS_LOG_PATH)
+    _remove_logs()
     
     assistant = WellnessAssistant()
     
@@ -175,11 +183,9 @@ async def test_save_check_in_tool() -> None:
     # Verify the file was created
     assert WELLNESS_LOG_PATH.exists()
     
-    with open(WELLNESS_LOG_PATH, "r") as f:
-        data = json.load(f)
-    
-    assert len(data["entries"]) == 1
-    entry = data["entries"][0]
+    entries = _read_entries()
+    assert len(entries) == 1
+    entry = entries[0]
     assert entry["mood"] == "happy"
     assert entry["energy"] == "high"
     assert entry["objectives"] == ["write code", "exercise", "read"]
@@ -187,7 +193,7 @@ async def test_save_check_in_tool() -> None:
     assert entry["summary"] == "Feeling great and productive"
     
     # Clean up
-    os.remove(WELLNESS_LOG_PATH)
+    _remove_logs()
 
 
 @pytest.mark.asyncio
@@ -213,7 +219,8 @@ async def test_get_previous_check_ins_tool() -> None:
         ]
     }
     
-    with open(WELLNESS_LOG_PATH, "w") as f:
+    _remove_logs()
+    with open(LEGACY_WELLNESS_LOG_PATH, "w") as f:
         json.dump(sample_data, f)
     
     assistant = WellnessAssistant()
@@ -234,4 +241,4 @@ async def test_get_previous_check_ins_tool() -> None:
     assert "good" in result
     
     # Clean up
-    os.remove(WELLNESS_LOG_PATH)
+    _remove_logs()
@@ -0,0 +1,198 @@
+"""
+Tests for the wellness trend analytics engine
+"""
+
+import asyncio
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from wellness_analytics import (
+    TrendAggregates,
+    TrendAnalytics,
+    classify_energy,
+    classify_mood,
+    format_trends,
+    stressor_keywords,
+)
+
+
+def _entry(day: date, mood: str = "good", energy: str = "high", **extra) -> dict:
+    return {
+        "date": day.isoformat(),
+        "mood": mood,
+        "energy": energy,
+        "objectives": ["walk", "read"],
+        **extra,
+    }
+
+
+def _random_history(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    day = date(2025, 9, 1)
+    entries = []
+    for i in range(count):
+        day += timedelta(days=rng.choice([0, 1, 1, 1, 3]))
+        entry = _entry(
+            day,
+            mood=rng.choice(["good", "tired", "okay", "stressed", "happy", ""]),
+            energy=rng.choice(["high", "low", "medium", "drained", "unsure"]),
+            stressors=rng.choice(["work deadline", "poor sleep and work", None]),
+        )
+        entry["objectives"] = rng.sample(["walk", "read", "cook", "call mom"], 2)
+        if i % 2:
+            entry["completed_objectives"] = rng.sample(["walk", "read", "cook", "call mom"], 1)
+        entries.append(entry)
+    return entries
+
+
+class TestClassification:
+    """Test suite for free-text mood and energy classification"""
+
+    def test_energy_levels(self):
+        """Synonyms map onto low/medium/high"""
+        assert classify_energy("High") == 2
+        assert classify_energy("pretty drained") == 0
+        assert classify_energy("okay I guess") == 1
+        assert classify_energy("purple") == -1
+        assert classify_energy(None) == -1
+
+    def test_moods(self):
+        """Unrecognized moods count as neutral"""
+        assert classify_mood("happy") == 2
+        assert classify_mood("Stressed out") == 0
+        assert classify_mood("pensive") == 1
+        assert classify_mood("") == -1
+
+    def test_stressor_keywords(self):
+        """Stopwords are dropped"""
+        assert stressor_keywords("The deadline at work and my sleep") == ["deadline", "work", "sleep"]
+        assert stressor_keywords(None) == []
+
+
+class TestTrendAggregates:
+    """Test suite for TrendAggregates"""
+
+    def test_incremental_matches_full_pass(self):
+        """Folding in entries one by one gives the same result as the vectorized pass"""
+        entries = _random_history(300)
+        full = TrendAggregates.from_entries(entries)
+        incremental = TrendAggregates()
+        for entry in entries:
+            incremental.update(entry)
+
+        today = date.fromisoformat(entries[-1]["date"])
+        for days in (7, 30, None):
+            assert full.summary(days, today=today) == incremental.summary(days, today=today)
+
+    def test_streaks(self):
+        """Consecutive days and repeated moods/energy form streaks"""
+        start = date(2025, 11, 1)
+        entries = [
+            _entry(start, mood="tired", energy="low"),
+            _entry(start + timedelta(days=3), energy="low"),
+            _entry(start + timedelta(days=4)),
+            _entry(start + timedelta(days=4)),
+            _entry(start + timedelta(days=5)),
+        ]
+        summary = TrendAggregates.from_entries(entries).summary(today=start + timedelta(days=5))
+
+        assert summary["day_streak"] == 3
+        assert summary["longest_day_streak"] == 3
+        assert summary["mood_streak"] == {"value": "positive", "length": 4}
+        assert summary["energy_streak"] == {"value": "high", "length": 3}
+        assert summary["longest_energy_streaks"] == {"low": 2, "medium": 0, "high": 3}
+
+    def test_streak_is_not_current_after_a_gap(self):
+        """A streak that ended before yesterday is reported as zero"""
+        aggregates = TrendAggregates.from_entries([_entry(date(2025, 11, 1))])
+
+        assert aggregates.summary(today=date(2025, 11, 10))["day_streak"] == 0
+
+    def test_period_distributions(self):
+        """Only days inside the period are counted, grouped into weeks"""
+        today = date(2025, 11, 30)
+        entries = [_entry(today - timedelta(days=40), energy="low")]
+        entries += [_entry(today - timedelta(days=i), energy="medium") for i in (9, 2, 1)]
+        summary = TrendAggregates.from_entries(entries).summary(30, today=today)
+
+        assert summary["check_ins"] == 3
+        assert summary["energy"] == {"low": 0, "medium": 3, "high": 0}
+        assert summary["average_energy"] == 2.0
+        assert sorted(summary["weekly"]) == ["2025-11-17", "2025-11-24"]
+
+    def test_objective_completion_rate(self):
+        """Completions are measured against the previous check-in's objectives"""
+        start = date(2025, 11, 1)
+        entries = [
+            _entry(start),
+            _entry(start + timedelta(days=1), completed_objectives=["Walk"]),
+            _entry(start + timedelta(days=2)),
+        ]
+        summary = TrendAggregates.from_entries(entries).summary()
+
+        assert summary["objective_completion_rate"] == 0.5
+
+    def test_format_trends(self):
+        """The text summary mentions the period, energy and stressors"""
+        today = date(2025, 11, 30)
+        entries = [_entry(today, energy="low", stressors="work deadline")]
+        text = format_trends(TrendAggregates.from_entries(entries).summary(30, today=today))
+
+        assert "last 30 days" in text
+        assert "low 1" in text
+        assert "deadline (1)" in text
+
+    def test_empty_period(self):
+        """A period without check-ins says so"""
+        text = format_trends(TrendAggregates().summary(7, today=date(2025, 11, 30)))
+
+        assert text == "No check-ins recorded in the last 7 days."
+
+
+class _HistoryStore:
+    def __init__(self, entries):
+        self.history = list(entries)
+        self.reads = 0
+
+    async def entries(self, user_id):
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return list(self.history)
+
+
+class TestTrendAnalytics:
+    """Test suite for the per-process TrendAnalytics cache"""
+
+    @pytest.mark.asyncio
+    async def test_history_is_read_once_then_updated_incrementally(self):
+        """New check-ins update the cached aggregates without rereading history"""
+        start = date(2025, 11, 1)
+        store = _HistoryStore([_entry(start)])
+        analytics = TrendAnalytics()
+
+        first, second = await asyncio.gather(
+            analytics.trends("alice", store), analytics.trends("alice", store)
+        )
+        assert first is second
+        analytics.record("alice", _entry(start + timedelta(days=1)))
+        trends = await analytics.trends("alice", store)
+
+        assert store.reads == 1
+        assert trends.check_ins == 2
+
+    @pytest.mark.asyncio
+    async def test_save_during_load_is_not_lost(self):
+        """A check-in recorded while history is loading forces a fresh read next time"""
+        store = _HistoryStore([_entry(date(2025, 11, 1))])
+        analytics = TrendAnalytics()
+
+        loading = asyncio.ensure_future(analytics.trends("alice", store))
+        await asyncio.sleep(0)
+        analytics.record("alice", _entry(date(2025, 11, 2)))
+        await loading
+        store.history.append(_entry(date(2025, 11, 2)))
+
+        assert (await analytics.trends("alice", store)).check_ins == 2
+        assert store.reads == 2
@@ -0,0 +1,135 @@
+"""
+Tests for the compact check-in archive and journal compaction
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from wellness_archive import CheckInArchive
+from wellness_storage import WellnessStore
+
+
+def _entry(day: int, mood: str = "good", energy: str = "medium") -> dict:
+    moment = datetime(2025, 1, 1, 8, 30, 15, 123456) + timedelta(days=day)
+    return {
+        "date": moment.strftime("%Y-%m-%d"),
+        "time": moment.strftime("%H:%M:%S"),
+        "timestamp": moment.isoformat(),
+        "mood": mood,
+        "energy": energy,
+        "objectives": [f"task {day}", "drink water"],
+        "stressors": "work deadline",
+        "summary": f"Feeling {mood} with {energy} energy on day {day}",
+    }
+
+
+class TestCheckInArchive:
+    """Test suite for CheckInArchive"""
+
+    def test_round_trip(self, tmp_path):
+        """Entries come back exactly as they were archived, across segments"""
+        archive = CheckInArchive(tmp_path / "alice.archive")
+        first = [_entry(day, mood=("good", "tired")[day % 2]) for day in range(10)]
+        second = [_entry(day, energy="high") for day in range(10, 15)]
+        archive.append_segment(first, source=(1, 100))
+        archive.append_segment(second, source=(1, 200))
+
+        assert archive.entries() == first + second
+        assert archive.tail(3) == second[-3:]
+        assert archive.tail(7) == first[-2:] + second
+        assert archive.count() == 15
+        assert archive.last_source() == (1, 200)
+
+    def test_irregular_entries_round_trip(self, tmp_path):
+        """Fields the typed columns cannot reproduce are kept verbatim"""
+        entries = [
+            {"date": "2025-11-20", "mood": "okay", "objectives": ["rest"]},
+            {"timestamp": "2025-11-21T09:00:00+01:00", "date": "2025-11-21", "energy": 3},
+            {**_entry(1), "time": "later", "custom": {"nested": True}},
+            {"objectives": None, "summary": None, "mood": None},
+        ]
+        archive = CheckInArchive(tmp_path / "bob.archive")
+        archive.append_segment(entries)
+
+        assert archive.entries() == entries
+        assert archive.last_source() is None
+
+    def test_archive_is_much_smaller_than_json(self, tmp_path):
+        """Repeated keys, dates and moods cost a fraction of the JSON log"""
+        entries = [_entry(day, mood=("good", "okay", "tired")[day % 3]) for day in range(365)]
+        archive = CheckInArchive(tmp_path / "carol.archive")
+        archive.append_segment(entries)
+
+        legacy_size = len(json.dumps({"entries": entries}, indent=2))
+        assert archive.path.stat().st_size * 10 < legacy_size
+
+    def test_missing_archive_is_empty(self, tmp_path):
+        """An archive that was never written has no entries"""
+        archive = CheckInArchive(tmp_path / "nobody.archive")
+
+        assert archive.entries() == []
+        assert archive.tail(5) == []
+        assert archive.last_source() is None
+
+
+class TestCompaction:
+    """Test suite for WellnessStore.compact"""
+
+    def test_history_is_unchanged_by_compaction(self, tmp_path):
+        """Reads see one continuous history before and after compacting"""
+        store = WellnessStore(tmp_path)
+        entries = [_entry(day) for day in range(30)]
+        for entry in entries:
+            store.append("alice", entry)
+
+        assert store.compact("alice", keep_recent=10, min_entries=5) == 20
+        assert store.entries("alice") == entries
+        assert store.tail("alice", 15) == entries[-15:]
+        assert store.latest("alice") == entries[-1]
+        assert len(store.journal("alice").entries()) == 10
+
+        store.append("alice", _entry(30))
+        assert store.latest("alice") == _entry(30)
+        assert len(store.entries("alice")) == 31
+        store.close()
+
+    def test_small_journals_are_left_alone(self, tmp_path):
+        """Compaction waits until enough entries would move"""
+        store = WellnessStore(tmp_path)
+        for day in range(12):
+            store.append("alice", _entry(day))
+
+        assert store.compact("alice", keep_recent=10, min_entries=5) == 0
+        assert not store.archive("alice").exists()
+        store.close()
+
+    def test_fully_archived_history_is_still_readable(self, tmp_path):
+        """latest() falls back to the archive when the journal is empty"""
+        store = WellnessStore(tmp_path)
+        for day in range(5):
+            store.append("alice", _entry(day))
+
+        assert store.compact("alice", keep_recent=0, min_entries=1) == 5
+        assert store.latest("alice") == _entry(4)
+        store.close()
+
+    def test_interrupted_compaction_is_finished(self, tmp_path):
+        """An archived journal prefix left behind by a crash is dropped on open"""
+        store = WellnessStore(tmp_path)
+        entries = [_entry(day) for day in range(8)]
+        for entry in entries:
+            store.append("alice", entry)
+        store.close()
+
+        # Simulate a crash after the archive was written but before the journal was trimmed
+        journal_path = tmp_path / "alice.jsonl"
+        lines = journal_path.read_bytes().splitlines(keepends=True)
+        consumed = sum(len(line) for line in lines[:5])
+        CheckInArchive(tmp_path / "alice.archive").append_segment(
+            entries[:5], source=(journal_path.stat().st_ino, consumed)
+        )
+
+        reopened = WellnessStore(tmp_path)
+        assert reopened.entries("alice") == entries
+        assert len(reopened.journal("alice").entries()) == 3
+        reopened.close()
@@ -0,0 +1,167 @@
+"""
+Tests for audio quality estimation and adaptive noise cancellation
+"""
+
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from wellness_audio_quality import (
+    AdaptiveNoiseCancellation,
+    AudioQualityEstimator,
+    check_stream_restart_support,
+    frame_level_db,
+)
+
+FRAME = 320  # 20 ms at 16 kHz
+
+
+def _frame(rng, noise_db: float, speech_db: Optional[float] = None) -> np.ndarray:
+    """One frame of white noise at `noise_db` dBFS, plus a tone at `speech_db` when given"""
+    signal = rng.standard_normal(FRAME) * 10 ** (noise_db / 20)
+    if speech_db is not None:
+        signal += np.sin(np.arange(FRAME) * 2 * np.pi * 200 / 16000) * 10 ** (speech_db / 20) * np.sqrt(2)
+    return np.clip(signal * 32768, -32768, 32767).astype(np.int16)
+
+
+def _talk(rng, seconds: float, noise_db: float, speech_db: float = -20.0):
+    """Frames alternating 400 ms of speech and 200 ms of pause, like someone talking"""
+    for i in range(int(seconds * 50)):
+        yield _frame(rng, noise_db, speech_db if i % 30 < 20 else None)
+
+
+def _feed(controller, frames) -> None:
+    for samples in frames:
+        controller.push(samples, 0.02)
+
+
+class _FakeAudioInput:
+    def __init__(self):
+        self._track = object()
+        self._publication = object()
+        self.restarts = 0
+
+    def _close_stream(self):
+        self._track = None
+
+    def _on_track_available(self, track, publication, participant):
+        self._track = track
+        self.restarts += 1
+
+
+class TestAudioQualityEstimator:
+    """Test suite for AudioQualityEstimator"""
+
+    def test_levels(self):
+        """Frame levels are RMS in dBFS"""
+        rng = np.random.default_rng(0)
+        assert abs(frame_level_db(_frame(rng, -30)) - -30) < 1.0
+        assert frame_level_db(np.zeros(FRAME, dtype=np.int16)) == -100.0
+
+    def test_snr_of_speech_in_noise(self):
+        """The noise floor comes from pauses and the speech level from words"""
+        rng = np.random.default_rng(0)
+        estimator = AudioQualityEstimator()
+        for samples in _talk(rng, 5, noise_db=-60):
+            estimator.push(samples)
+        estimator.evaluate()
+
+        assert abs(estimator.noise_floor_db - -60) < 2
+        assert abs(estimator.snr_db - 40) < 3
+
+    def test_needs_a_second_of_audio(self):
+        """No estimate is made from less than a second of audio"""
+        estimator = AudioQualityEstimator()
+        estimator.push(np.zeros(FRAME, dtype=np.int16))
+        estimator.evaluate()
+
+        assert not estimator.ready
+        assert estimator.snr_db is None
+
+
+class TestAdaptiveNoiseCancellation:
+    """Test suite for AdaptiveNoiseCancellation"""
+
+    def test_clean_audio_turns_it_off(self):
+        """After enough clean audio the filter is dropped and the stream re-created"""
+        rng = np.random.default_rng(0)
+        controller = AdaptiveNoiseCancellation("bvc", disable_hold=3.0)
+        audio_input = _FakeAudioInput()
+        controller.attach(audio_input)
+        controller._participant = object()
+
+        _feed(controller, _talk(rng, 2, noise_db=-65))
+        assert controller.enabled
+
+        _feed(controller, _talk(rng, 6, noise_db=-65))
+        assert not controller.enabled
+        assert audio_input.restarts == 1
+
+        stats = controller.stats()
+        assert stats["switches"] == 1
+        assert 0 < stats["duty_cycle"] < 1
+        assert stats["cpu_skipped_estimate_seconds"] > 0
+        assert stats["net_cpu_saved_estimate_seconds"] == stats["cpu_skipped_estimate_seconds"]
+
+    def test_noise_turns_it_back_on(self):
+        """A noisy room enables the filter again quickly"""
+        rng = np.random.default_rng(0)
+        controller = AdaptiveNoiseCancellation("bvc", start_enabled=False)
+
+        _feed(controller, _talk(rng, 3, noise_db=-65))
+        assert not controller.enabled
+
+        _feed(controller, _talk(rng, 3, noise_db=-35))
+        assert controller.enabled
+
+    def test_hysteresis_band_keeps_the_state(self):
+        """An SNR between the two thresholds changes nothing either way"""
+        rng = np.random.default_rng(0)
+        for start_enabled in (True, False):
+            controller = AdaptiveNoiseCancellation(
+                "bvc", noise_floor_db=-30, disable_hold=1.0, start_enabled=start_enabled
+            )
+            # 20 dB SNR: between enable_snr_db=15 and disable_snr_db=25
+            _feed(controller, _talk(rng, 8, noise_db=-40, speech_db=-20))
+
+            assert controller.enabled is start_enabled
+            assert controller.switches == 0
+
+    def test_selector_hands_out_the_filter_only_while_enabled(self):
+        """The session's stream gets the filter while enabled and none otherwise"""
+        controller = AdaptiveNoiseCancellation("bvc")
+        controller._track_sid = "TR_1"
+        params = type("Params", (), {"participant": object(), "track": type("Track", (), {"sid": "TR_1"})()})()
+
+        assert controller(params) == "bvc"
+        controller.enabled = False
+        assert controller(params) is None
+
+
+class TestStreamRestartSupport:
+    """Test suite for check_stream_restart_support"""
+
+    def test_installed_room_io_supports_restarts(self):
+        """The installed livekit-agents still has the private members _restart_stream uses"""
+        check_stream_restart_support()
+
+    def test_missing_members_fail_loudly(self):
+        """An audio input without the members raises instead of silently never switching"""
+        class _Upgraded:
+            def __init__(self):
+                self._track = None
+
+            def _on_track_available(self, track, publication):
+                pass
+
+        with pytest.raises(RuntimeError) as e:
+            check_stream_restart_support(_Upgraded)
+
+        assert "_close_stream() is missing" in str(e.value)
+        assert "_on_track_available() no longer takes" in str(e.value)
+        assert "_publication is no longer set" in str(e.value)
+
+    def test_fake_audio_input_matches(self):
+        """The fake used by these tests has the same shape as RoomIO's audio input"""
+        check_stream_restart_support(_FakeAudioInput)
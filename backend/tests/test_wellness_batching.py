@@ -0,0 +1,137 @@
+"""
+Tests for cross-session inference batching
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from wellness_batching import (
+    BatchedVADSession,
+    InferenceBatcher,
+    check_vad_batching_support,
+)
+
+
+class TestInferenceBatcher:
+    """Test suite for InferenceBatcher"""
+
+    def test_concurrent_submits_share_batches(self):
+        """Callers on many threads get their own results from shared batches"""
+        batches = []
+
+        def run_batch(items):
+            batches.append(len(items))
+            time.sleep(0.005)
+            return [item * 2 for item in items]
+
+        batcher = InferenceBatcher("test", run_batch, max_batch=8, max_delay=0.01)
+        start = threading.Barrier(16)
+
+        def submit(item):
+            start.wait()
+            return [batcher.submit(item * 100 + i) for i in range(5)]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(submit, range(16)))
+
+        assert results == [[(item * 100 + i) * 2 for i in range(5)] for item in range(16)]
+        assert sum(batches) == 80
+        assert max(batches) > 1 and max(batches) <= 8
+        stats = batcher.stats()
+        assert stats["items"] == 80
+        assert stats["batches"] == len(batches)
+
+    def test_lone_submitter_does_not_wait(self):
+        """Without concurrent traffic each call runs immediately"""
+        batcher = InferenceBatcher("test", lambda items: items, max_delay=0.05)
+
+        for i in range(5):
+            assert batcher.submit(i) == i
+            time.sleep(0.1)
+
+        assert batcher.stats()["queue_seconds"]["p99"] < 0.01
+        assert batcher.stats()["batches"] == 5
+
+    def test_keys_are_batched_separately(self):
+        """Items with different keys never share a model call"""
+        batches = []
+
+        def run_batch(items):
+            batches.append(items)
+            time.sleep(0.005)
+            return items
+
+        batcher = InferenceBatcher("test", run_batch, key=lambda item: item % 2, max_delay=0.01)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert list(pool.map(batcher.submit, range(40))) == list(range(40))
+
+        assert all(len({item % 2 for item in batch}) == 1 for batch in batches)
+
+    def test_errors_reach_every_caller(self):
+        """A failing batch raises in each of its callers"""
+        def run_batch(items):
+            raise RuntimeError("model failed")
+
+        batcher = InferenceBatcher("test", run_batch)
+        with pytest.raises(RuntimeError, match="model failed"):
+            batcher.submit(1)
+
+
+class TestBatchedVADSession:
+    """Test suite for BatchedVADSession"""
+
+    def test_batched_windows_match_single_runs(self):
+        """Stacked windows give each stream the same probability and state as running alone"""
+        silero = pytest.importorskip("livekit.plugins.silero")
+        session = silero.VAD.load()._onnx_session
+        batched = BatchedVADSession(session, max_batch=8, max_delay=0.02)
+
+        rng = np.random.default_rng(0)
+        streams = [
+            {
+                "input": rng.standard_normal((1, 576)).astype(np.float32) * 0.1,
+                "state": rng.standard_normal((2, 1, 128)).astype(np.float32) * 0.1,
+                "sr": np.array(16000, dtype=np.int64),
+            }
+            for _ in range(8)
+        ]
+        expected = [session.run(None, inputs) for inputs in streams]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for _ in range(3):
+                results = list(pool.map(lambda inputs: batched.run(None, inputs), streams))
+
+        for (out, state), (expected_out, expected_state) in zip(results, expected):
+            assert out.shape == expected_out.shape
+            assert state.shape == expected_state.shape
+            np.testing.assert_allclose(out, expected_out, atol=1e-5)
+            np.testing.assert_allclose(state, expected_state, atol=1e-5)
+        assert batched.stats()["items"] == 24
+
+
+class TestVADBatchingSupport:
+    """Test suite for check_vad_batching_support"""
+
+    def test_installed_silero_supports_batching(self):
+        """The installed Silero plugin still has the private session BatchedVADSession replaces"""
+        check_vad_batching_support()
+
+    def test_missing_session_fails_loudly(self):
+        """A VAD without the session attribute raises instead of silently running unbatched"""
+        class _UpgradedVAD:
+            def __init__(self):
+                self._session = None
+
+        class _UpgradedSession:
+            def run(self, inputs):
+                pass
+
+        with pytest.raises(RuntimeError) as e:
+            check_vad_batching_support(_UpgradedVAD, _UpgradedSession)
+
+        assert "_onnx_session is no longer set" in str(e.value)
+        assert "run() no longer takes" in str(e.value)
@@ -0,0 +1,94 @@
+"""
+Smoke test for the offline wellness benchmark
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from stubs import Latency
+from wellness_bench import BenchConfig, main, run_benchmark
+
+
+class TestWellnessBench:
+    """Test suite for the benchmark harness"""
+
+    async def test_replays_every_turn(self):
+        """Each concurrent session replays the whole scripted check-in"""
+        instant = Latency(0.0)
+        config = BenchConfig(
+            sessions=2,
+            stt_latency=instant,
+            llm_ttft=instant,
+            llm_token_interval=instant,
+            tts_ttfb=instant,
+        )
+        report = await run_benchmark(config)
+
+        assert report["turns"] == 8
+        latency = report["latency_s"]
+        assert latency["turn_total"]["count"] == 8
+        assert latency["time_to_first_audio"]["count"] == 8
+        assert latency["tool.save_check_in"]["count"] == 2
+
+    def test_greets_a_returning_user(self):
+        """The stub LLM has a reply for the greeting, which comes before any user message"""
+        from livekit.agents import llm
+        from scenarios import SCENARIOS
+
+        scenario = SCENARIOS["daily_check_in"]
+        chat_ctx = llm.ChatContext()
+        chat_ctx.add_message(role="system", content="instructions")
+
+        assert scenario.responder(chat_ctx).text == scenario.greeting
+
+    def test_threshold_failure_sets_exit_code(self, tmp_path):
+        """A p95 above --max-p95 makes the run fail"""
+        args = [
+            "--sessions", "1",
+            "--stt-latency", "0", "--llm-ttft", "0", "--llm-token-interval", "0", "--tts-ttfb", "0",
+            "--json", str(tmp_path / "report.json"),
+        ]
+        assert main([*args, "--max-p95", "turn_total=60"]) == 0
+        assert main([*args, "--max-p95", "turn_total=0"]) == 1
+        assert (tmp_path / "report.json").exists()
+
+
+class TestLoadTest:
+    """Test suite for the capacity load test"""
+
+    def test_report_stops_at_saturation(self):
+        """The first unhealthy step ends the ramp and sizing uses the last healthy one"""
+        from loadtest import StepResult, capacity_report, check_step
+
+        steps = []
+        for concurrency, ttfa, lag in ((10, 0.8, 0.002), (20, 0.9, 0.004), (30, 2.0, 0.2)):
+            step = StepResult(
+                concurrency=concurrency,
+                duration_s=10.0,
+                errors=0,
+                cpu_cores=concurrency * 0.01,
+                peak_rss_mb=100.0 + concurrency,
+                loop_lag_s={"p95": lag},
+                latency_s={"time_to_first_audio": {"p95": ttfa}},
+            )
+            check_step(step, max_ttfa_p95=1.5, max_loop_lag_p95=0.05)
+            steps.append(step)
+
+        report = capacity_report(steps, baseline_rss_mb=100.0, process_init_s=3.0, load_threshold=0.7, arrival_rate=1.0)
+
+        assert report["max_concurrency_per_process"] == 20
+        assert report["saturated_at"] == 30
+        assert len(report["saturation_reasons"]) == 2
+        assert report["rss_per_session_mb"] == 1.0
+        assert report["suggested_worker_options"]["num_idle_processes"] == 3
+
+    def test_process_init_does_not_need_api_keys(self, monkeypatch):
+        """Prewarm is timed with the stub network providers, so no API keys are needed"""
+        from loadtest import _measure_process_init
+
+        for key in ("DEEPGRAM_API_KEY", "GOOGLE_API_KEY", "MURF_API_KEY"):
+            monkeypatch.delenv(key, raising=False)
+
+        assert _measure_process_init(BenchConfig()) > 0
@@ -0,0 +1,107 @@
+"""
+Tests for the first-chunk TTS tokenizer
+"""
+
+import asyncio
+
+import pytest
+
+from wellness_chunker import FirstChunkTokenizer
+
+
+async def _chunks(tokenizer: FirstChunkTokenizer, pieces, delay: float = 0.0) -> list:
+    stream = tokenizer.stream()
+    for piece in pieces:
+        stream.push_text(piece)
+        await asyncio.sleep(delay)
+    stream.end_input()
+    return [event.token async for event in stream]
+
+
+def _words(text: str) -> list:
+    return [word + " " for word in text.split()]
+
+
+class TestFirstChunkTokenizer:
+    """Test suite for FirstChunkTokenizer"""
+
+    @pytest.mark.asyncio
+    async def test_first_clause_goes_out_at_a_comma(self):
+        """The opening clause is sent on its own, the rest as whole sentences"""
+        tokenizer = FirstChunkTokenizer(first_chunk_delay=10)
+        chunks = await _chunks(tokenizer, _words(
+            "That sounds like a really full day, so let's break it down. What matters most to you?"
+        ))
+
+        assert chunks[0] == "That sounds like a really full day,"
+        assert " ".join(chunks) == "That sounds like a really full day, so let's break it down. What matters most to you?"
+        assert tokenizer.stats()["first_chunks"] == {"clause": 1}
+
+    @pytest.mark.asyncio
+    async def test_conjunction_splits_before_the_conjunction(self):
+        """A clause joined by a conjunction is split in front of it"""
+        tokenizer = FirstChunkTokenizer(first_chunk_delay=10)
+        chunks = await _chunks(tokenizer, _words("I hear you and that makes sense. Tell me more."))
+
+        assert chunks[0] == "I hear you"
+
+    @pytest.mark.asyncio
+    async def test_short_openers_are_not_split(self):
+        """A comma before `min_words` words does not end the first chunk"""
+        tokenizer = FirstChunkTokenizer(first_chunk_delay=10)
+        chunks = await _chunks(tokenizer, _words("Okay, great. Let's start."))
+
+        assert chunks[0] == "Okay, great."
+        assert tokenizer.stats()["first_chunks"] == {"sentence": 1}
+
+    @pytest.mark.asyncio
+    async def test_word_limit(self):
+        """Without any break, the first chunk ends after `first_words` words"""
+        tokenizer = FirstChunkTokenizer(first_chunk_delay=10, min_words=3, max_words=5)
+        tokenizer.text_rate = 1000.0
+        chunks = await _chunks(tokenizer, _words("one two three four five six seven eight nine."))
+
+        assert chunks[0] == "one two three four five"
+
+    @pytest.mark.asyncio
+    async def test_slow_text_is_flushed_at_the_deadline(self):
+        """A slow LLM gets its complete words sent once the delay has passed"""
+        tokenizer = FirstChunkTokenizer(first_chunk_delay=0.05, max_words=50)
+        stream = tokenizer.stream()
+        stream.push_text("Let me think about ")
+        stream.push_text("wh")
+        await asyncio.sleep(0.1)
+        stream.push_text("at you said.")
+        stream.end_input()
+        chunks = [event.token async for event in stream]
+
+        assert chunks == ["Let me think about", "what you said."]
+        stats = tokenizer.stats()
+        assert stats["first_chunks"] == {"time": 1}
+        assert stats["saved_seconds"]["count"] == 1
+        assert stats["saved_seconds"]["p50"] >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_text_rate_tunes_first_words(self):
+        """A faster LLM gets a longer first chunk within the same delay"""
+        tokenizer = FirstChunkTokenizer(first_chunk_delay=0.3, min_words=3, max_words=12)
+        tokenizer.record_rate(chars=600, seconds=1.0)
+        fast = tokenizer.first_words
+        tokenizer.text_rate = None
+        tokenizer.record_rate(chars=60, seconds=1.0)
+
+        assert fast == 12
+        assert tokenizer.first_words == 3
+
+    @pytest.mark.asyncio
+    async def test_each_segment_starts_over(self):
+        """After a flush the next reply gets its own early first chunk"""
+        tokenizer = FirstChunkTokenizer(first_chunk_delay=10)
+        stream = tokenizer.stream()
+        stream.push_text("First reply here, with more text.")
+        stream.flush()
+        stream.push_text("Second reply here, also longer.")
+        stream.end_input()
+        chunks = [event.token async for event in stream]
+
+        assert chunks == ["First reply here,", "with more text.", "Second reply here,", "also longer."]
@@ -0,0 +1,128 @@
+"""
+Tests for the per-user memory digest
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from wellness_digest import MAX_RECENT_MOODS, MemoryDigest, MemoryDigests
+from wellness_io import AsyncWellnessStore
+from wellness_storage import WellnessStore
+
+
+def _entry(day: int, mood: str = "good", energy: str = "high", **extra) -> dict:
+    moment = datetime(2025, 1, 1, 9, 0) + timedelta(days=day)
+    return {
+        "date": moment.strftime("%Y-%m-%d"),
+        "time": moment.strftime("%H:%M:%S"),
+        "timestamp": moment.isoformat(),
+        "mood": mood,
+        "energy": energy,
+        "objectives": [f"task {day}", "stretch"],
+        **extra,
+    }
+
+
+class TestMemoryDigest:
+    """Test suite for MemoryDigest"""
+
+    def test_first_session(self):
+        """An empty digest says this is the first check-in"""
+        assert MemoryDigest().render() == "This is the user's first check-in session."
+
+    def test_render_mentions_recent_context(self):
+        """The rendered digest covers the last check-in, moods, energy and stressors"""
+        entries = [
+            _entry(1, mood="tired", energy="low", stressors="work deadline"),
+            _entry(2, mood="okay", energy="medium", stressors="deadline at work"),
+            _entry(3, mood="happy", energy="high", completed_objectives=["task 2"]),
+        ]
+        text = MemoryDigest.from_entries(entries).render()
+
+        assert "3 check-in(s) since 2025-01-02" in text
+        assert "Last check-in on 2025-01-04: mood happy, energy high" in text
+        assert "Recent moods, oldest first: tired, okay, happy" in text
+        assert "rising" in text
+        assert "Recurring stressors: work, deadline" in text
+        assert "Still open from an earlier check-in: stretch" in text
+
+    def test_size_is_bounded(self):
+        """A long history renders no longer than a short one with the same shape"""
+        def history(days: int) -> list:
+            return [
+                _entry(day, mood=f"mood{day % 7}", stressors=f"stressor{day % 13} and more{day % 11}")
+                for day in range(days)
+            ]
+
+        short = MemoryDigest.from_entries(history(20))
+        long = MemoryDigest.from_entries(history(2000))
+
+        assert len(long.recent_moods) == MAX_RECENT_MOODS
+        assert len(long.stressors) <= 8
+        assert abs(len(long.render()) - len(short.render())) < 40
+
+    def test_round_trips_through_dict(self):
+        """A persisted digest carries on exactly where it left off"""
+        entries = [_entry(day, stressors="sleep") for day in range(10)]
+        digest = MemoryDigest.from_entries(entries[:5])
+        restored = MemoryDigest(digest.to_dict())
+        for entry in entries[5:]:
+            restored.update(entry)
+
+        assert restored.to_dict() == MemoryDigest.from_entries(entries).to_dict()
+
+    def test_long_text_is_clipped(self):
+        """Free-text fields cannot grow the prompt without bound"""
+        digest = MemoryDigest.from_entries([_entry(1, mood="x" * 1000)])
+
+        assert len(digest.last["mood"]) <= 120
+
+
+class TestMemoryDigests:
+    """Test suite for loading and persisting digests"""
+
+    @pytest.mark.asyncio
+    async def test_record_persists_digest(self, tmp_path):
+        """Each save updates the stored digest without rereading history"""
+        store = AsyncWellnessStore(WellnessStore(tmp_path))
+        digests = MemoryDigests()
+        for day in range(3):
+            entry = _entry(day)
+            await store.append("alice", entry)
+            await digests.record("alice", entry, store)
+
+        saved = await store.get_digest("alice")
+        assert saved["check_ins"] == 3
+        assert (await digests.get("alice", store)).last["date"] == "2025-01-03"
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_missing_digest_is_built_from_history(self, tmp_path):
+        """Users with history from before digests existed get one built on first load"""
+        sync_store = WellnessStore(tmp_path)
+        for day in range(4):
+            sync_store.append("alice", _entry(day))
+        store = AsyncWellnessStore(sync_store)
+
+        digest = await MemoryDigests().get("alice", store)
+
+        assert digest.check_ins == 4
+        assert (await store.get_digest("alice"))["check_ins"] == 4
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_stale_digest_is_rebuilt(self, tmp_path):
+        """A digest that missed a save is rebuilt when the session starts"""
+        store = AsyncWellnessStore(WellnessStore(tmp_path))
+        digests = MemoryDigests()
+        first = _entry(1)
+        await store.append("alice", first)
+        await digests.record("alice", first, store)
+        await store.append("alice", _entry(2, mood="sad"))
+
+        digest = await digests.get("alice", store)
+
+        assert digest.check_ins == 2
+        assert digest.last["mood"] == "sad"
+        await store.close()
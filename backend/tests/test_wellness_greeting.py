@@ -0,0 +1,141 @@
+"""
+Tests for the greeting pipeline
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from livekit import rtc
+
+from wellness_greeting import AudioBuffer, GreetingPipeline
+from wellness_io import AsyncWellnessStore
+from wellness_prompt import FIRST_GREETING
+from wellness_storage import WellnessStore
+from wellness_tts_cache import TTSAudioCache
+
+
+class _Stream:
+    def __init__(self, items):
+        self._items = items
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for item in self._items:
+            await asyncio.sleep(0)
+            yield item
+
+
+class _FakeLLM:
+    def __init__(self, reply="Welcome back! ", error=None):
+        self.reply = reply
+        self.error = error
+        self.requests = []
+
+    def chat(self, *, chat_ctx):
+        self.requests.append(chat_ctx)
+        if self.error is not None:
+            raise self.error
+        words = [SimpleNamespace(delta=SimpleNamespace(content=w + " ")) for w in self.reply.split()]
+        return _Stream(words)
+
+
+class _FakeTTS:
+    sample_rate = 24000
+    num_channels = 1
+
+    def __init__(self):
+        self.requests = []
+
+    def synthesize(self, text):
+        self.requests.append(text)
+        frame = rtc.AudioFrame(b"\x00\x00" * 240, self.sample_rate, 1, 240)
+        return _Stream([SimpleNamespace(frame=frame)] * 4)
+
+
+def _entry() -> dict:
+    return {"date": "2025-01-01", "timestamp": "2025-01-01T09:00:00", "mood": "tired", "energy": "low", "objectives": ["sleep"]}
+
+
+class TestGreetingPipeline:
+    """Test suite for GreetingPipeline"""
+
+    @pytest.mark.asyncio
+    async def test_new_user_gets_cached_fixed_greeting(self, tmp_path):
+        """Users without check-ins hear the fixed greeting, with no LLM call"""
+        store = AsyncWellnessStore(WellnessStore(tmp_path / "logs"))
+        llm, tts, cache = _FakeLLM(), _FakeTTS(), TTSAudioCache(tmp_path / "tts")
+        pipeline = GreetingPipeline("alice", store, llm, tts, cache).start()
+
+        prepared = await pipeline.greeting(timeout=5)
+        frames = [frame async for frame in prepared.audio.play()]
+
+        assert prepared.text == FIRST_GREETING
+        assert not prepared.personalized
+        assert len(frames) == 4
+        assert llm.requests == []
+        assert cache.stats()["entries"] == 1
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_returning_user_gets_generated_greeting(self, tmp_path):
+        """The LLM writes the greeting from the user's digest, and its audio is synthesized"""
+        store = AsyncWellnessStore(WellnessStore(tmp_path))
+        await store.append("alice", _entry())
+        llm, tts = _FakeLLM("Welcome back! Last time you felt tired."), _FakeTTS()
+        pipeline = GreetingPipeline("alice", store, llm, tts).start()
+
+        assert (await pipeline.digest()).check_ins == 1
+        prepared = await pipeline.greeting(timeout=5)
+        frames = [frame async for frame in prepared.audio.play()]
+
+        assert prepared.text == "Welcome back! Last time you felt tired."
+        assert prepared.personalized
+        assert tts.requests == [prepared.text]
+        assert len(frames) == 4
+        assert "PREVIOUS CHECK-IN CONTEXT" in llm.requests[0].items[0].text_content
+        assert {"digest", "text", "first_audio", "session_wait"} <= set(pipeline.timings)
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_failure_falls_back_to_the_session(self, tmp_path):
+        """When the greeting cannot be generated the session greets on its own"""
+        store = AsyncWellnessStore(WellnessStore(tmp_path))
+        await store.append("alice", _entry())
+        pipeline = GreetingPipeline("alice", store, _FakeLLM(error=RuntimeError("down")), _FakeTTS()).start()
+
+        assert await pipeline.greeting(timeout=5) is None
+        await store.close()
+
+
+class TestAudioBuffer:
+    """Test suite for AudioBuffer"""
+
+    @pytest.mark.asyncio
+    async def test_playback_follows_synthesis(self):
+        """Frames play as soon as they arrive, until the buffer is closed"""
+        buffer = AudioBuffer()
+        frame = rtc.AudioFrame(b"\x00\x00" * 240, 24000, 1, 240)
+        played = []
+
+        async def play():
+            async for f in buffer.play():
+                played.append(f)
+
+        task = asyncio.ensure_future(play())
+        buffer.push(frame)
+        await asyncio.sleep(0.01)
+        assert len(played) == 1
+
+        buffer.push(frame)
+        buffer.close()
+        await task
+        assert len(played) == 2
@@ -0,0 +1,250 @@
+"""
+Tests for the async wellness storage I/O layer
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from wellness_io import AsyncWellnessStore, atomic_write
+from wellness_storage import WellnessStore
+
+
+def _entry(day: int, mood: str = "good") -> dict:
+    return {
+        "date": f"2025-11-{day:02d}",
+        "mood": mood,
+        "energy": "medium",
+        "objectives": [f"task {day}"],
+    }
+
+
+class _SlowStore:
+    """Store stand-in that records which threads served it and how often"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.reads = 0
+        self.threads = set()
+        self.entries = []
+        self.batches = []
+
+    def append_many(self, items):
+        self.threads.add(threading.get_ident())
+        self.batches.append(len(items))
+        self.entries.extend(entry for _, entry in items)
+
+    def latest(self, user_id):
+        self.threads.add(threading.get_ident())
+        self.reads += 1
+        time.sleep(self.delay)
+        return self.entries[-1] if self.entries else None
+
+    def tail(self, user_id, n):
+        self.threads.add(threading.get_ident())
+        self.reads += 1
+        time.sleep(self.delay)
+        return self.entries[-n:]
+
+
+class TestAtomicWrite:
+    """Test suite for atomic_write"""
+
+    def test_replaces_contents(self, tmp_path):
+        """The file holds exactly the new contents and no temporary file is left"""
+        path = tmp_path / "nested" / "data.json"
+        atomic_write(path, "old")
+        atomic_write(path, b"new")
+
+        assert path.read_text() == "new"
+        assert [p.name for p in path.parent.iterdir()] == ["data.json"]
+
+    def test_failed_write_keeps_old_contents(self, tmp_path):
+        """A write that fails leaves the previous file untouched"""
+        path = tmp_path / "data.json"
+        atomic_write(path, "old")
+
+        with pytest.raises(TypeError):
+            atomic_write(path, 42)
+
+        assert path.read_text() == "old"
+        assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+class TestAsyncWellnessStore:
+    """Test suite for AsyncWellnessStore"""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_through_journal_store(self, tmp_path):
+        """Reads and writes reach the wrapped store"""
+        store = AsyncWellnessStore(WellnessStore(tmp_path))
+        for day in range(1, 4):
+            await store.append("alice", _entry(day))
+
+        assert (await store.latest("alice"))["date"] == "2025-11-03"
+        assert [e["date"] for e in await store.tail("alice", 2)] == ["2025-11-02", "2025-11-03"]
+        assert len(await store.entries("alice")) == 3
+        assert await store.latest("bob") is None
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_runs_off_the_event_loop(self):
+        """Storage calls run on the I/O threads, never the loop thread"""
+        backend = _SlowStore(delay=0)
+        store = AsyncWellnessStore(backend, max_workers=2)
+        await store.append("alice", _entry(1))
+        await store.latest("alice")
+
+        assert threading.get_ident() not in backend.threads
+        assert len(backend.threads) <= 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_reads_are_coalesced(self):
+        """Reads of the same data in flight together share one disk read"""
+        backend = _SlowStore()
+        backend.entries.append(_entry(1))
+        store = AsyncWellnessStore(backend)
+
+        results = await asyncio.gather(*(store.latest("alice") for _ in range(5)))
+
+        assert all(result["date"] == "2025-11-01" for result in results)
+        assert backend.reads == 1
+        assert store.coalesced_reads == 4
+
+    @pytest.mark.asyncio
+    async def test_tail_copies_are_independent(self):
+        """Callers sharing a coalesced read each get their own list"""
+        backend = _SlowStore()
+        backend.entries.append(_entry(1))
+        store = AsyncWellnessStore(backend)
+
+        first, second = await asyncio.gather(store.tail("alice", 5), store.tail("alice", 5))
+        first.clear()
+
+        assert len(second) == 1
+
+    @pytest.mark.asyncio
+    async def test_read_after_write_does_not_join_earlier_read(self):
+        """A read started after a write sees that write"""
+        backend = _SlowStore()
+        backend.entries.append(_entry(1))
+        store = AsyncWellnessStore(backend)
+
+        before = asyncio.ensure_future(store.latest("alice"))
+        await asyncio.sleep(0)
+        await store.append("alice", _entry(2))
+        after = await store.latest("alice")
+        await before
+
+        assert after["date"] == "2025-11-02"
+        assert backend.reads == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_read(self):
+        """One caller giving up leaves the read running for the others"""
+        backend = _SlowStore()
+        backend.entries.append(_entry(1))
+        store = AsyncWellnessStore(backend)
+
+        first = asyncio.ensure_future(store.latest("alice"))
+        second = asyncio.ensure_future(store.latest("alice"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert (await second)["date"] == "2025-11-01"
+
+    @pytest.mark.asyncio
+    async def test_write_file(self, tmp_path):
+        """write_file atomically replaces a file from the I/O threads"""
+        store = AsyncWellnessStore(_SlowStore())
+        await store.write_file(tmp_path / "out.json", '{"ok": true}')
+
+        assert (tmp_path / "out.json").read_text() == '{"ok": true}'
+
+    @pytest.mark.asyncio
+    async def test_concurrent_saves_are_group_committed(self):
+        """Saves arriving within the commit window go to the store as one batch"""
+        backend = _SlowStore(delay=0)
+        store = AsyncWellnessStore(backend, commit_window=0.02)
+
+        await asyncio.gather(*(store.append(f"user{i % 3}", _entry(i + 1)) for i in range(10)))
+
+        assert backend.batches == [10]
+        assert len(backend.entries) == 10
+        assert store.group_commits == 1
+        assert store.grouped_appends == 10
+
+    @pytest.mark.asyncio
+    async def test_full_batch_commits_without_waiting(self):
+        """Reaching max_batch commits right away instead of waiting out the window"""
+        backend = _SlowStore(delay=0)
+        store = AsyncWellnessStore(backend, commit_window=10.0, max_batch=4)
+
+        await asyncio.wait_for(
+            asyncio.gather(*(store.append("alice", _entry(i + 1)) for i in range(4))),
+            timeout=1.0,
+        )
+
+        assert backend.batches == [4]
+
+    @pytest.mark.asyncio
+    async def test_batches_are_committed_in_order(self):
+        """A batch is not handed to the store until the one before it has been written"""
+        backend = _SlowStore(delay=0)
+        first_started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def append_many(items):
+            calls.append([entry["date"] for _, entry in items])
+            if len(calls) == 1:
+                first_started.set()
+                release.wait(1.0)
+            else:
+                assert release.is_set(), "second batch started before the first finished"
+
+        backend.append_many = append_many
+        store = AsyncWellnessStore(backend, commit_window=10.0, max_batch=2)
+
+        first = asyncio.gather(store.append("alice", _entry(1)), store.append("alice", _entry(2)))
+        await asyncio.get_running_loop().run_in_executor(None, first_started.wait, 1.0)
+        second = asyncio.gather(store.append("alice", _entry(3)), store.append("alice", _entry(4)))
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.wait_for(asyncio.gather(first, second), timeout=1.0)
+
+        assert calls == [["2025-11-01", "2025-11-02"], ["2025-11-03", "2025-11-04"]]
+        assert store.group_commits == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_fails_every_caller(self):
+        """Every save in a batch that could not be written raises"""
+        backend = _SlowStore(delay=0)
+
+        def fail(items):
+            raise OSError("disk full")
+
+        backend.append_many = fail
+        store = AsyncWellnessStore(backend)
+
+        results = await asyncio.gather(
+            store.append("alice", _entry(1)),
+            store.append("bob", _entry(2)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, OSError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_close_commits_pending_saves(self, tmp_path):
+        """Saves still waiting for their window are written before the store closes"""
+        store = AsyncWellnessStore(WellnessStore(tmp_path), commit_window=10.0)
+        save = asyncio.ensure_future(store.append("alice", _entry(1)))
+        await asyncio.sleep(0)
+
+        await store.close()
+        await save
+
+        assert [e["date"] for e in WellnessStore(tmp_path).entries("alice")] == ["2025-11-01"]
@@ -0,0 +1,211 @@
+"""
+Tests for the background Notion sync queue
+"""
+
+import json
+from typing import Optional
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+from notion_client.errors import APIErrorCode, APIResponseError
+
+from wellness_notion_sync import NotionSyncQueue, idempotency_key
+
+
+def _entry(timestamp: str = "2025-11-24T09:00:00") -> dict:
+    return {
+        "date": timestamp[:10],
+        "timestamp": timestamp,
+        "mood": "good",
+        "energy": "high",
+        "objectives": ["Exercise"],
+    }
+
+
+def _api_error(code: APIErrorCode, status: int, headers: Optional[dict] = None) -> APIResponseError:
+    response = httpx.Response(status, headers=headers or {})
+    return APIResponseError(response, "error", code)
+
+
+def _notion(side_effect=None) -> Mock:
+    notion = Mock()
+    notion.create_wellness_entry = AsyncMock(
+        side_effect=side_effect,
+        return_value={"success": True, "page_id": "page-1"},
+    )
+    return notion
+
+
+class TestNotionSyncQueue:
+    """Test suite for NotionSyncQueue"""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_returns_before_delivery(self, tmp_path):
+        """enqueue() only persists the item; the worker delivers it"""
+        notion = _notion()
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion)
+
+        key = await queue.enqueue("alice", _entry())
+        assert (tmp_path / "pending" / f"{key}.json").exists()
+        notion.create_wellness_entry.assert_not_awaited()
+
+        queue.start()
+        assert await queue.drain(timeout=2.0)
+        await queue.stop()
+
+        notion.create_wellness_entry.assert_awaited_once()
+        assert not (tmp_path / "pending" / f"{key}.json").exists()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_check_in_is_sent_once(self, tmp_path):
+        """The same check-in enqueued twice produces a single Notion page"""
+        notion = _notion()
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion)
+        queue.start()
+
+        first = await queue.enqueue("alice", _entry())
+        assert await queue.drain(timeout=2.0)
+        second = await queue.enqueue("alice", _entry())
+        assert await queue.drain(timeout=2.0)
+        await queue.stop()
+
+        assert first == second
+        assert notion.create_wellness_entry.await_count == 1
+        assert idempotency_key("bob", _entry()) != first
+
+    @pytest.mark.asyncio
+    async def test_pending_items_survive_restart(self, tmp_path):
+        """Items written by one queue are delivered by the next one started on the same directory"""
+        await NotionSyncQueue(tmp_path, client_factory=_notion).enqueue("alice", _entry())
+
+        notion = _notion()
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion)
+        queue.start()
+        assert await queue.drain(timeout=2.0)
+        await queue.stop()
+
+        notion.create_wellness_entry.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self, tmp_path):
+        """Rate limits and timeouts are retried with backoff until they succeed"""
+        notion = _notion(side_effect=[
+            _api_error(APIErrorCode.RateLimited, 429),
+            httpx.ConnectError("boom"),
+            {"success": True, "page_id": "page-1"},
+        ])
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion, base_backoff=0.01)
+        queue.start()
+        await queue.enqueue("alice", _entry())
+        assert await queue.drain(timeout=2.0)
+        await queue.stop()
+
+        assert notion.create_wellness_entry.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_after_header_is_honoured(self, tmp_path):
+        """A Retry-After header sets the minimum delay before the next attempt"""
+        notion = _notion(side_effect=_api_error(APIErrorCode.RateLimited, 429, {"retry-after": "30"}))
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion, base_backoff=0.01)
+        key = await queue.enqueue("alice", _entry())
+
+        with patch("wellness_notion_sync.time.time", return_value=1000.0):
+            await queue._deliver(queue._pending[key])
+
+        assert queue._pending[key]["next_attempt_at"] == pytest.approx(1030.0)
+        saved = json.loads((tmp_path / "pending" / f"{key}.json").read_text())
+        assert saved["attempts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_permanent_errors_move_to_failed(self, tmp_path):
+        """Validation errors are not retried and the item is parked in failed/"""
+        notion = _notion(side_effect=_api_error(APIErrorCode.ValidationError, 400))
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion)
+        queue.start()
+        key = await queue.enqueue("alice", _entry())
+        assert await queue.drain(timeout=2.0)
+        await queue.stop()
+
+        assert notion.create_wellness_entry.await_count == 1
+        assert (tmp_path / "failed" / f"{key}.json").exists()
+        assert queue.pending_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_requests_are_paced(self, tmp_path):
+        """Back-to-back deliveries are spaced by the configured rate"""
+        notion = _notion()
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion, rate_per_sec=20.0)
+        for i in range(3):
+            await queue.enqueue("alice", _entry(f"2025-11-24T09:00:0{i}"))
+
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        with patch("wellness_notion_sync.asyncio.sleep", fake_sleep):
+            for _ in range(3):
+                await queue._pace()
+
+        # The clock does not advance, so each request waits one more slot
+        assert sleeps == [pytest.approx(0.05, abs=0.01), pytest.approx(0.10, abs=0.01)]
+
+    @pytest.mark.asyncio
+    async def test_queues_sharing_a_directory_send_once(self, tmp_path):
+        """Job processes resuming the same items deliver each of them once"""
+        for i in range(5):
+            await NotionSyncQueue(tmp_path).enqueue("alice", _entry(f"2025-11-24T09:00:0{i}"))
+
+        notion = _notion()
+        queues = [NotionSyncQueue(tmp_path, client_factory=lambda: notion, rate_per_sec=1000.0) for _ in range(3)]
+        for queue in queues:
+            queue.start()
+        for queue in queues:
+            assert await queue.drain(timeout=2.0)
+            await queue.stop()
+
+        assert notion.create_wellness_entry.await_count == 5
+        assert len((tmp_path / "sent.log").read_text().split()) == 5
+
+    @pytest.mark.asyncio
+    async def test_delivered_items_are_not_resent_after_a_crash(self, tmp_path):
+        """An item delivered just before a crash is recognised from sent.log"""
+        key = await NotionSyncQueue(tmp_path).enqueue("alice", _entry())
+        (tmp_path / "sent.log").write_text(f"{key}\n")
+
+        notion = _notion()
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion)
+        queue.start()
+        assert await queue.drain(timeout=2.0)
+        await queue.stop()
+
+        notion.create_wellness_entry.assert_not_awaited()
+        assert not (tmp_path / "pending" / f"{key}.json").exists()
+        assert key in queue._sent
+
+    @pytest.mark.asyncio
+    async def test_items_claimed_by_a_dead_process_are_recovered(self, tmp_path):
+        """Items left in the inflight directory of an exited process are delivered"""
+        key = await NotionSyncQueue(tmp_path).enqueue("alice", _entry())
+        orphan_dir = tmp_path / "inflight" / "999999999"
+        orphan_dir.mkdir(parents=True)
+        (tmp_path / "pending" / f"{key}.json").rename(orphan_dir / f"{key}.json")
+
+        notion = _notion()
+        queue = NotionSyncQueue(tmp_path, client_factory=lambda: notion)
+        queue.start()
+        assert await queue.drain(timeout=2.0)
+        await queue.stop()
+
+        notion.create_wellness_entry.assert_awaited_once()
+        assert not orphan_dir.exists()
+
+    @pytest.mark.asyncio
+    async def test_drain_without_start(self, tmp_path):
+        """drain() returns straight away when the queue was never started"""
+        queue = NotionSyncQueue(tmp_path)
+
+        assert await queue.drain(timeout=2.0)
+        await queue.enqueue("alice", _entry())
+        assert not await queue.drain(timeout=2.0)
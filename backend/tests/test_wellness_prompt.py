@@ -0,0 +1,44 @@
+"""
+Tests for the cache-friendly system prompt layout
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+
+from wellness_digest import MemoryDigest
+from wellness_prompt import PREFIX_FINGERPRINT, STATIC_INSTRUCTIONS, build_instructions
+
+
+def _entry(day: int, mood: str) -> dict:
+    moment = datetime(2025, 1, 1, 9, 0) + timedelta(days=day)
+    return {
+        "date": moment.strftime("%Y-%m-%d"),
+        "timestamp": moment.isoformat(),
+        "mood": mood,
+        "energy": "medium",
+        "objectives": ["walk"],
+    }
+
+
+class TestPromptLayout:
+    """Test suite for build_instructions"""
+
+    def test_prefix_is_shared_across_users(self):
+        """Different users' prompts differ only after the static prefix"""
+        first = build_instructions(MemoryDigest().render())
+        second = build_instructions(MemoryDigest.from_entries([_entry(1, "tired"), _entry(2, "happy")]).render())
+
+        assert first != second
+        assert first.startswith(STATIC_INSTRUCTIONS)
+        assert second.startswith(STATIC_INSTRUCTIONS)
+
+    def test_prefix_has_no_session_data(self):
+        """Nothing date- or user-specific leaks into the static prefix"""
+        assert "{" not in STATIC_INSTRUCTIONS
+        assert str(datetime.now().year) not in STATIC_INSTRUCTIONS
+        assert "PREVIOUS CHECK-IN CONTEXT" not in STATIC_INSTRUCTIONS
+
+    def test_fingerprint_is_stable(self):
+        """The fingerprint identifies the prefix"""
+        assert len(PREFIX_FINGERPRINT) == 12
+        assert hashlib.sha256(STATIC_INSTRUCTIONS.encode("utf-8")).hexdigest()[:12] == PREFIX_FINGERPRINT
@@ -0,0 +1,146 @@
+"""
+Tests for the per-process provider registry
+"""
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+from wellness_batching import BatchedVADSession
+from wellness_providers import (
+    JOB_SHARED_PROVIDERS,
+    LOOP_PROVIDERS,
+    SHARED_PROVIDERS,
+    ProviderRegistry,
+)
+
+
+class _Provider:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+def _registry():
+    built = Counter()
+
+    def factory(name):
+        def build():
+            built[name] += 1
+            return _Provider(name)
+        return build
+
+    registry = ProviderRegistry({name: factory(name) for name in SHARED_PROVIDERS + JOB_SHARED_PROVIDERS + LOOP_PROVIDERS})
+    return registry, built
+
+
+class TestProviderRegistry:
+    """Test suite for ProviderRegistry"""
+
+    def test_prewarmed_set_is_handed_to_first_job(self):
+        """A job after prewarm only builds what needs its job context"""
+        registry, built = _registry()
+        registry.prewarm()
+        before = dict(built)
+
+        async def job():
+            providers = registry.acquire()
+            await registry.release()
+            return providers
+
+        providers = asyncio.run(job())
+
+        assert dict(built) == {**before, **dict.fromkeys(JOB_SHARED_PROVIDERS, 1)}
+        assert providers.tts.closed
+        assert registry.stats()["prewarmed"] == 1
+
+    def test_sessions_on_one_loop_share_providers(self):
+        """A second session on the same loop reuses the loop's connection pools"""
+        registry, built = _registry()
+
+        async def job():
+            first = registry.acquire()
+            second = registry.acquire()
+            await registry.release()
+            await registry.release()
+            return first, second
+
+        first, second = asyncio.run(job())
+
+        assert first.stt is second.stt
+        assert built["stt"] == 1
+        assert registry.stats() == {"prewarmed": 0, "reused": 1, "cold": 1, "active_loops": 0}
+
+    def test_last_session_on_a_loop_closes_its_providers(self):
+        """A session ending does not close pools another session on its loop still uses"""
+        registry, _ = _registry()
+
+        async def job():
+            providers = registry.acquire()
+            registry.acquire()
+            await registry.release()
+            still_open = not providers.stt.closed and registry.stats()["active_loops"] == 1
+            await registry.release()
+            return providers, still_open
+
+        providers, still_open = asyncio.run(job())
+
+        assert still_open
+        assert providers.stt.closed and providers.llm.closed and providers.tts.closed
+        assert registry.stats()["active_loops"] == 0
+
+    def test_shared_providers_outlive_jobs(self):
+        """Each job's loop gets its own pools, but shared providers are built once"""
+        registry, built = _registry()
+
+        async def job():
+            providers = registry.acquire()
+            await registry.release()
+            return providers
+
+        first = asyncio.run(job())
+        second = asyncio.run(job())
+
+        assert first.vad is second.vad
+        assert first.tts is not second.tts
+        assert all(built[name] == 1 for name in SHARED_PROVIDERS + JOB_SHARED_PROVIDERS)
+        assert all(built[name] == 2 for name in LOOP_PROVIDERS)
+        assert not first.vad.closed
+
+    def test_job_context_providers_wait_for_the_first_job(self):
+        """The turn detector is built by the first acquire(), not by prewarm"""
+        registry, built = _registry()
+        registry.prewarm()
+
+        assert all(built[name] == 0 for name in JOB_SHARED_PROVIDERS)
+
+        async def job():
+            providers = registry.acquire()
+            await registry.release()
+            return providers
+
+        assert asyncio.run(job()).turn_detection.name == "turn_detection"
+
+    def test_prewarm_with_default_factories_outside_a_job(self, monkeypatch):
+        """Prewarm runs before any job context exists, with the real providers"""
+        for key in ("DEEPGRAM_API_KEY", "GOOGLE_API_KEY", "MURF_API_KEY"):
+            monkeypatch.setenv(key, "test")
+        registry = ProviderRegistry()
+
+        registry.prewarm()
+
+        with pytest.raises(RuntimeError, match="no job context"):
+            registry._build(JOB_SHARED_PROVIDERS)
+
+    def test_vad_is_batched_only_when_opted_in(self, monkeypatch):
+        """Jobs in separate processes cannot share batches, so plain Silero is the default"""
+        for key in ("DEEPGRAM_API_KEY", "GOOGLE_API_KEY", "MURF_API_KEY"):
+            monkeypatch.setenv(key, "test")
+
+        assert not isinstance(ProviderRegistry()._build(["vad"])["vad"]._onnx_session, BatchedVADSession)
+        monkeypatch.setenv("WELLNESS_BATCH_VAD", "1")
+        assert isinstance(ProviderRegistry()._build(["vad"])["vad"]._onnx_session, BatchedVADSession)
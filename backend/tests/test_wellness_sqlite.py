@@ -0,0 +1,153 @@
+"""
+Tests for the SQLite wellness storage backend
+"""
+
+import json
+import sqlite3
+import threading
+
+from wellness_sqlite import SQLiteWellnessStore, import_legacy_log
+
+
+def _entry(date: str, mood: str = "good", energy: str = "medium", **extra) -> dict:
+    return {
+        "date": date,
+        "time": "09:00:00",
+        "timestamp": f"{date}T09:00:00",
+        "mood": mood,
+        "energy": energy,
+        "objectives": [f"plan for {date}"],
+        **extra,
+    }
+
+
+class TestSQLiteWellnessStore:
+    """Test suite for SQLiteWellnessStore"""
+
+    def test_round_trip(self, tmp_path):
+        """Entries come back exactly as they were saved"""
+        store = SQLiteWellnessStore(tmp_path / "wellness.db")
+        entry = _entry("2025-11-20", stressors="deadline", summary="busy day", custom="kept")
+        store.append("alice", entry)
+
+        assert store.latest("alice") == entry
+        assert store.latest("bob") is None
+        store.close()
+
+    def test_tail_returns_most_recent_in_order(self, tmp_path):
+        """tail() returns the last N entries oldest first"""
+        store = SQLiteWellnessStore(tmp_path / "wellness.db")
+        for day in range(1, 8):
+            store.append("alice", _entry(f"2025-11-{day:02d}"))
+        store.append("bob", _entry("2025-11-30"))
+
+        assert [e["date"] for e in store.tail("alice", 3)] == [
+            "2025-11-05",
+            "2025-11-06",
+            "2025-11-07",
+        ]
+        assert len(store.entries("alice")) == 7
+        store.close()
+
+    def test_query_by_date_and_energy(self, tmp_path):
+        """query() filters by date range and case-insensitive energy"""
+        store = SQLiteWellnessStore(tmp_path / "wellness.db")
+        store.append("alice", _entry("2025-10-30", energy="low"))
+        store.append("alice", _entry("2025-11-03", energy="Low"))
+        store.append("alice", _entry("2025-11-04", energy="high"))
+        store.append("alice", _entry("2025-11-10", energy="low"))
+
+        low = store.query("alice", since="2025-11-01", until="2025-11-30", energy="low")
+        assert [e["date"] for e in low] == ["2025-11-03", "2025-11-10"]
+        assert len(store.query("alice", limit=2)) == 2
+        store.close()
+
+    def test_uses_wal_and_indexes(self, tmp_path):
+        """The database runs in WAL mode with the expected indexes"""
+        store = SQLiteWellnessStore(tmp_path / "wellness.db")
+        store.append("alice", _entry("2025-11-01"))
+        store.close()
+
+        conn = sqlite3.connect(tmp_path / "wellness.db")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {
+            "idx_check_ins_user_date",
+            "idx_check_ins_user_timestamp",
+            "idx_check_ins_user_mood",
+            "idx_check_ins_user_energy",
+        } <= indexes
+        conn.close()
+
+    def test_concurrent_threads(self, tmp_path):
+        """Writes from several threads are all stored"""
+        store = SQLiteWellnessStore(tmp_path / "wellness.db")
+
+        def save(user: str) -> None:
+            for day in range(1, 11):
+                store.append(user, _entry(f"2025-11-{day:02d}"))
+
+        threads = [threading.Thread(target=save, args=(user,)) for user in ("a", "b", "c")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert store.stats()["check_ins"] == 30
+        store.close()
+
+
+    def test_append_many_is_one_transaction(self, tmp_path):
+        """A batch for several users is stored in order and leaves synchronous at NORMAL"""
+        store = SQLiteWellnessStore(tmp_path / "wellness.db")
+        store.append_many([
+            ("alice", _entry("2025-11-01")),
+            ("bob", _entry("2025-11-02")),
+            ("alice", _entry("2025-11-03")),
+        ])
+
+        assert [e["date"] for e in store.entries("alice")] == ["2025-11-01", "2025-11-03"]
+        assert store.latest("bob")["date"] == "2025-11-02"
+        (synchronous,) = store._connection().execute("PRAGMA synchronous").fetchone()
+        assert synchronous == 1
+        store.close()
+
+
+    def test_digest_round_trip(self, tmp_path):
+        """Digests are stored per user and replaced on update"""
+        store = SQLiteWellnessStore(tmp_path / "wellness.db")
+        assert store.get_digest("alice") is None
+
+        store.put_digest("alice", {"check_ins": 1})
+        store.put_digest("alice", {"check_ins": 2})
+        store.put_digest("bob", {"check_ins": 7})
+
+        assert store.get_digest("alice") == {"check_ins": 2}
+        assert store.get_digest("bob") == {"check_ins": 7}
+        store.close()
+
+
+class TestLegacyImport:
+    """Test suite for importing wellness_log.json"""
+
+    def test_imports_legacy_log_on_first_use(self, tmp_path):
+        """The legacy log is imported for the default user and retired"""
+        legacy = tmp_path / "wellness_log.json"
+        legacy.write_text(json.dumps({"entries": [_entry("2025-11-01"), _entry("2025-11-02")]}))
+
+        store = SQLiteWellnessStore(tmp_path / "wellness.db", legacy_path=legacy)
+        assert store.latest("default")["date"] == "2025-11-02"
+        assert not legacy.exists()
+        assert (tmp_path / "wellness_log.json.migrated").exists()
+        store.close()
+
+    def test_import_into_named_user(self, tmp_path):
+        """import_legacy_log can target a specific user"""
+        legacy = tmp_path / "wellness_log.json"
+        legacy.write_text(json.dumps({"entries": [_entry("2025-11-01")]}))
+
+        store = SQLiteWellnessStore(tmp_path / "wellness.db")
+        assert import_legacy_log(legacy, store, user_id="alice") == 1
+        assert store.latest("alice")["date"] == "2025-11-01"
+        assert store.latest("default") is None
+        store.close()
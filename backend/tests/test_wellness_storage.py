@@ -0,0 +1,307 @@
+"""
+Tests for the wellness check-in storage engine
+"""
+
+import json
+import threading
+from unittest.mock import patch
+
+import wellness_storage
+from wellness_storage import (
+    HistoryCache,
+    WellnessJournal,
+    WellnessStore,
+    migrate_legacy_log,
+    shard_name,
+)
+
+
+def _entry(day: int, mood: str = "good") -> dict:
+    return {
+        "date": f"2025-11-{day:02d}",
+        "mood": mood,
+        "energy": "medium",
+        "objectives": [f"task {day}"],
+    }
+
+
+class TestWellnessJournal:
+    """Test suite for the append-only JSONL journal"""
+
+    def test_append_and_read(self, tmp_path):
+        """Entries are appended one per line and read back in order"""
+        journal = WellnessJournal(tmp_path / "log.jsonl")
+        journal.append(_entry(1))
+        journal.append(_entry(2, mood="tired"))
+        journal.close()
+
+        lines = (tmp_path / "log.jsonl").read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[1])["mood"] == "tired"
+        assert [e["date"] for e in journal.entries()] == ["2025-11-01", "2025-11-02"]
+
+    def test_missing_journal_is_empty(self, tmp_path):
+        """Reading a journal that was never written returns no entries"""
+        journal = WellnessJournal(tmp_path / "log.jsonl")
+        assert journal.entries() == []
+
+    def test_fsync_is_batched(self, tmp_path):
+        """Appends are fsynced once per batch rather than once per entry"""
+        journal = WellnessJournal(tmp_path / "log.jsonl", fsync_every=3, fsync_interval=60)
+
+        with patch("wellness_storage.os.fsync") as mock_fsync:
+            for day in range(1, 7):
+                journal.append(_entry(day))
+            assert mock_fsync.call_count == 2
+
+            journal.append(_entry(7))
+            journal.flush()
+            assert mock_fsync.call_count == 3
+
+        journal.close()
+
+    def test_torn_last_line_is_recovered(self, tmp_path):
+        """A partially written last line is dropped and appends continue cleanly"""
+        path = tmp_path / "log.jsonl"
+        path.write_text(json.dumps(_entry(1)) + "\n" + '{"date": "2025-11-02", "mo')
+
+        journal = WellnessJournal(path)
+        assert len(journal.entries()) == 1
+
+        journal.append(_entry(3))
+        journal.close()
+
+        assert [e["date"] for e in journal.entries()] == ["2025-11-01", "2025-11-03"]
+
+    def test_reopens_after_file_removed(self, tmp_path):
+        """Removing the journal underneath an open handle starts a fresh file"""
+        path = tmp_path / "log.jsonl"
+        journal = WellnessJournal(path)
+        journal.append(_entry(1))
+        path.unlink()
+
+        journal.append(_entry(2))
+        journal.close()
+
+        assert [e["date"] for e in journal.entries()] == ["2025-11-02"]
+
+
+class TestTailReads:
+    """Test suite for reading recent entries from the end of the journal"""
+
+    def test_tail_spans_multiple_blocks(self, tmp_path):
+        """tail() returns the last N entries even when they cross block boundaries"""
+        journal = WellnessJournal(tmp_path / "log.jsonl")
+        for day in range(1, 29):
+            journal.append(_entry(day, mood="x" * 100))
+        journal.close()
+
+        with patch.object(wellness_storage, "_TAIL_BLOCK_SIZE", 64):
+            recent = journal.tail(3)
+
+        assert [e["date"] for e in recent] == ["2025-11-26", "2025-11-27", "2025-11-28"]
+        assert len(journal.tail(100)) == 28
+        assert journal.tail(0) == []
+
+    def test_tail_ignores_torn_last_line(self, tmp_path):
+        """A torn last line is not returned as an entry"""
+        path = tmp_path / "log.jsonl"
+        path.write_text(json.dumps(_entry(1)) + "\n" + json.dumps(_entry(2)) + "\n" + '{"da')
+
+        journal = WellnessJournal(path)
+        assert [e["date"] for e in journal.tail(1)] == ["2025-11-02"]
+        assert journal.latest()["date"] == "2025-11-02"
+
+    def test_latest_sees_other_writers(self, tmp_path):
+        """latest() reads the end of the journal on disk, including appends by other writers"""
+        path = tmp_path / "log.jsonl"
+        journal = WellnessJournal(path)
+        journal.append(_entry(1))
+        journal.close()
+
+        with open(path, "a") as f:
+            f.write(json.dumps(_entry(2)) + "\n")
+
+        assert journal.latest()["date"] == "2025-11-02"
+        assert [p.name for p in tmp_path.iterdir()] == ["log.jsonl"]
+
+    def test_latest_without_history(self, tmp_path):
+        """latest() returns None for an empty journal"""
+        journal = WellnessJournal(tmp_path / "log.jsonl")
+        assert journal.latest() is None
+
+
+class TestHistoryCache:
+    """Test suite for the in-process write-through history cache"""
+
+    def test_repeat_reads_hit_cache(self, tmp_path):
+        """Only the first read goes to disk"""
+        journal = WellnessJournal(tmp_path / "log.jsonl")
+        journal.append(_entry(1))
+        journal.append(_entry(2))
+        cache = HistoryCache()
+
+        assert cache.latest(journal)["date"] == "2025-11-02"
+        with patch.object(journal, "tail", side_effect=AssertionError("read from disk")):
+            assert [e["date"] for e in cache.tail(journal, 5)] == ["2025-11-01", "2025-11-02"]
+
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_append_writes_through(self, tmp_path):
+        """Appends reach the journal and the cached history without a reload"""
+        journal = WellnessJournal(tmp_path / "log.jsonl")
+        cache = HistoryCache(window=2)
+        cache.append(journal, _entry(1))
+        cache.tail(journal, 2)
+
+        cache.append(journal, _entry(2))
+        cache.append(journal, _entry(3))
+
+        with patch.object(journal, "tail", side_effect=AssertionError("read from disk")):
+            assert [e["date"] for e in cache.tail(journal, 2)] == ["2025-11-02", "2025-11-03"]
+        assert len(journal.entries()) == 3
+
+    def test_external_write_invalidates(self, tmp_path):
+        """A write that bypasses the cache is picked up on the next read"""
+        path = tmp_path / "log.jsonl"
+        journal = WellnessJournal(path)
+        cache = HistoryCache()
+        cache.append(journal, _entry(1))
+        assert cache.latest(journal)["date"] == "2025-11-01"
+
+        other = WellnessJournal(path)
+        other.append(_entry(2))
+        other.close()
+
+        assert cache.latest(journal)["date"] == "2025-11-02"
+        assert cache.stats()["misses"] == 2
+
+    def test_lru_eviction(self, tmp_path):
+        """The least recently used journal is evicted when the cache is full"""
+        journals = [WellnessJournal(tmp_path / f"user{i}.jsonl") for i in range(3)]
+        for journal in journals:
+            journal.append(_entry(1))
+        cache = HistoryCache(max_users=2)
+
+        cache.latest(journals[0])
+        cache.latest(journals[1])
+        cache.latest(journals[0])
+        cache.latest(journals[2])
+
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["users"] == 2
+        cache.latest(journals[0])
+        assert cache.stats()["hits"] == 2
+
+
+class TestWellnessStore:
+    """Test suite for per-user partitioned storage"""
+
+    def test_users_are_isolated(self, tmp_path):
+        """Each user reads back only their own check-ins"""
+        store = WellnessStore(tmp_path)
+        store.append("alice", _entry(1, mood="happy"))
+        store.append("bob", _entry(2, mood="tired"))
+
+        assert store.latest("alice")["mood"] == "happy"
+        assert store.latest("bob")["mood"] == "tired"
+        assert store.latest("carol") is None
+        assert sorted(p.name for p in tmp_path.glob("*.jsonl")) == ["alice.jsonl", "bob.jsonl"]
+        store.close()
+
+    def test_concurrent_writers_lose_nothing(self, tmp_path):
+        """Parallel saves for the same and for different users are all kept"""
+        store = WellnessStore(tmp_path)
+
+        def save(user: str) -> None:
+            for day in range(1, 21):
+                store.append(user, _entry(day))
+
+        threads = [threading.Thread(target=save, args=(user,)) for user in ("a", "a", "b", "c")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.close()
+
+        assert len(store.entries("a")) == 40
+        assert len(store.entries("b")) == 20
+        assert len(store.entries("c")) == 20
+
+    def test_append_many_syncs_once_per_user(self, tmp_path):
+        """A batch is written with one write and one fsync per user journal"""
+        store = WellnessStore(tmp_path)
+        store.append("alice", _entry(1))
+        assert store.tail("alice", 5)
+
+        items = [("alice", _entry(2)), ("bob", _entry(3)), ("alice", _entry(4))]
+        with patch("wellness_storage.os.fsync") as mock_fsync:
+            store.append_many(items)
+            assert mock_fsync.call_count == 2
+
+        assert [e["date"] for e in store.tail("alice", 5)] == [
+            "2025-11-01",
+            "2025-11-02",
+            "2025-11-04",
+        ]
+        assert store.latest("bob")["date"] == "2025-11-03"
+        store.close()
+
+    def test_open_journals_are_bounded(self, tmp_path):
+        """Least recently used shards are closed once max_open is exceeded"""
+        store = WellnessStore(tmp_path, max_open=2)
+        for user in ("a", "b", "c"):
+            store.append(user, _entry(1))
+
+        assert len(store._journals) == 2
+        assert store.latest("a")["date"] == "2025-11-01"
+        store.close()
+
+    def test_legacy_log_goes_to_default_user(self, tmp_path):
+        """The old single-file log becomes the default user's history"""
+        legacy = tmp_path / "wellness_log.json"
+        legacy.write_text(json.dumps({"entries": [_entry(1)]}))
+
+        store = WellnessStore(tmp_path / "logs", legacy_path=legacy)
+        assert store.latest("someone") is None
+        assert store.latest("default")["date"] == "2025-11-01"
+
+    def test_shard_names(self):
+        """Identities map to safe, distinct file names"""
+        assert shard_name("voice_assistant_user_42") == "voice_assistant_user_42"
+        assert shard_name("") == "default"
+        assert "/" not in shard_name("../etc/passwd")
+        assert shard_name("a/b") != shard_name("a_b")
+
+
+class TestLegacyMigration:
+    """Test suite for migrating the old `{"entries": [...]}` log"""
+
+    def test_migrates_legacy_log_once(self, tmp_path):
+        """Legacy entries are moved into the journal and the old file is retired"""
+        legacy = tmp_path / "wellness_log.json"
+        legacy.write_text(json.dumps({"entries": [_entry(1), _entry(2)]}, indent=2))
+
+        journal = WellnessJournal(tmp_path / "wellness_log.jsonl", legacy_path=legacy)
+        assert len(journal.entries()) == 2
+        assert not legacy.exists()
+        assert (tmp_path / "wellness_log.json.migrated").exists()
+
+        journal.append(_entry(3))
+        journal.close()
+        assert len(journal.entries()) == 3
+
+    def test_migration_skipped_when_journal_exists(self, tmp_path):
+        """An existing journal is never overwritten by the legacy log"""
+        legacy = tmp_path / "wellness_log.json"
+        legacy.write_text(json.dumps({"entries": [_entry(1)]}))
+
+        journal = WellnessJournal(tmp_path / "wellness_log.jsonl")
+        journal.append(_entry(5))
+        journal.close()
+
+        assert migrate_legacy_log(legacy, journal) == 0
+        assert legacy.exists()
+        assert [e["date"] for e in journal.entries()] == ["2025-11-05"]
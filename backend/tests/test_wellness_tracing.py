@@ -0,0 +1,203 @@
+"""
+Tests for per-turn latency tracing
+"""
+
+import json
+import threading
+from unittest.mock import patch
+
+from livekit.agents import metrics
+from livekit.agents.llm import FunctionCall, FunctionCallOutput
+from livekit.agents.utils import EventEmitter
+from livekit.agents.voice.events import (
+    AgentStateChangedEvent,
+    FunctionToolsExecutedEvent,
+    MetricsCollectedEvent,
+    UserInputTranscribedEvent,
+    UserStateChangedEvent,
+)
+
+from wellness_tracing import LatencyTracer, RollingPercentiles, TurnSpan
+
+
+def _eou(delay: float) -> MetricsCollectedEvent:
+    return MetricsCollectedEvent(
+        metrics=metrics.EOUMetrics(
+            timestamp=0,
+            end_of_utterance_delay=delay,
+            transcription_delay=0.1,
+            on_user_turn_completed_delay=0.0,
+            speech_id="speech_1",
+        )
+    )
+
+
+def _llm(ttft: float, prompt_tokens: int = 1, cached_tokens: int = 0) -> MetricsCollectedEvent:
+    return MetricsCollectedEvent(
+        metrics=metrics.LLMMetrics(
+            label="llm", request_id="r", timestamp=0, duration=1.0, ttft=ttft, cancelled=False,
+            completion_tokens=1, prompt_tokens=prompt_tokens, prompt_cached_tokens=cached_tokens,
+            total_tokens=prompt_tokens + 1,
+            tokens_per_second=1.0, speech_id="speech_1",
+        )
+    )
+
+
+def _tts(ttfb: float) -> MetricsCollectedEvent:
+    return MetricsCollectedEvent(
+        metrics=metrics.TTSMetrics(
+            label="tts", request_id="r", timestamp=0, ttfb=ttfb, duration=1.0, audio_duration=1.0,
+            cancelled=False, characters_count=10, streamed=True, speech_id="speech_1",
+        )
+    )
+
+
+def _run_turn(session: EventEmitter, start: float) -> None:
+    session.emit("user_state_changed", UserStateChangedEvent(old_state="listening", new_state="speaking", created_at=start - 1))
+    session.emit("user_state_changed", UserStateChangedEvent(old_state="speaking", new_state="listening", created_at=start))
+    session.emit("user_input_transcribed", UserInputTranscribedEvent(transcript="I feel good", is_final=True, created_at=start + 0.2))
+    session.emit("metrics_collected", _eou(0.4))
+    session.emit("metrics_collected", _llm(0.3))
+    session.emit(
+        "function_tools_executed",
+        FunctionToolsExecutedEvent(
+            function_calls=[FunctionCall(call_id="c1", name="save_check_in", arguments="{}", created_at=start + 1.0)],
+            function_call_outputs=[FunctionCallOutput(call_id="c1", name="save_check_in", output="ok", is_error=False, created_at=start + 1.25)],
+        ),
+    )
+    session.emit("agent_state_changed", AgentStateChangedEvent(old_state="thinking", new_state="speaking", created_at=start + 1.5))
+    session.emit("metrics_collected", _llm(0.9))
+    session.emit("metrics_collected", _tts(0.2))
+
+
+class TestRollingPercentiles:
+    """Test suite for the rolling percentile window"""
+
+    def test_nearest_rank_percentiles(self):
+        """p50/p95/p99 are taken from the observed values"""
+        rolling = RollingPercentiles()
+        for value in range(1, 101):
+            rolling.observe(value / 100)
+
+        assert rolling.percentiles() == {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+        assert RollingPercentiles().percentiles() == {}
+
+    def test_window_is_bounded(self):
+        """Only the most recent observations contribute"""
+        rolling = RollingPercentiles(window=2)
+        for value in (10.0, 1.0, 2.0):
+            rolling.observe(value)
+
+        assert rolling.percentiles()["p99"] == 2.0
+        assert rolling.count == 3
+
+
+class TestTurnTracker:
+    """Test suite for building turn spans from session events"""
+
+    def test_turn_events_form_one_span(self, tmp_path):
+        """Every stage of a turn ends up in the same exported span"""
+        export_path = tmp_path / "turns.jsonl"
+        tracer = LatencyTracer(export_path)
+        session = EventEmitter()
+        tracker = tracer.attach(session)
+
+        _run_turn(session, start=100.0)
+        tracker.close()
+        assert tracer.flush()
+
+        spans = [json.loads(line) for line in export_path.read_text().splitlines()]
+        assert len(spans) == 1
+        span = spans[0]
+        assert span["speech_id"] == "speech_1"
+        assert span["transcript"] == "I feel good"
+        stages = span["stages"]
+        assert abs(stages["stt_final"] - 0.2) < 1e-6
+        assert stages["end_of_utterance_delay"] == 0.4
+        assert stages["llm_ttft"] == 0.3
+        assert stages["tts_ttfb"] == 0.2
+        assert abs(stages["tool.save_check_in"] - 0.25) < 1e-6
+        assert abs(stages["time_to_first_audio"] - 1.5) < 1e-6
+
+    def test_spans_are_written_off_the_recording_thread(self, tmp_path):
+        """record() only queues the span; the file is opened by the writer thread"""
+        export_path = tmp_path / "turns.jsonl"
+        tracer = LatencyTracer(export_path)
+        opened_on = []
+        real_open = open
+
+        def tracking_open(*args, **kwargs):
+            opened_on.append(threading.current_thread())
+            return real_open(*args, **kwargs)
+
+        with patch("builtins.open", tracking_open):
+            for i in range(20):
+                tracer.record(TurnSpan(started_at=float(i), speech_id=f"speech_{i}", stages={"llm_ttft": 0.3}))
+            assert tracer.flush()
+
+        assert opened_on and threading.current_thread() not in opened_on
+        assert len(export_path.read_text().splitlines()) == 20
+
+    def test_next_turn_closes_previous_span(self):
+        """A new user turn finishes the previous span and percentiles accumulate"""
+        tracer = LatencyTracer()
+        session = EventEmitter()
+        tracker = tracer.attach(session)
+
+        _run_turn(session, start=100.0)
+        _run_turn(session, start=200.0)
+        assert tracer.turns == 1
+
+        tracker.close()
+        summary = tracer.summary()
+        assert tracer.turns == 2
+        assert summary["llm_ttft"]["count"] == 2
+        assert summary["llm_ttft"]["p50"] == 0.3
+
+    def test_metrics_before_any_turn_are_ignored(self):
+        """Metrics outside of a user turn (e.g. the greeting) do not open a span"""
+        tracer = LatencyTracer()
+        session = EventEmitter()
+        tracker = tracer.attach(session)
+
+        session.emit("metrics_collected", _tts(0.2))
+        tracker.close()
+
+        assert tracer.turns == 0
+        assert tracer.summary() == {}
+
+    def test_empty_span_is_not_recorded(self):
+        """A span without any stage timings is dropped"""
+        tracer = LatencyTracer()
+        tracer.record(TurnSpan(started_at=0.0))
+        assert tracer.turns == 0
+
+
+class TestPromptCacheUsage:
+    """Test suite for prompt cache accounting"""
+
+    def test_cached_tokens_are_counted_per_prefix(self):
+        """Every LLM request counts, including ones outside a user turn"""
+        tracer = LatencyTracer()
+        session = EventEmitter()
+        tracker = tracer.attach(session, prompt_fingerprint="abc123")
+
+        session.emit("metrics_collected", _llm(0.5, prompt_tokens=1000, cached_tokens=0))
+        session.emit("metrics_collected", _llm(0.2, prompt_tokens=1200, cached_tokens=1000))
+        tracker.close()
+
+        assert tracer.prompt_cache_summary() == {
+            "abc123": {
+                "requests": 2,
+                "prompt_tokens": 2200,
+                "cached_tokens": 1000,
+                "cache_hit_rate": 0.455,
+            }
+        }
+
+    def test_cached_tokens_are_capped(self):
+        """Cached tokens never exceed the request's prompt tokens"""
+        tracer = LatencyTracer()
+        tracer.record_prompt_usage("abc123", prompt_tokens=10, cached_tokens=50)
+
+        assert tracer.prompt_cache_summary()["abc123"]["cache_hit_rate"] == 1.0
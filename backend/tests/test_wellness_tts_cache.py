@@ -0,0 +1,123 @@
+"""
+Tests for the TTS audio cache
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from livekit import rtc
+
+from wellness_tts_cache import CachedAudio, TTSAudioCache
+
+
+class _Stream:
+    def __init__(self, frames):
+        self._frames = frames
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        for frame in self._frames:
+            yield SimpleNamespace(frame=frame)
+
+
+class _FakeTTS:
+    sample_rate = 24000
+    num_channels = 1
+
+    def __init__(self):
+        self.requests = []
+
+    def synthesize(self, text):
+        self.requests.append(text)
+        samples = self.sample_rate // 10
+        pcm = bytes([len(text) % 256]) * (samples * 2)
+        return _Stream([rtc.AudioFrame(pcm, self.sample_rate, 1, samples) for _ in range(3)])
+
+
+async def _play(cache, text, tts) -> bytes:
+    return b"".join([bytes(frame.data) async for frame in cache.audio(text, tts)])
+
+
+class TestTTSAudioCache:
+    """Test suite for TTSAudioCache"""
+
+    @pytest.mark.asyncio
+    async def test_second_request_is_served_from_memory(self, tmp_path):
+        """A phrase is synthesized once, then played from the cache"""
+        cache = TTSAudioCache(tmp_path)
+        tts = _FakeTTS()
+
+        first = await _play(cache, "How are you feeling today?", tts)
+        second = await _play(cache, "How are you  feeling today? ", tts)
+
+        assert first == second
+        assert tts.requests == ["How are you feeling today?"]
+        assert cache.stats()["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        """A new process finds phrases another one synthesized"""
+        tts = _FakeTTS()
+        await TTSAudioCache(tmp_path).warm(["Hello there"], tts)
+
+        cache = TTSAudioCache(tmp_path)
+        assert await cache.warm(["Hello there"], tts) == 0
+        assert len(tts.requests) == 1
+        assert cache.stats()["disk_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_prewarm_only_reads_disk(self, tmp_path):
+        """Prewarm loads cached phrases without a TTS; the first job synthesizes the rest"""
+        tts = _FakeTTS()
+        await TTSAudioCache(tmp_path).warm(["Hello there"], tts)
+
+        cache = TTSAudioCache(tmp_path)
+        assert cache.prewarm(["Hello there", "Goodbye"]) == 1
+        assert cache.stats()["entries"] == 1
+
+        cache.warm_in_background(["Hello there", "Goodbye"], tts)
+        cache.warm_in_background(["Hello there", "Goodbye"], tts)
+        await cache._warming
+
+        assert tts.requests == ["Hello there", "Goodbye"]
+        assert cache.stats()["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_key_covers_voice_and_sample_rate(self, tmp_path):
+        """Changing the voice or the output format misses instead of playing the wrong audio"""
+        tts = _FakeTTS()
+        await TTSAudioCache(tmp_path, voice="en-US-matthew").warm(["Hi"], tts)
+        await TTSAudioCache(tmp_path, voice="en-US-natalie").warm(["Hi"], tts)
+        tts.sample_rate = 16000
+        await TTSAudioCache(tmp_path, voice="en-US-matthew").warm(["Hi"], tts)
+
+        assert len(tts.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_memory_tier_is_bounded(self):
+        """Least recently used phrases are evicted from memory"""
+        tts = _FakeTTS()
+        cache = TTSAudioCache(memory_bytes=3 * 3 * 4800)
+        await cache.warm(["one", "two", "three"], tts)
+        await cache.lookup("one", tts)
+        await cache.warm(["four"], tts)
+
+        assert cache.stats()["entries"] == 3
+        assert await cache.lookup("one", tts) is not None
+        assert await cache.lookup("two", tts) is None
+
+    def test_frames_cover_the_audio(self):
+        """Playback frames are 20 ms long and add up to the cached audio"""
+        audio = CachedAudio(b"\x01\x00" * 1000, 16000, 1)
+        frames = list(audio.frames())
+
+        assert [f.samples_per_channel for f in frames] == [320, 320, 320, 40]
+        assert b"".join(bytes(f.data) for f in frames) == audio.pcm
@@ -0,0 +1,59 @@
+"""
+Tests for the event loop watchdog
+"""
+
+import asyncio
+import time
+from pathlib import Path
+
+from wellness_watchdog import LoopWatchdog
+
+
+def _blocking_helper(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+class TestLoopWatchdog:
+    """Test suite for event-loop lag measurement and block detection"""
+
+    async def test_idle_loop_has_no_blocks(self):
+        """A loop that is never blocked only records lag samples"""
+        watchdog = LoopWatchdog(block_threshold=0.1, interval=0.01)
+        watchdog.start()
+        await asyncio.sleep(0.1)
+        await watchdog.stop()
+
+        stats = watchdog.stats()
+        assert stats["blocks"] == 0
+        assert watchdog.lag.count > 0
+        assert stats["lag_s"]["p50"] < 0.1
+
+    async def test_blocking_call_is_attributed(self):
+        """A synchronous sleep on the loop is caught and blamed on its caller"""
+        watchdog = LoopWatchdog(
+            block_threshold=0.05,
+            interval=0.01,
+            project_root=Path(__file__).parent,
+        )
+        watchdog.start()
+        await asyncio.sleep(0.03)
+
+        _blocking_helper(0.25)
+        await asyncio.sleep(0.05)
+        await watchdog.stop()
+
+        stats = watchdog.stats()
+        assert stats["blocks"] == 1
+        assert stats["blocked_s"] >= 0.15
+        block = watchdog.recent_blocks[-1]
+        assert "_blocking_helper" in block.where
+        assert any("time.sleep" in line for line in block.stack)
+
+    async def test_start_is_idempotent(self):
+        """Starting twice on the same loop keeps a single heartbeat"""
+        watchdog = LoopWatchdog(interval=0.01)
+        watchdog.start()
+        task = watchdog._task
+        watchdog.start()
+        assert watchdog._task is task
+        await watchdog.stop()